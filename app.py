@@ -1,57 +1,248 @@
 import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
-import matplotlib.pyplot as plt
 import plotly.express as px
 from neo4jdb.Dart import DartExecution
 from neo4jdb.Bus import BusExecution
 from neo4jdb.Luas import LuasExecution
 from utils.visualization import TransportVisualization
-from neo4j import GraphDatabase
+from utils.neo4j_connection import SharedDriver, query_cache
+from utils.centrality import CentralityVisualizationApp
+from utils.graph_engine import TransportGraph, MULTIMODAL
+from utils.dataset_loader import load_datasets
+from utils.pagerank import Neo4jPageRank
+from utils.graph_schema import apply_schema
+from utils.async_queries import AsyncQueryExecution, get_bridge
+from utils.journey_planner import JourneyPlanner
+from utils.station_index import StationNameIndex
+from utils.facility_index import FacilityIndex
+from utils.network_view import GROUP_BY, network_html
+from utils.snapshot import Snapshot, current_snapshot, refresh_snapshot
+from utils.tracing import start_trace, span, bind, set_memory_tracking
+from config import (
+    get_graph_backend, get_tracing_config, get_network_view_config, get_snapshot_config, get_neo4j_config
+)
+
+# Collect timing spans for this script run; shown in the sidebar Performance panel
+# tracemalloc is process-wide, so it follows the server setting (TRANSPORT_TRACEMALLOC), not any one session
+set_memory_tracking(get_tracing_config()["tracemalloc"])
+page_trace = start_trace("page")
 
 # Dynamically locate the dataset paths
 base_path = os.path.dirname(os.path.abspath(__file__))
 bus_data_path = os.path.join(base_path, "data", "BUS_Dataset.csv")
 dart_data_path = os.path.join(base_path, "data", "DART_Dataset.csv")
 luas_data_path = os.path.join(base_path, "data", "LUAS_Dataset.csv")
+source_paths = {"BUS": bus_data_path, "DART": dart_data_path, "LUAS": luas_data_path}
+
+
+class SharedBusExecution(SharedDriver, BusExecution):
+    pass
+
+
+class SharedDartExecution(SharedDriver, DartExecution):
+    pass
+
+
+class SharedLuasExecution(SharedDriver, LuasExecution):
+    pass
+
+
+@st.cache_resource
+def get_executors():
+    """
+    Build the executors once per process; their queries borrow sessions from the shared driver pool.
+    """
+    config = get_neo4j_config()
+    credentials = (config["uri"], config["username"], config["password"])
+    return (
+        SharedBusExecution(*credentials),
+        SharedDartExecution(*credentials),
+        SharedLuasExecution(*credentials),
+    )
+
+
+@st.cache_resource
+def ensure_schema():
+    """
+    Create missing indexes and constraints once per process; returns any that are still missing.
+    """
+    try:
+        return apply_schema()
+    except Exception as e:
+        return [f"Could not verify the Neo4j schema: {e}"]
+
+
+# One entry: an older snapshot's mappings are released once a newer one is opened
+@st.cache_resource(max_entries=1)
+def get_snapshot(name):
+    """
+    Open a published snapshot once per process; its files are memory-mapped,
+    so every worker process shares one copy of the datasets, graphs and path indexes.
+    """
+    return Snapshot.open(name=name) if name else None
+
+
+def load_snapshot_sources():
+    """
+    Datasets, graphs and path indexes for a new snapshot; only the process
+    building it reads the graphs from the CSV files.
+    """
+    transport_graph = TransportGraph.from_csv(bus_data_path, dart_data_path, luas_data_path)
+    transport_graph.build_path_indexes()
+    return (load_datasets(os.path.join(base_path, "data")), transport_graph.snapshot_graphs(),
+            transport_graph.snapshot_path_indexes())
+
+
+snapshot = None
+if get_snapshot_config()["enabled"]:
+    # Reading CURRENT each run picks up a snapshot another worker published after a data change
+    snapshot = get_snapshot(current_snapshot())
+    if snapshot is None or not snapshot.matches(source_paths):
+        snapshot = get_snapshot(refresh_snapshot(source_paths, load_snapshot_sources))
+snapshot_name = snapshot.name if snapshot is not None else None
+
+
+# One entry: a newly published snapshot replaces the graph built from the previous one
+@st.cache_resource(max_entries=1)
+def get_transport_graph(snapshot_name):
+    """
+    Build the in-memory transport graph once per process: on the snapshot's
+    memory-mapped graphs and path indexes when it matches the CSV files,
+    otherwise from the files.
+    """
+    snapshot = get_snapshot(snapshot_name)
+    transport_graph = TransportGraph.from_snapshot(snapshot, source_paths) if snapshot is not None else None
+    if transport_graph is None:
+        transport_graph = TransportGraph.from_csv(bus_data_path, dart_data_path, luas_data_path)
+    transport_graph.build_path_indexes()
+    return transport_graph
+
+
+@st.cache_resource
+def get_journey_planner(snapshot_name, graph_version):
+    """
+    Build the multimodal routing graph once per version of the in-memory transport graph.
+    """
+    with span("JourneyPlanner.build"):
+        return JourneyPlanner(get_transport_graph(snapshot_name))
+
+
+graph_backend = get_graph_backend()
+if graph_backend == "networkx":
+    transport_graph = get_transport_graph(snapshot_name)
+    bus_executor = transport_graph.executor("BUS")
+    dart_executor = transport_graph.executor("DART")
+    luas_executor = transport_graph.executor("LUAS")
+else:
+    bus_executor, dart_executor, luas_executor = get_executors()
+    for problem in ensure_schema():
+        st.warning(problem)
+
+if snapshot is not None and snapshot.has_datasets():
+    bus_data, dart_data, luas_data = snapshot.datasets()
+else:
+    # Typed, cached datasets: a warm rerun only stats the CSV files
+    bus_data, dart_data, luas_data = load_datasets(os.path.join(base_path, "data"))
+
+
+@st.cache_resource
+def get_visualization(dataset_stamp, snapshot_name, _facility_index):
+    """
+    Build the visualization once per version of the dataset files (and snapshot),
+    so derived columns and dataset fingerprints are not recomputed on every rerun.
+    Its facility charts use the cached facility index.
+    """
+    with span("TransportVisualization.build"):
+        return TransportVisualization(bus_data, dart_data, luas_data, _facility_index)
+
+
+@st.cache_resource
+def get_station_index(dataset_stamp):
+    """
+    Build the station-name index once per version of the dataset files.
+    """
+    with span("StationNameIndex.build"):
+        return StationNameIndex.from_datasets(bus_data, dart_data, luas_data)
+
+
+@st.cache_resource
+def get_facility_index(dataset_stamp):
+    """
+    Compile the DART and LUAS facility bitsets once per version of the dataset files.
+    """
+    with span("FacilityIndex.build"):
+        return FacilityIndex.from_datasets(dart_data, luas_data)
+
+
+dataset_stamp = tuple(
+    (stat.st_mtime_ns, stat.st_size)
+    for stat in map(os.stat, (bus_data_path, dart_data_path, luas_data_path))
+)
+station_index = get_station_index(dataset_stamp)
+facility_index = get_facility_index(dataset_stamp)
+visualization = get_visualization(dataset_stamp, snapshot_name, facility_index)
+
+
+def station_input(label, category=None):
+    """
+    Station text input resolved against the station index before any query is sent.
 
-URI = "bolt://localhost:7687"
-USER = "neo4j"
-PASSWORD = "9820065151"
-bus_executor = BusExecution(URI, USER, PASSWORD)
-dart_executor = DartExecution(URI, USER, PASSWORD)
-luas_executor = LuasExecution(URI, USER, PASSWORD)
+    Exact (normalized) names are used as typed; otherwise matching stations are
+    offered in a selectbox, preselecting a unique prefix or close fuzzy match.
 
-bus_data = pd.read_csv(bus_data_path, encoding="latin1")
-dart_data = pd.read_csv(dart_data_path, encoding="latin1")
-luas_data = pd.read_csv(luas_data_path, encoding="latin1")
+    :param category: Transport type whose stations are matched; None for all.
+    :return: Canonical station name, or None when nothing matches.
+    """
+    text = st.text_input(label)
+    if not text.strip():
+        return None
+    with span("StationNameIndex.resolve", category=category) as current:
+        name, match = station_index.resolve(text, category)
+        current.set(match=match)
+        if match == "exact":
+            return name
+        suggestions = station_index.complete(text, category, limit=8) \
+            or [suggestion for suggestion, _ in station_index.fuzzy(text, category, limit=8)]
+    if name is not None and name not in suggestions:
+        suggestions.insert(0, name)
+    if not suggestions:
+        st.warning(f"No {category or ''} station matches '{text}'.")
+        return None
+    return st.selectbox(
+        f"Stations matching '{text}'", suggestions,
+        index=suggestions.index(name) if name is not None else 0, key=f"{label}_{category}_{text}",
+    )
+
+
+@st.cache_resource
+def get_centrality_app():
+    """
+    Keep one CentralityVisualizationApp per process so its result cache survives reruns.
+    """
+    return CentralityVisualizationApp()
 
-# Initialize the visualization class
-visualization = TransportVisualization(bus_data, dart_data, luas_data)
 
-# Centrality Visualization Class
-class CentralityVisualizationApp:
-    def __init__(self, uri, user, password):
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+@st.cache_resource
+def get_pagerank_app():
+    """
+    Keep one Neo4jPageRank per process so versioned ranks survive reruns.
+    """
+    return Neo4jPageRank()
 
-    def close(self):
-        self.driver.close()
 
-    def execute_query(self, query, parameters=None):
-        with self.driver.session() as session:
-            result = session.run(query, parameters)
-            return [record for record in result]
+@st.cache_resource
+def get_async_queries():
+    """
+    Async query layer sharing the degree and PageRank caches with the synchronous helpers.
+    """
+    return AsyncQueryExecution(get_centrality_app(), get_pagerank_app().cache)
 
-    def fetch_degree_centrality(self, category):
-        query = f"""
-        MATCH (s:Station)-[r:CONNECTED_BY_ROUTE]-(t:Station)
-        WHERE EXISTS {{ MATCH (category:Category {{name: '{category}'}})-[:HAS_STATION]->(s) }}
-        RETURN s.name AS station, COUNT(r) AS DegreeCentrality
-        ORDER BY DegreeCentrality DESC
-        """
-        return self.execute_query(query)
 
-centrality_app = CentralityVisualizationApp(URI, USER, PASSWORD)
+centrality_app = transport_graph if graph_backend == "networkx" else get_centrality_app()
 
 # Streamlit App UI
 st.title("Irish Transport System - Data Visualization")
@@ -59,50 +250,172 @@ st.title("Irish Transport System - Data Visualization")
 # Sidebar Options
 st.sidebar.header("Transport Selection")
 transport_option = st.sidebar.selectbox("Select a Transport Type", ["DART", "LUAS", "BUS"])
-analysis_option = st.sidebar.selectbox("Select Analysis Type", ["Degree Centrality", "Shortest Path", "PageRank"])
-
-# Display graphs for the selected transport type
-if transport_option == "BUS":
-    st.subheader("BUS Dataset Visualizations")
-    visualization.plot_frequency_vs_duration()
-    visualization.plot_top_routes_by_landmarks()
-    visualization.plot_heatmap_landmarks()
-
-elif transport_option == "DART":
-    st.subheader("DART Dataset Visualizations")
-    visualization.plot_facilities_availability()
-    visualization.plot_weekend_operational_stations()
-    visualization.plot_routes_serviced_per_station()
-    visualization.plot_treemap_facilities()
-
-elif transport_option == "LUAS":
-    st.subheader("LUAS Dataset Visualizations")
-    visualization.plot_footfall_by_line()
-    # visualization.plot_footfall_trends()
-    visualization.plot_parking_availability()
-    visualization.plot_accessibility_comparison()
-    visualization.plot_nearby_landmarks()
-    visualization.plot_station_zone_relationship()
-    # visualization.plot_accessibility_sunburst()
+analysis_option = st.sidebar.selectbox("Select Analysis Type", ["Degree Centrality", "Shortest Path", "PageRank", "Journey Planner"])
+use_multimodal = graph_backend == "networkx" and st.sidebar.checkbox(
+    "Centrality on merged Bus+DART+LUAS graph", value=False
+)
+analysis_category = MULTIMODAL if use_multimodal else transport_option
+top_n_option = st.sidebar.selectbox("Stations in ranking charts", [10, 25, 50, 100, "All"], index=1)
+top_n = None if top_n_option == "All" else top_n_option
+
+
+def show_kernel_report(measure):
+    """
+    Caption with the in-memory kernel's iterations, residual and wall time.
+    """
+    if graph_backend == "networkx":
+        report = transport_graph.kernel_reports.get((analysis_category, measure))
+        if report:
+            st.caption(
+                f"{measure}: {report['iterations']} iteration(s), residual {report['residual']:.2e}, "
+                f"{report['wall_time'] * 1000:.2f} ms"
+            )
+
+
+# PageRank node label and relationship type per transport type
+PAGERANK_TARGETS = {
+    "BUS": ("Route", "CONNECTED_TO"),
+    "DART": ("Station", "CONNECTED_BY_ROUTE"),
+    "LUAS": ("Station", "CONNECTED_BY_LINE"),
+}
+
+# Rows shown in the facility filter's station table
+FACILITY_TABLE_ROWS = 500
+
+
+def fetch_pagerank():
+    """
+    In-memory PageRank records for the current selection; safe to run in a worker thread.
+    """
+    node_label, relationship_type = PAGERANK_TARGETS[transport_option]
+    executor = {"BUS": bus_executor, "DART": dart_executor, "LUAS": luas_executor}[transport_option]
+
+    if use_multimodal:
+        return transport_graph.pagerank(MULTIMODAL)
+    return executor.calculate_pagerank(node_label, relationship_type)
+
+
+def wait_for(future):
+    """
+    Wait for an analysis result in short slices. Each slice updates a placeholder,
+    which lets Streamlit stop this run when the selection changes; the next run
+    then cancels the stale query.
+    """
+    placeholder = st.empty()
+    while True:
+        try:
+            result = future.result(timeout=0.1)
+            placeholder.empty()
+            return result
+        except FutureTimeout:
+            placeholder.caption("Running query...")
+
+
+@st.cache_resource
+def get_worker_pool():
+    """
+    Thread pool for analysis queries that run while the charts are drawn.
+    """
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="analysis")
+
+
+# Start the analysis query first so it runs concurrently with chart rendering
+analysis_slot = st.session_state.setdefault("analysis_slot", uuid.uuid4().hex)
+analysis_future = None
+if graph_backend == "networkx":
+    if analysis_option == "Degree Centrality":
+        analysis_future = get_worker_pool().submit(
+            bind(centrality_app.fetch_degree_centrality), analysis_category, top_n
+        )
+    elif analysis_option == "PageRank":
+        analysis_future = get_worker_pool().submit(bind(fetch_pagerank))
+else:
+    # Async queries on the bridge loop; a newer selection in this session cancels the stale one.
+    # PageRank comes straight from a cached, versioned computation instead of n.rank write-back.
+    if analysis_option == "Degree Centrality":
+        analysis_future = get_bridge().submit(
+            get_async_queries().fetch_degree_centrality(analysis_category, top_n), slot=analysis_slot
+        )
+    elif analysis_option == "PageRank":
+        analysis_future = get_bridge().submit(
+            get_async_queries().calculate_pagerank(transport_option, *PAGERANK_TARGETS[transport_option]),
+            slot=analysis_slot,
+        )
+    else:
+        get_bridge().cancel(analysis_slot)
+
+# Display graphs for the selected transport type; only the chosen panels are computed
+st.subheader(f"{transport_option} Dataset Visualizations")
+panel_titles = visualization.panel_titles(transport_option)
+visible_panels = st.multiselect(
+    "Charts to display", panel_titles, default=panel_titles[:1], key=f"panels_{transport_option}"
+)
+for title in visible_panels:
+    visualization.render_panel(transport_option, title)
+
+# Multi-facility station filter, answered from the facility bitsets
+with st.expander("Find Stations by Facility"):
+    facility_names = facility_index.facility_names()
+    required = st.multiselect("Stations with", facility_names, key="facilities_required")
+    excluded = st.multiselect(
+        "Stations without", [name for name in facility_names if name not in required], key="facilities_excluded"
+    )
+    scope = st.radio("Stations listed in", ["DART or LUAS", "DART", "LUAS"], horizontal=True, key="facilities_scope")
+    with span("FacilityIndex.query", required=len(required), excluded=len(excluded)):
+        scope_category = None if scope == "DART or LUAS" else scope
+        matching = facility_index.count(required, excluded, scope_category)
+        matches = facility_index.table(required, excluded, scope_category, limit=FACILITY_TABLE_ROWS)
+    st.write(f"{matching} of {len(facility_index)} stations match.")
+    if matching:
+        st.dataframe(matches, hide_index=True)
+        if matching > FACILITY_TABLE_ROWS:
+            st.caption(f"Showing the first {FACILITY_TABLE_ROWS} stations.")
+
+# Interactive network, reduced on the server to a bounded number of nodes before drawing
+with st.expander(f"{analysis_category} Network"):
+    if st.checkbox("Show network", key="network_view"):
+        network_graph = get_transport_graph(snapshot_name)
+        network_config = get_network_view_config()
+        graph_size = network_graph.graph_for(analysis_category).number_of_nodes()
+        detail = st.radio(
+            "Level of detail", ["Groups", "Top stations"], index=int(graph_size <= network_config["max_nodes"]),
+            horizontal=True, key=f"network_detail_{analysis_category}",
+        )
+        group_by = st.selectbox(
+            "Group stations by", list(GROUP_BY), format_func=GROUP_BY.get, key="network_group_by",
+            disabled=detail != "Groups",
+        )
+        min_degree = st.slider("Hide stations with fewer connections than", 0, 10, 0, key="network_min_degree")
+        expand_key = f"network_expand_{analysis_category}_{detail}_{group_by}"
+        expanded = st.session_state.get(expand_key, [])
+        html, drawn = network_html(
+            network_graph, analysis_category, "groups" if detail == "Groups" else "top", group_by, min_degree, expanded
+        )
+        st.multiselect(
+            "Expand stations or groups", sorted(set(drawn) | set(expanded)), key=expand_key,
+            max_selections=network_config["max_expansions"],
+        )
+        st.caption(f"{len(drawn)} nodes drawn for {graph_size} stations.")
+        components.html(html, height=network_config["height"] + 20)
 
 results = None  # Initialize results to ensure it's always defined
 
 # Degree Centrality Analysis
 if analysis_option == "Degree Centrality":
-    st.subheader(f"Degree Centrality for {transport_option}")
+    st.subheader(f"Degree Centrality for {analysis_category}")
 
-    # Fetch centrality data using the new class
-    centrality_data = centrality_app.fetch_degree_centrality(transport_option)
+    # Centrality data fetched while the charts were drawn, already a DataFrame (top-N limited in the query)
+    centrality_data = wait_for(analysis_future)
+    show_kernel_report("degree")
 
-    if centrality_data:
+    if centrality_data is not None and not centrality_data.empty:
         try:
-            # Convert results to DataFrame
-            df = pd.DataFrame(centrality_data)
-            df.columns = ["Station", "Degree Centrality"]
+            # Rename into a new frame; the fetched one is shared through the result cache
+            df = centrality_data.rename(columns={"station": "Station", "DegreeCentrality": "Degree Centrality"})
 
             # Display data and plot bar chart
             st.dataframe(df)
-            fig = px.bar(df, x="Station", y="Degree Centrality", title=f"{transport_option} Station Degree Centrality", labels={"Degree Centrality": "Degree Centrality"})
+            fig = px.bar(df, x="Station", y="Degree Centrality", title=f"{analysis_category} Station Degree Centrality", labels={"Degree Centrality": "Degree Centrality"})
             st.plotly_chart(fig)
         except Exception as e:
             st.error(f"An error occurred while processing the results: {e}")
@@ -113,17 +426,22 @@ if analysis_option == "Degree Centrality":
 elif analysis_option == "Shortest Path":
     st.subheader(f"Shortest Path for {transport_option}")
 
-    start_station = st.text_input("Enter Start Station")
-    end_station = st.text_input("Enter End Station")
+    start_station = station_input("Enter Start Station", transport_option)
+    end_station = station_input("Enter End Station", transport_option)
 
-    if st.button("Calculate Shortest Path"):
+    # Unmatched names never reach the executors, so a typo costs no database round trip
+    calculate = st.button("Calculate Shortest Path")
+    if calculate and (start_station is None or end_station is None):
+        st.warning("Enter a start and an end station that match the suggestions.")
+    elif calculate:
      try:
-        if transport_option == "BUS":
-            results = bus_executor.find_shortest_path(start_station, end_station)
-        elif transport_option == "DART":
-             results = dart_executor.calculate_shortest_path(start_station, end_station)
-        elif transport_option == "LUAS":
-             results = luas_executor.calculate_shortest_path(start_station, end_station)
+        with span("executor.shortest_path", category=transport_option):
+            if transport_option == "BUS":
+                results = bus_executor.find_shortest_path(start_station, end_station)
+            elif transport_option == "DART":
+                 results = dart_executor.calculate_shortest_path(start_station, end_station)
+            elif transport_option == "LUAS":
+                 results = luas_executor.calculate_shortest_path(start_station, end_station)
 
         if results:
             for record in results:
@@ -136,40 +454,70 @@ elif analysis_option == "Shortest Path":
 
 # PageRank Analysis
 elif analysis_option == "PageRank":
-    st.subheader(f"PageRank for {transport_option}")
-
-    if transport_option == "BUS":
-        node_label = "Route"
-        relationship_type = "CONNECTED_TO"
-        bus_executor.calculate_pagerank(node_label, relationship_type)
-    elif transport_option == "DART":
-        node_label = "Station"
-        relationship_type = "CONNECTED_BY_ROUTE"
-        dart_executor.calculate_pagerank(node_label, relationship_type)
-    elif transport_option == "LUAS":
-        node_label = "Station"
-        relationship_type = "CONNECTED_BY_LINE"
-        # luas_executor.calculate_pagerank(node_label, relationship_type)
-
-    results_query = f"""
-    MATCH (n:{node_label})
-    RETURN n.name AS Name, n.rank AS PageRank
-    ORDER BY PageRank DESC
-    """
-    if transport_option == "BUS":
-        results = bus_executor.execute_query(results_query)
-    elif transport_option == "DART":
-        results = dart_executor.execute_query(results_query)
-    elif transport_option == "LUAS":
-        results = luas_executor.execute_query(results_query)
+    st.subheader(f"PageRank for {analysis_category}")
+
+    results = wait_for(analysis_future)
+    show_kernel_report("pagerank")
 
     if results:
         df = pd.DataFrame(results)
         st.dataframe(df)
-        st.bar_chart(df.set_index("Name")[["PageRank"]])
+        # Records are sorted by rank, so the chart shows the top N
+        st.bar_chart(df.head(top_n).set_index("Name")[["PageRank"]])
+
+# Multimodal Journey Planner (in memory, whichever backend is selected)
+elif analysis_option == "Journey Planner":
+    st.subheader("Journey Planner (Bus + DART + LUAS)")
+
+    start_station = station_input("From Station")
+    end_station = station_input("To Station")
+
+    if st.button("Plan Journey"):
+        planner = get_journey_planner(snapshot_name, get_transport_graph(snapshot_name).version)
+        journeys, plan_report = planner.plan(start_station, end_station)
+        if journeys:
+            for rank, journey in enumerate(journeys, start=1):
+                st.write(
+                    f"Option {rank}: {journey['totalMinutes']} min, {journey['transfers']} transfer(s), "
+                    f"{journey['totalDistance']} km"
+                )
+                st.write(" -> ".join(journey["path"]))
+                st.dataframe(pd.DataFrame(journey["legs"]))
+            st.caption(f"Planned in {plan_report['wall_time'] * 1000:.1f} ms")
+        else:
+            st.warning("No journey found between these stations.")
+
+# Spans of this run and the shared Cypher result cache counters (filled in after this run's queries)
+with st.sidebar.expander("Performance"):
+    st.caption(f"Page run: {page_trace.elapsed_ms():.0f} ms, {len(page_trace.spans)} spans")
+    span_rows = page_trace.rows()
+    if span_rows:
+        span_table = pd.DataFrame({
+            "Span": ["\u00a0\u00a0" * row["depth"] + row["name"] for row in span_rows],
+            "ms": [row["duration_ms"] for row in span_rows],
+            "Memory KiB": [
+                None if row["memory_delta_bytes"] is None else row["memory_delta_bytes"] / 1024 for row in span_rows
+            ],
+            "Details": [", ".join(f"{key}={value}" for key, value in row["attributes"].items()) for row in span_rows],
+        })
+        st.dataframe(span_table, hide_index=True)
+    cache_stats = query_cache.stats() if graph_backend != "networkx" else None
+    if cache_stats is not None:
+        st.caption(
+            f"Query cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%}), "
+            f"{cache_stats['entries']} entries, {cache_stats['bytes'] / 2 ** 20:.1f} MiB, "
+            f"{cache_stats['invalidations']} invalidated; saved {cache_stats['saved_seconds'] * 1000:.0f} ms "
+            f"of {cache_stats['db_seconds'] * 1000:.0f} ms database time"
+        )
+    st.caption(
+        "Memory per span (tracemalloc): " + ("on" if get_tracing_config()["tracemalloc"] else "off")
+        + ", set for the server with TRANSPORT_TRACEMALLOC=1"
+    )
+    st.download_button(
+        "Export JSON",
+        page_trace.to_json(query_cache=cache_stats),
+        file_name="performance_trace.json",
+        mime="application/json",
+    )
 
-# Close Neo4j connections
-bus_executor.close()
-dart_executor.close()
-luas_executor.close()
-centrality_app.close()
+# Neo4j connections stay pooled in the shared driver across reruns; it is closed at process exit.
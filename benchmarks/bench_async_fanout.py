@@ -0,0 +1,197 @@
+"""
+Benchmark: serial synchronous queries vs the asyncio.gather fan-out of the async layer.
+
+Both variants compute a cold PageRank, whose node and edge lists are two
+independent reads, against a local stub that answers every query after a
+fixed simulated round trip, so the difference is purely the number of serial
+round trips.
+Pass ``--live`` to use the Neo4j instance from config.py (or NEO4J_URI) instead.
+
+    python -m benchmarks.bench_async_fanout --latency 20 --repeats 10
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from utils.async_queries import AsyncQueryExecution, get_bridge, set_async_driver, close_async_driver
+from utils.centrality import CentralityVisualizationApp
+from utils.neo4j_connection import set_driver, close_driver, query_cache
+from utils.pagerank import Neo4jPageRank, PageRankCache
+
+STATIONS = [f"Station {i}" for i in range(50)]
+
+
+def stub_records(query, parameters):
+    """
+    Canned answers for the app's read queries, picked by query text.
+    """
+    parameters = parameters or {}
+    if "DegreeCentrality" in query:
+        return [
+            {"category": category, "station": name, "DegreeCentrality": 2}
+            for category in parameters.get("categories", []) for name in STATIONS
+        ]
+    if "AS source" in query:
+        return [{"source": a, "target": b} for a, b in zip(STATIONS, STATIONS[1:])]
+    if "AS name" in query:
+        return [{"name": name} for name in STATIONS]
+    if "AS version" in query:
+        return [{"version": 0}]
+    if "shortestPath" in query:
+        return [{"path": [parameters["start"], parameters["end"]], "totalDistance": 1.0}]
+    return []
+
+
+class StubResult(list):
+    def keys(self):
+        return list(self[0]) if self else []
+
+    def single(self):
+        return self[0] if self else None
+
+    def consume(self):
+        return None
+
+
+class StubSession:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, parameters=None, **kwargs):
+        time.sleep(self.latency)
+        return StubResult(stub_records(query, parameters))
+
+
+class StubDriver:
+    """
+    Synchronous stand-in for neo4j.Driver with a fixed round-trip latency.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def session(self, **kwargs):
+        return StubSession(self.latency)
+
+    def close(self):
+        pass
+
+
+class StubAsyncResult:
+    def __init__(self, records):
+        self._keys = list(records[0]) if records else []
+        self._records = iter(records)
+
+    async def keys(self):
+        return self._keys
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._records)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def consume(self):
+        return None
+
+
+class StubAsyncSession:
+    def __init__(self, latency):
+        self.latency = latency
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def run(self, query, parameters=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return StubAsyncResult(stub_records(query, parameters))
+
+
+class StubAsyncDriver:
+    """
+    Asynchronous stand-in for neo4j.AsyncDriver with the same fixed latency.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def session(self, **kwargs):
+        return StubAsyncSession(self.latency)
+
+    async def close(self):
+        pass
+
+
+def serial_pagerank(category, node_label, relationship_type):
+    """
+    The synchronous flow: the edge read waits for the node read.
+    """
+    return Neo4jPageRank(PageRankCache()).calculate_pagerank(category, node_label, relationship_type)
+
+
+def concurrent_pagerank(category, node_label, relationship_type):
+    """
+    The async flow: node and edge reads run concurrently on the bridge loop.
+    """
+    queries = AsyncQueryExecution(CentralityVisualizationApp(), PageRankCache())
+    return get_bridge().run(queries.calculate_pagerank(category, node_label, relationship_type))
+
+
+def timed(function, repeats):
+    wall = []
+    for _ in range(repeats):
+        # Cold loads: the shared result cache would otherwise answer every repeat
+        query_cache.clear()
+        start = time.perf_counter()
+        function("DART", "Station", "CONNECTED_BY_ROUTE")
+        wall.append((time.perf_counter() - start) * 1000)
+    return wall
+
+
+def check_cancellation(latency):
+    """
+    Submit a PageRank, supersede it in the same slot and confirm the first one was cancelled.
+    """
+    bridge = get_bridge()
+    query_cache.clear()
+    queries = AsyncQueryExecution(CentralityVisualizationApp(), PageRankCache())
+    stale = bridge.submit(queries.calculate_pagerank("DART", "Station", "CONNECTED_BY_ROUTE"), slot="bench")
+    time.sleep(latency / 2)
+    fresh = bridge.submit(queries.calculate_pagerank("LUAS", "Station", "CONNECTED_BY_LINE"), slot="bench")
+    fresh.result()
+    return stale.cancelled()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=20.0, help="Simulated round trip in milliseconds")
+    parser.add_argument("--repeats", type=int, default=10, help="Cold PageRank loads per variant")
+    parser.add_argument("--live", action="store_true", help="Query the configured Neo4j instance instead of the stub")
+    args = parser.parse_args()
+    latency = args.latency / 1000
+    if not args.live:
+        set_driver(StubDriver(latency))
+        set_async_driver(StubAsyncDriver(latency))
+    try:
+        serial = timed(serial_pagerank, args.repeats)
+        fanned = timed(concurrent_pagerank, args.repeats)
+        print(f"serial sync queries     : median {statistics.median(serial):.1f} ms, max {max(serial):.1f} ms")
+        print(f"asyncio.gather fan-out  : median {statistics.median(fanned):.1f} ms, max {max(fanned):.1f} ms")
+        print(f"speed-up                : {statistics.median(serial) / statistics.median(fanned):.2f}x")
+        if not args.live:
+            print(f"superseded query cancelled: {check_cancellation(latency)}")
+    finally:
+        close_async_driver()
+        close_driver()
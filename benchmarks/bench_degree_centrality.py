@@ -0,0 +1,138 @@
+"""
+Micro-benchmark: per-category f-string degree query vs the batched, parameterized one.
+
+Simulates a user flipping the transport selectbox ``--switches`` times against
+the Neo4j instance from config.py (or NEO4J_URI). Query caches are cleared
+first so both variants start cold.
+
+Plan-cache hits and misses are measured, not assumed: after each variant
+every distinct query text is run once more, when its plan is certainly
+cached, and a round trip counts as a miss when the server took noticeably
+longer than that warm run before the first record was available (planning
+is included in ``result_available_after``).
+
+    python -m benchmarks.bench_degree_centrality --switches 30
+"""
+import argparse
+import statistics
+import time
+from utils.centrality import CentralityVisualizationApp
+from utils.neo4j_connection import get_session, close_driver, query_cache
+from utils.query_cache import normalize_query
+from utils.tracing import start_trace
+
+CATEGORIES = ["DART", "LUAS", "BUS"]
+
+LEGACY_QUERY = """
+MATCH (s:Station)-[r:CONNECTED_BY_ROUTE]-(t:Station)
+WHERE EXISTS {{ MATCH (category:Category {{name: '{category}'}})-[:HAS_STATION]->(s) }}
+RETURN s.name AS station, COUNT(r) AS DegreeCentrality
+ORDER BY DegreeCentrality DESC
+"""
+
+# A round trip is a plan-cache miss when it waited this much longer than the warm run of its query
+MISS_FACTOR = 2.0
+MISS_MIN_MS = 1.0
+
+
+def clear_query_caches():
+    with get_session() as session:
+        session.run("CALL db.clearQueryCaches()").consume()
+
+
+def timed_run(query, parameters=None):
+    """
+    Run one query and return (client wall time, server available-after time, server total time) in milliseconds.
+    """
+    start = time.perf_counter()
+    with get_session() as session:
+        summary = session.run(query, parameters).consume()
+    wall = (time.perf_counter() - start) * 1000
+    return wall, summary.result_available_after, summary.result_available_after + summary.result_consumed_after
+
+
+def count_plan_cache(round_trips):
+    """
+    Classify round trips as plan-cache hits or misses against a warm rerun of each query.
+
+    :param round_trips: List of (query, parameters, result_available_after ms).
+    :return: (hits, misses).
+    """
+    warm = {}
+    for query, parameters, _ in round_trips:
+        key = normalize_query(query)
+        if key not in warm:
+            warm[key] = timed_run(query, parameters)[1]
+    misses = sum(
+        1 for query, _, available in round_trips
+        if available > max(warm[normalize_query(query)] * MISS_FACTOR, warm[normalize_query(query)] + MISS_MIN_MS)
+    )
+    return len(round_trips) - misses, misses
+
+
+def bench_legacy(switches):
+    """
+    One f-string query per selection: each distinct category text needs its own plan.
+    """
+    clear_query_caches()
+    wall, server, round_trips = [], [], []
+    for i in range(switches):
+        query = LEGACY_QUERY.format(category=CATEGORIES[i % len(CATEGORIES)])
+        w, available, total = timed_run(query)
+        wall.append(w)
+        server.append(total)
+        round_trips.append((query, None, available))
+    hits, misses = count_plan_cache(round_trips)
+    return {"wall_ms": wall, "server_ms": server, "plan_cache_misses": misses, "plan_cache_hits": hits,
+            "round_trips": len(round_trips)}
+
+
+def bench_batched(switches):
+    """
+    One parameterized query fills the local cache; later selections never reach the server.
+
+    Each switch is one fetch_degree_centrality call; its round trips and
+    server timings are read back from the trace spans the call records.
+    """
+    clear_query_caches()
+    query_cache.clear()
+    app = CentralityVisualizationApp(CATEGORIES)
+    wall, server, round_trips = [], [], []
+    for i in range(switches):
+        trace = start_trace("switch")
+        start = time.perf_counter()
+        app.fetch_degree_centrality(CATEGORIES[i % len(CATEGORIES)])
+        wall.append((time.perf_counter() - start) * 1000)
+        for row in trace.rows():
+            if row["name"] != "neo4j.read_frame":
+                continue
+            attributes = row["attributes"]
+            server.append(attributes["result_available_after_ms"] + attributes["result_consumed_after_ms"])
+            round_trips.append((app.DEGREE_CENTRALITY_QUERY, {"categories": list(app.categories)},
+                                attributes["result_available_after_ms"]))
+    hits, misses = count_plan_cache(round_trips)
+    return {"wall_ms": wall, "server_ms": server, "plan_cache_misses": misses, "plan_cache_hits": hits,
+            "round_trips": len(round_trips)}
+
+
+def summarize(name, stats):
+    wall = stats["wall_ms"]
+    print(f"{name}:")
+    print(f"  round trips            : {stats['round_trips']}")
+    print(f"  plan cache hits/misses : {stats['plan_cache_hits']}/{stats['plan_cache_misses']}")
+    print(f"  first call             : {wall[0]:.2f} ms")
+    print(f"  median / max per switch: {statistics.median(wall):.3f} / {max(wall):.2f} ms")
+    print(f"  total                  : {sum(wall):.2f} ms")
+    if stats["server_ms"]:
+        print(f"  server time (median)   : {statistics.median(stats['server_ms']):.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--switches", type=int, default=30, help="Number of selectbox changes to simulate")
+    args = parser.parse_args()
+    try:
+        summarize("legacy f-string query", bench_legacy(args.switches))
+        summarize("batched parameterized query", bench_batched(args.switches))
+    finally:
+        close_driver()
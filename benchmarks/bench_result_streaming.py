@@ -0,0 +1,68 @@
+"""
+Benchmark: peak memory of materialized record lists vs streamed DataFrame building.
+
+A stub result yields neo4j Record objects lazily, as the driver does when it
+pulls fetch-size batches from the server. Three consumers are compared for
+growing result sizes:
+
+* legacy   - ``[record for record in result]`` then ``pd.DataFrame(...)``
+* streamed - FrameBuilder turning each fetch-size chunk of records into columns
+* top-N    - the server-side LIMIT, so only ``--top`` rows ever arrive
+
+    python -m benchmarks.bench_result_streaming --sizes 10000 100000 400000 --top 25
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+import pandas as pd
+from neo4j import Record
+from utils.neo4j_connection import FrameBuilder
+
+KEYS = ["category", "station", "DegreeCentrality"]
+
+
+def stub_result(rows):
+    for i in range(rows):
+        yield Record(zip(KEYS, ("BUS", f"Stop {i}", i % 17)))
+
+
+def legacy(rows):
+    records = [record for record in stub_result(rows)]
+    return pd.DataFrame([dict(record) for record in records])
+
+
+def streamed(rows):
+    builder = FrameBuilder(KEYS)
+    for record in stub_result(rows):
+        builder.append(record)
+    return builder.frame()
+
+
+def measure(consumer, rows):
+    """
+    :return: (peak traced memory in MiB, wall time in ms).
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    frame = consumer(rows)
+    elapsed = (time.perf_counter() - start) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del frame
+    return peak / 2 ** 20, elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 400000], help="Result rows")
+    parser.add_argument("--top", type=int, default=25, help="Rows returned with the top-N LIMIT")
+    args = parser.parse_args()
+    print(f"{'rows':>8} | {'legacy MiB':>10} {'ms':>8} | {'streamed MiB':>12} {'ms':>8} | {'top-N MiB':>9} {'ms':>6}")
+    for rows in args.sizes:
+        legacy_peak, legacy_ms = measure(legacy, rows)
+        streamed_peak, streamed_ms = measure(streamed, rows)
+        top_peak, top_ms = measure(streamed, min(rows, args.top))
+        print(f"{rows:>8} | {legacy_peak:>10.1f} {legacy_ms:>8.1f} | {streamed_peak:>12.1f} {streamed_ms:>8.1f} | "
+              f"{top_peak:>9.3f} {top_ms:>6.2f}")
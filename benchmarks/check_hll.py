@@ -0,0 +1,55 @@
+"""
+Accuracy check: HyperLogLog distinct-count estimates against exact counts at high cardinality.
+
+The integers 0..n-1 are hashed in chunks through HyperLogLog.update (hash_values),
+as in the streaming profile, so the exact distinct count is n by construction.
+A rank check first confirms that an all-zero payload reaches the maximum
+rank of 64 - precision + 1. The run fails (exit status 1) when an estimate
+is off by more than ``--sigmas`` standard errors (1.04 / sqrt(2**precision)).
+
+    python -m benchmarks.check_hll --sizes 1000000 10000000 100000000
+"""
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+from utils.streaming_stats import HyperLogLog
+
+CHUNK_SIZE = 5_000_000
+
+
+def check_max_rank(precision):
+    """
+    :return: (observed, expected) register value for a hash whose payload bits are all zero.
+    """
+    sketch = HyperLogLog(precision)
+    sketch.add_hashes(np.zeros(1, dtype=np.uint64))
+    return int(sketch.registers[0]), 64 - precision + 1
+
+
+def estimate_distinct(n, precision):
+    sketch = HyperLogLog(precision)
+    for start in range(0, n, CHUNK_SIZE):
+        sketch.update(pd.Series(np.arange(start, min(start + CHUNK_SIZE, n), dtype=np.int64)))
+    return sketch.estimate()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000, 100_000_000])
+    parser.add_argument("--precision", type=int, default=14)
+    parser.add_argument("--sigmas", type=float, default=4.0, help="Allowed error in standard errors")
+    args = parser.parse_args()
+
+    failures = 0
+    observed, expected = check_max_rank(args.precision)
+    print(f"max rank: {observed} (expected {expected})")
+    failures += observed != expected
+    tolerance = args.sigmas * 1.04 / np.sqrt(1 << args.precision)
+    for n in args.sizes:
+        estimate = estimate_distinct(n, args.precision)
+        error = estimate / n - 1
+        flag = "" if abs(error) <= tolerance else "  FAIL"
+        failures += bool(flag)
+        print(f"n={n:>12,}  estimate={estimate:>12,}  error={error:+.2%}  (tolerance {tolerance:.2%}){flag}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,358 @@
+"""
+Load test: N concurrent simulated sessions driving the app's analysis functions headlessly.
+
+Each session is a thread that repeats what one app.py rerun does for an
+interaction: draw the default chart panel for the chosen transport type and
+run the selected analysis (a weighted mix of Degree Centrality, Shortest Path
+and PageRank), then waits a random think time before the next one. Shared
+objects, the visualization included, are built once per process, as
+``st.cache_resource`` does in the app.
+
+Backends:
+
+* memory  - the in-memory TransportGraph executors (GRAPH_BACKEND=networkx)
+* standin - the Neo4j query helpers against benchmarks/standin.py's stand-in
+            driver, with ``--latency`` simulating the Bolt round trip
+
+Every configuration (backend x session count) runs in ``--workers`` fresh
+processes at once, like a server with that many worker processes, so the
+memory reported is that configuration's alone. With ``--snapshot`` the workers
+share one published snapshot (utils/snapshot.py): datasets and, with the
+memory backend, the graphs are memory-mapped instead of loaded per process.
+Peak RSS counts mapped pages in every process that touches them; PSS (Linux
+only) splits shared pages between the processes, so its total across workers
+shows what sharing saves. Stand-in runs include the stand-in's TransportGraph,
+which a real Neo4j deployment would hold on the server.
+
+    python -m benchmarks.load_test --sessions 1 4 16 --interactions 20
+    python -m benchmarks.load_test --backend memory --workers 4 --snapshot
+    python -m benchmarks.load_test --backend standin --latency 5 --think-ms 200 --mix degree=1 path=1
+"""
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import contextlib
+import multiprocessing
+
+# Keep load-test caches away from the project's cache directory; must be set before config is imported
+os.environ.setdefault("TRANSPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "transport_load_cache"))
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from streamlit.logger import set_log_level
+set_log_level("error")
+from benchmarks.synthetic import SCALES, write_datasets
+from benchmarks.standin import GraphStandInDriver
+from benchmarks.suite import PAGERANK_LABELS, station_pairs
+from utils.async_queries import SHORTEST_PATH_QUERIES
+from utils.centrality import CentralityVisualizationApp
+from utils.dataset_loader import DATASET_SPECS, load_datasets
+from utils.graph_engine import TransportGraph, STATION_RELATIONSHIPS
+from utils.neo4j_connection import SharedDriverExecution, set_driver, close_driver
+from utils.pagerank import Neo4jPageRank
+from utils.snapshot import Snapshot, build_snapshot
+from utils.visualization import TransportVisualization
+
+CATEGORIES = ("DART", "LUAS", "BUS")
+
+# Analysis types as named on the command line and in the app's sidebar
+ANALYSES = {"degree": "Degree Centrality", "path": "Shortest Path", "pagerank": "PageRank"}
+
+DEFAULT_MIX = {"degree": 5, "path": 3, "pagerank": 2}
+
+# Stations in the ranking charts, the app's default selection
+TOP_N = 25
+
+
+def parse_mix(items):
+    """
+    :param items: ``name=weight`` strings, e.g. ["degree=5", "path=3"].
+    :return: {analysis: weight}.
+    """
+    mix = {}
+    for item in items:
+        name, _, weight = item.partition("=")
+        if name not in ANALYSES:
+            raise argparse.ArgumentTypeError(f"Unknown analysis '{name}'; choose from {', '.join(ANALYSES)}")
+        mix[name] = float(weight or 1)
+    if not any(weight > 0 for weight in mix.values()):
+        raise argparse.ArgumentTypeError("The mix needs at least one analysis with a positive weight")
+    return mix
+
+
+def percentile(samples, q):
+    """
+    ``q``-th percentile (0-100) of the samples, interpolating between ranks.
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MB, or None where the platform does not report it.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def pss_mb():
+    """
+    Proportional set size of this process in MB (shared pages divided among the
+    processes mapping them), or None where /proc/self/smaps_rollup is unavailable.
+    """
+    try:
+        with open("/proc/self/smaps_rollup", "r", encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def source_paths(data_dir):
+    return {category: os.path.join(data_dir, DATASET_SPECS[category]["file"]) for category in ("BUS", "DART", "LUAS")}
+
+
+def publish_snapshot(data_dir, root):
+    """
+    Build and publish a snapshot of the datasets, graphs and path indexes.
+    """
+    paths = source_paths(data_dir)
+    transport_graph = TransportGraph.from_csv(*paths.values())
+    transport_graph.build_path_indexes()
+    build_snapshot(paths, load_datasets(data_dir), transport_graph.snapshot_graphs(),
+                   transport_graph.snapshot_path_indexes(), root)
+
+
+class AppProcess:
+    """
+    The objects app.py keeps per server process, and one interaction as a rerun performs it.
+    """
+
+    def __init__(self, data_dir, backend, latency=0.0, charts=True, snapshot_root=None):
+        """
+        :param snapshot_root: Directory of a published snapshot to share; None to load the CSV files.
+        """
+        self.backend = backend
+        self.charts = charts
+        paths = source_paths(data_dir)
+        snapshot = Snapshot.open(snapshot_root) if snapshot_root else None
+        # The stand-in plays the database server and keeps its own networkx graph
+        self.transport_graph = None
+        if snapshot is not None and backend == "memory":
+            self.transport_graph = TransportGraph.from_snapshot(snapshot, paths)
+        if self.transport_graph is None:
+            self.transport_graph = TransportGraph.from_csv(*paths.values())
+        datasets = snapshot.datasets() if snapshot is not None else None
+        self.visualization = TransportVisualization(*(datasets or load_datasets(data_dir)))
+        if backend == "memory":
+            self.transport_graph.build_path_indexes()
+            self.executors = {category: self.transport_graph.executor(category) for category in CATEGORIES}
+        else:
+            set_driver(GraphStandInDriver(self.transport_graph, latency))
+            self.centrality_app = CentralityVisualizationApp()
+            self.pagerank_app = Neo4jPageRank()
+            self.path_executor = SharedDriverExecution()
+
+    def interact(self, analysis, category, pair):
+        """
+        One rerun: the default chart panel, then the selected analysis.
+
+        :param pair: (start, end) station names for a shortest path.
+        """
+        if self.charts:
+            titles = self.visualization.panel_titles(category)
+            if titles:
+                self.visualization.render_panel(category, titles[0])
+        node_label, relationship_type = PAGERANK_LABELS[category]
+        if self.backend == "memory":
+            executor = self.executors[category]
+            if analysis == "degree":
+                return executor.fetch_degree_centrality(category, TOP_N)
+            if analysis == "pagerank":
+                return executor.calculate_pagerank(node_label, relationship_type)
+            return executor.find_shortest_path(*pair) if pair else None
+        if analysis == "degree":
+            return self.centrality_app.fetch_degree_centrality(category, TOP_N)
+        if analysis == "pagerank":
+            return self.pagerank_app.calculate_pagerank(category, node_label, relationship_type)
+        if not pair:
+            return None
+        query = SHORTEST_PATH_QUERIES[STATION_RELATIONSHIPS[category]]
+        return self.path_executor.execute_query(query, {"start": pair[0], "end": pair[1]})
+
+
+def run_session(app, session_id, mix, interactions, think_ms, seed, samples, errors):
+    rng = random.Random(seed + session_id)
+    names, weights = list(mix), list(mix.values())
+    pairs = {
+        category: station_pairs(app.transport_graph.station_graphs[category], interactions, seed=seed + session_id)
+        for category in CATEGORIES
+    }
+    for i in range(interactions):
+        analysis = rng.choices(names, weights)[0]
+        category = rng.choice(CATEGORIES)
+        pair = pairs[category][i] if pairs[category] else None
+        start = time.perf_counter()
+        try:
+            app.interact(analysis, category, pair)
+        except Exception as e:
+            errors.append(f"{analysis} {category}: {e}")
+        else:
+            samples.append((analysis, (time.perf_counter() - start) * 1000))
+        if think_ms:
+            # Exponential think times: sessions drift apart instead of firing in lockstep
+            time.sleep(rng.expovariate(1000 / think_ms))
+
+
+def run_worker(data_dir, backend, sessions, interactions, mix, think_ms, latency, charts, seed, snapshot_root):
+    """
+    Start ``sessions`` concurrent sessions against a fresh AppProcess and time every interaction.
+
+    Meant to run in a child process of its own, so the memory figures cover this worker only.
+
+    :return: Dictionary with the (analysis, ms) samples, errors, setup and wall time, peak RSS and PSS.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        setup_start = time.perf_counter()
+        app = AppProcess(data_dir, backend, latency, charts, snapshot_root)
+        setup_ms = (time.perf_counter() - setup_start) * 1000
+        samples, errors = [], []
+        threads = [
+            threading.Thread(target=run_session, args=(app, i, mix, interactions, think_ms, seed, samples, errors),
+                             name=f"session-{i}")
+            for i in range(sessions)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+        pss = pss_mb()
+        close_driver()
+    return {
+        "samples": samples,
+        "errors": errors,
+        "setup_ms": setup_ms,
+        "wall_s": wall,
+        "peak_rss_mb": peak_rss_mb(),
+        "pss_mb": pss,
+    }
+
+
+def summarize(backend, sessions, snapshot, mix, runs):
+    """
+    Combine the workers of one configuration.
+
+    :return: Result dictionary with latency percentiles, throughput, the largest
+        worker's peak RSS and the workers' total PSS.
+    """
+    samples = [sample for run in runs for sample in run["samples"]]
+    errors = [error for run in runs for error in run["errors"]]
+    latencies = [ms for _, ms in samples]
+    wall = max(run["wall_s"] for run in runs)
+    rss = [run["peak_rss_mb"] for run in runs if run["peak_rss_mb"] is not None]
+    pss = [run["pss_mb"] for run in runs if run["pss_mb"] is not None]
+    return {
+        "backend": backend,
+        "sessions": sessions,
+        "workers": len(runs),
+        "snapshot": snapshot,
+        "interactions": len(samples),
+        "errors": len(errors),
+        "first_errors": errors[:3],
+        "setup_ms": max(run["setup_ms"] for run in runs),
+        "wall_s": wall,
+        "throughput": len(samples) / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "by_analysis": {
+            name: percentile([ms for analysis, ms in samples if analysis == name], 50)
+            for name in mix if any(analysis == name for analysis, _ in samples)
+        },
+        "peak_rss_mb": max(rss) if rss else None,
+        "pss_total_mb": sum(pss) if len(pss) == len(runs) else None,
+    }
+
+
+def report(results):
+    print(f"{'backend':<8} {'snapshot':>8} {'workers':>7} {'sessions':>8} {'done':>6} {'errors':>6} {'req/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'peak RSS MB':>12} {'PSS total MB':>13}")
+    for result in results:
+        rss, pss = (f"{result[key]:.1f}" if result[key] is not None else "-" for key in ("peak_rss_mb", "pss_total_mb"))
+        latencies = [f"{result[key]:.1f}" if result[key] is not None else "-" for key in ("p50_ms", "p95_ms", "p99_ms")]
+        print(f"{result['backend']:<8} {'yes' if result['snapshot'] else 'no':>8} {result['workers']:>7} "
+              f"{result['sessions']:>8} {result['interactions']:>6} {result['errors']:>6} {result['throughput']:>8.2f} "
+              f"{latencies[0]:>8} {latencies[1]:>8} {latencies[2]:>8} {rss:>12} {pss:>13}")
+        for error in result["first_errors"]:
+            print(f"    error: {error}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backend", nargs="+", choices=["memory", "standin"], default=["memory", "standin"])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16], help="Concurrent sessions per worker")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes per run, started together")
+    parser.add_argument("--snapshot", action="store_true", help="Share a published snapshot between the workers")
+    parser.add_argument("--interactions", type=int, default=20, help="Interactions per session")
+    parser.add_argument("--mix", nargs="+", default=None, metavar="NAME=WEIGHT",
+                        help=f"Analysis mix from {', '.join(ANALYSES)} (default: degree=5 path=3 pagerank=2)")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Mean think time between interactions")
+    parser.add_argument("--latency", type=float, default=1.0, help="Stand-in round trip per query in milliseconds")
+    parser.add_argument("--no-charts", action="store_true", help="Skip the chart panel drawn on every rerun")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Synthetic dataset size")
+    parser.add_argument("--data-dir", help="Use the CSVs in this directory instead of synthetic data")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+    try:
+        mix = parse_mix(args.mix) if args.mix else DEFAULT_MIX
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    # Fresh interpreters per configuration, so memory is not carried over from the previous one
+    context = multiprocessing.get_context("spawn")
+    results = []
+    with tempfile.TemporaryDirectory(prefix="transport_load_") as work_dir:
+        data_dir = args.data_dir or os.path.dirname(write_datasets(os.path.join(work_dir, "data"), args.scale)["BUS"])
+        snapshot_root = None
+        if args.snapshot:
+            snapshot_root = os.path.join(work_dir, "snapshots")
+            publish_snapshot(data_dir, snapshot_root)
+        for backend in args.backend:
+            for sessions in args.sessions:
+                # Session ids (and so station pairs and think times) continue across workers
+                jobs = [
+                    (data_dir, backend, sessions, args.interactions, mix, args.think_ms, args.latency / 1000,
+                     not args.no_charts, args.seed + worker * sessions, snapshot_root)
+                    for worker in range(args.workers)
+                ]
+                # One job per process, all running at once
+                with context.Pool(args.workers, maxtasksperchild=1) as pool:
+                    runs = pool.starmap(run_worker, jobs, chunksize=1)
+                results.append(summarize(backend, sessions, args.snapshot, mix, runs))
+    report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
@@ -0,0 +1,158 @@
+"""
+Neo4j-compatible stand-in driver that answers the app's Cypher reads from a TransportGraph.
+
+It implements the parts of the neo4j Driver/Session/Result API the query
+helpers use (``session()``, ``run()``, ``execute_read/execute_write``,
+``keys()``, ``single()``, ``consume()``) and recognises every read query
+the app issues by its normalized text. An optional fixed latency per query
+simulates the network round trip, so the Neo4j code paths can be benchmarked
+without a database.
+"""
+import time
+import functools
+import networkx as nx
+from utils.async_queries import SHORTEST_PATH_QUERIES
+from utils.centrality import CentralityVisualizationApp
+from utils.neo4j_connection import GRAPH_VERSION_QUERY
+from utils.pagerank import PAGERANK_TARGETS, Neo4jPageRank
+from utils.query_cache import normalize_query
+
+
+class StandInResult(list):
+    def __init__(self, keys, rows):
+        super().__init__(rows)
+        self._keys = keys
+
+    def keys(self):
+        return list(self._keys)
+
+    def single(self):
+        return self[0] if self else None
+
+    def consume(self):
+        return None
+
+
+class StandInSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, parameters=None, **kwargs):
+        if self.driver.latency:
+            time.sleep(self.driver.latency)
+        return self.driver.answer(query, {**(parameters or {}), **kwargs})
+
+    def execute_read(self, work):
+        return work(self)
+
+    execute_write = execute_read
+
+    def close(self):
+        pass
+
+
+class GraphStandInDriver:
+    """
+    Answers DEGREE_CENTRALITY(_TOP)_QUERY, the PageRank node/edge queries,
+    SHORTEST_PATH_QUERIES and the graph version query from an
+    in-memory TransportGraph, the way Neo4j would for the ingested graph.
+    """
+
+    def __init__(self, transport_graph, latency=0.0):
+        """
+        :param latency: Seconds slept per query to simulate the network round trip.
+        """
+        self.transport_graph = transport_graph
+        self.latency = latency
+        self.queries_run = 0
+        self._route_graph = None
+        self._handlers = {}
+        self._register(CentralityVisualizationApp.DEGREE_CENTRALITY_QUERY, self._degree)
+        self._register(CentralityVisualizationApp.DEGREE_CENTRALITY_TOP_QUERY, self._degree)
+        for node_label, relationship_type in PAGERANK_TARGETS:
+            node_query, edge_query = Neo4jPageRank.graph_queries(node_label, relationship_type)
+            self._register(node_query, functools.partial(self._nodes, node_label))
+            self._register(edge_query, functools.partial(self._edges, node_label, relationship_type))
+        for relationship_type, query in SHORTEST_PATH_QUERIES.items():
+            self._register(query, functools.partial(self._shortest_path, relationship_type))
+        self._register(GRAPH_VERSION_QUERY, lambda parameters: (["version"], [{"version": 0}]))
+
+    def _register(self, query, handler):
+        self._handlers[normalize_query(query)] = handler
+
+    def session(self, **kwargs):
+        return StandInSession(self)
+
+    def close(self):
+        pass
+
+    def answer(self, query, parameters):
+        handler = self._handlers.get(normalize_query(query))
+        if handler is None:
+            raise ValueError(f"Stand-in driver has no answer for query: {normalize_query(query)[:80]}")
+        self.queries_run += 1
+        keys, rows = handler(parameters)
+        return StandInResult(keys, rows)
+
+    # --------------------------------------
+    # Graph views
+    # --------------------------------------
+    def _relationship_graph(self, relationship_type):
+        """
+        Station graph holding every edge of one relationship type across categories.
+        """
+        graphs = self.transport_graph.station_graphs
+        if relationship_type == "CONNECTED_BY_LINE":
+            return graphs["LUAS"]
+        if self._route_graph is None:
+            self._route_graph = nx.compose(graphs["BUS"], graphs["DART"])
+        return self._route_graph
+
+    # --------------------------------------
+    # Query handlers
+    # --------------------------------------
+    def _degree(self, parameters):
+        route_graph = self._relationship_graph("CONNECTED_BY_ROUTE")
+        limit = parameters.get("limit")
+        rows = []
+        for category in parameters["categories"]:
+            graph = self.transport_graph.station_graphs.get(category)
+            if graph is None:
+                continue
+            degrees = [
+                (station, route_graph.degree(station))
+                for station in graph.nodes if station in route_graph and route_graph.degree(station) > 0
+            ]
+            degrees.sort(key=lambda item: item[1], reverse=True)
+            rows.extend(
+                {"category": category, "station": station, "DegreeCentrality": degree}
+                for station, degree in degrees[:limit]
+            )
+        return ["category", "station", "DegreeCentrality"], rows
+
+    def _nodes(self, node_label, parameters):
+        if node_label == "Route":
+            names = self.transport_graph.route_graph.nodes
+        else:
+            names = self.transport_graph.station_graphs[parameters["category"]].nodes
+        return ["name"], [{"name": name} for name in names]
+
+    def _edges(self, node_label, relationship_type, parameters):
+        graph = self.transport_graph.route_graph if node_label == "Route" \
+            else self.transport_graph.station_graphs[parameters["category"]]
+        return ["source", "target"], [{"source": u, "target": v} for u, v in graph.edges]
+
+    def _shortest_path(self, relationship_type, parameters):
+        graph = self._relationship_graph(relationship_type)
+        try:
+            path = nx.shortest_path(graph, parameters["start"], parameters["end"])
+        except (nx.NetworkXNoPath, nx.NodeNotFound):
+            return ["path", "totalDistance"], []
+        distance = sum(graph.edges[u, v]["distance"] for u, v in zip(path, path[1:]))
+        return ["path", "totalDistance"], [{"path": path, "totalDistance": distance}]
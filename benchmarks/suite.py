@@ -0,0 +1,310 @@
+"""
+Benchmark suite for the dataset, rendering and graph analytics hot paths.
+
+Synthetic datasets are generated at the chosen scale (see benchmarks/synthetic.py)
+and every case is timed ``--repeats`` times:
+
+* load.*      - IrishTransportData.load_data from CSV, Parquet cache and memo; clean_data
+* stats.*     - single-pass streaming profile of each CSV (one process)
+* render.*    - every TransportVisualization plot method, cold, plus a warm replay
+* facilities.* - facility bitset index: build, per-facility counts, a multi-facility filter
+* memory.*    - in-memory TransportGraph: build, degree, shortest path, PageRank, journeys
+* network.*   - network view: graph preparation, then reduced renders per level of detail
+* standin.*   - the Neo4j query helpers against a Neo4j-compatible stand-in driver
+
+Medians are appended to a JSON history. The run fails (exit status 1) when a
+case is slower than the median of the previous runs at the same scale on the
+same machine by more than ``--threshold``.
+
+The history is the baseline, so it must outlive the checkout: pass ``--history``
+(or set TRANSPORT_BENCH_HISTORY) to a file that is kept between runs, e.g. a CI
+cache or artifact restored before the run and saved after it. With no previous
+runs there is nothing to compare against and the threshold is never applied.
+
+    python -m benchmarks.suite --history ~/bench/history.json --scale small --repeats 5
+    python -m benchmarks.suite --history ~/bench/history.json --scale medium --only memory. standin. --threshold 1.3
+"""
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import tempfile
+import contextlib
+from datetime import datetime, timezone
+
+# Keep benchmark caches away from the project's cache directory; must be set before config is imported
+os.environ.setdefault("TRANSPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "transport_bench_cache"))
+
+import shutil
+from streamlit.logger import set_log_level
+set_log_level("error")
+from config import get_cache_dir
+from benchmarks.synthetic import SCALES, write_datasets
+from benchmarks.standin import GraphStandInDriver
+from utils.async_queries import SHORTEST_PATH_QUERIES
+from utils.centrality import CentralityVisualizationApp
+from utils.data_processing import IrishTransportData
+from utils.dataset_loader import DATASET_SPECS, clear_memo, load_datasets
+from utils.facility_index import FacilityIndex
+from utils.graph_engine import TransportGraph, STATION_RELATIONSHIPS
+from utils.journey_planner import JourneyPlanner
+from utils.network_view import GraphReducer, network_cache, network_html
+from utils.neo4j_connection import SharedDriverExecution, set_driver, query_cache
+from utils.pagerank import Neo4jPageRank, PageRankCache
+from utils.render_cache import render_cache
+from utils.streaming_stats import profile_csv
+from utils.visualization import TransportVisualization
+
+# Path queries per shortest-path / journey case, so one sample is not dominated by timer noise
+QUERIES_PER_CASE = 20
+
+PAGERANK_LABELS = {"BUS": ("Route", "CONNECTED_TO"), "DART": ("Station", "CONNECTED_BY_ROUTE"),
+                   "LUAS": ("Station", "CONNECTED_BY_LINE")}
+
+
+def time_case(run, setup=None, repeats=5):
+    """
+    Time ``run(state)`` after a fresh, untimed ``setup()`` for each repeat.
+
+    :return: Dictionary with median, min and max milliseconds.
+    """
+    samples = []
+    for _ in range(repeats):
+        with contextlib.redirect_stdout(io.StringIO()):
+            state = setup() if setup else None
+            start = time.perf_counter()
+            run(state)
+            samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "max_ms": max(samples),
+        "repeats": repeats,
+    }
+
+
+def station_pairs(graph, count, seed=0):
+    stations = sorted(graph.nodes)
+    rng = random.Random(seed)
+    return [tuple(rng.sample(stations, 2)) for _ in range(count)] if len(stations) > 1 else []
+
+
+def build_cases(paths, work_dir, latency):
+    """
+    :return: List of (name, setup, run) tuples.
+    """
+    cases = []
+
+    # Dataset loading and cleaning
+    def fresh_loader():
+        data = IrishTransportData()
+        data.BUS_CSV_FILE_PATH, data.DART_CSV_FILE_PATH, data.LUAS_CSV_FILE_PATH = \
+            paths["BUS"], paths["DART"], paths["LUAS"]
+        return data
+
+    def cold_loader():
+        clear_memo()
+        shutil.rmtree(get_cache_dir(), ignore_errors=True)
+        return fresh_loader()
+
+    def parquet_loader():
+        clear_memo()
+        return fresh_loader()
+
+    def loaded_data():
+        data = fresh_loader()
+        data.load_data()
+        data.handle_missing_values()
+        return data
+
+    cases += [
+        ("load.load_data.csv", cold_loader, lambda data: data.load_data()),
+        ("load.load_data.parquet", parquet_loader, lambda data: data.load_data()),
+        ("load.load_data.memo", fresh_loader, lambda data: data.load_data()),
+        ("load.clean_data", loaded_data, lambda data: data.clean_data()),
+    ]
+    profiler = fresh_loader()
+    for category in ("BUS", "DART", "LUAS"):
+        cases.append((f"stats.profile_csv.{category}", None,
+                      lambda _, path=paths[category]: profile_csv(path, DATASET_SPECS[category]["numeric"],
+                                                                  workers=1, encoding=profiler.encoding)))
+
+    # Chart rendering, cold (render cache cleared) and warm
+    visualization = TransportVisualization(*load_datasets(os.path.dirname(paths["BUS"])))
+    methods = sorted(name for name in dir(TransportVisualization) if name.startswith("plot_"))
+    for method in methods:
+        cases.append((f"render.{method}", render_cache.clear,
+                      lambda _, method=method: getattr(visualization, method)()))
+
+    def render_all(_):
+        for method in methods:
+            getattr(visualization, method)()
+
+    cases.append(("render.all_cached", lambda: render_all(None), render_all))
+
+    # Facility bitsets
+    facility_index = FacilityIndex.from_datasets(visualization.dart_data, visualization.luas_data)
+    cases += [
+        ("facilities.build", None,
+         lambda _: FacilityIndex.from_datasets(visualization.dart_data, visualization.luas_data)),
+        ("facilities.counts", None, lambda _: facility_index.counts()),
+        ("facilities.filter", None,
+         lambda _: facility_index.table(["Accessibility", "Parking Availability"], ["ATM"], limit=500)),
+    ]
+
+    # In-memory graph backend
+    transport_graph = TransportGraph.from_csv(paths["BUS"], paths["DART"], paths["LUAS"])
+    transport_graph.build_path_indexes(os.path.join(work_dir, "indexes"))
+    planner = JourneyPlanner(transport_graph)
+    journey_pairs = station_pairs(transport_graph.merged_station_graph(), QUERIES_PER_CASE)
+    cases.append(("memory.build_graph", None,
+                  lambda _: TransportGraph.from_csv(paths["BUS"], paths["DART"], paths["LUAS"])))
+    for category in ("BUS", "DART", "LUAS"):
+        pairs = station_pairs(transport_graph.station_graphs[category], QUERIES_PER_CASE)
+        node_label, relationship_type = PAGERANK_LABELS[category]
+        cases += [
+            (f"memory.degree.{category}", None,
+             lambda _, category=category: transport_graph.fetch_degree_centrality(category)),
+            (f"memory.shortest_path.{category}", None,
+             lambda _, category=category, pairs=pairs: [transport_graph.shortest_path(category, *pair) for pair in pairs]),
+            (f"memory.pagerank.{category}", transport_graph.pagerank_cache.clear,
+             lambda _, category=category, node_label=node_label: transport_graph.pagerank(category, node_label)),
+        ]
+    cases.append(("memory.journey_plan", None, lambda _: [planner.plan(*pair) for pair in journey_pairs]))
+
+    # Network view, reduced server side
+    ranks = {record["Name"]: record["PageRank"] for record in transport_graph.pagerank("BUS")}
+    cases.append(("network.prepare", None,
+                  lambda _: GraphReducer(transport_graph.station_graphs["BUS"], ranks).groups("line")))
+    for mode in ("top", "groups"):
+        expanded = network_html(transport_graph, "BUS", mode)[1][:2]
+        cases += [
+            (f"network.render.{mode}", network_cache.clear,
+             lambda _, mode=mode: network_html(transport_graph, "BUS", mode)),
+            (f"network.expand.{mode}", network_cache.clear,
+             lambda _, mode=mode, expanded=expanded: network_html(transport_graph, "BUS", mode, expanded=expanded)),
+        ]
+
+    # Neo4j query helpers against the stand-in driver
+    set_driver(GraphStandInDriver(transport_graph, latency))
+    executor = SharedDriverExecution()
+
+    def fresh_centrality():
+        query_cache.clear()
+        return CentralityVisualizationApp()
+
+    def fresh_pagerank():
+        query_cache.clear()
+        return Neo4jPageRank(PageRankCache())
+
+    cases.append(("standin.degree", fresh_centrality, lambda app: app.fetch_degree_centrality("DART")))
+    for category in ("BUS", "DART", "LUAS"):
+        node_label, relationship_type = PAGERANK_LABELS[category]
+        query = SHORTEST_PATH_QUERIES[STATION_RELATIONSHIPS[category]]
+        pairs = station_pairs(transport_graph.station_graphs[category], QUERIES_PER_CASE, seed=1)
+        cases += [
+            (f"standin.pagerank.{category}", fresh_pagerank,
+             lambda app, category=category, node_label=node_label, relationship_type=relationship_type:
+                app.calculate_pagerank(category, node_label, relationship_type)),
+            (f"standin.shortest_path.{category}", None,
+             lambda _, query=query, pairs=pairs: [
+                 executor.execute_query(query, {"start": start, "end": end}, cache=False) for start, end in pairs
+             ]),
+        ]
+    return cases
+
+
+def load_history(path):
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return []
+
+
+def save_history(path, history):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        json.dump(history, handle, indent=2)
+    os.replace(temp_path, path)
+
+
+def find_regressions(history, run, threshold, baseline_runs, min_delta_ms):
+    """
+    Compare a run against the median of the previous ``baseline_runs`` comparable runs.
+
+    :return: {case: (baseline_ms, median_ms)} for every case slower than ``threshold`` times the baseline.
+    """
+    previous = [
+        entry for entry in history
+        if entry["scale"] == run["scale"] and entry["machine"] == run["machine"]
+    ][-baseline_runs:]
+    baselines, regressions = {}, {}
+    for name, result in run["results"].items():
+        values = [entry["results"][name]["median_ms"] for entry in previous if name in entry["results"]]
+        if not values:
+            continue
+        baseline = statistics.median(values)
+        baselines[name] = baseline
+        if result["median_ms"] > baseline * threshold and result["median_ms"] - baseline > min_delta_ms:
+            regressions[name] = (baseline, result["median_ms"])
+    return baselines, regressions
+
+
+def report(run, baselines, regressions):
+    print(f"{'case':<48} {'median ms':>10} {'min ms':>9} {'baseline':>9} {'ratio':>6}")
+    for name, result in run["results"].items():
+        baseline = baselines.get(name)
+        ratio = f"{result['median_ms'] / baseline:.2f}" if baseline else "-"
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"{name:<48} {result['median_ms']:>10.2f} {result['min_ms']:>9.2f} "
+              f"{(f'{baseline:.2f}' if baseline else '-'):>9} {ratio:>6}{flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--only", nargs="*", default=[], help="Run only cases whose name starts with one of these")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stand-in round trip per query in milliseconds")
+    parser.add_argument("--history", default=os.environ.get("TRANSPORT_BENCH_HISTORY"),
+                        required="TRANSPORT_BENCH_HISTORY" not in os.environ,
+                        help="JSON file the results are appended to; must persist between runs")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Fail when a median exceeds baseline x this")
+    parser.add_argument("--baseline-runs", type=int, default=5, help="Previous runs the baseline is taken from")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="Ignore slowdowns smaller than this")
+    parser.add_argument("--no-record", action="store_true", help="Do not append this run to the history")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="transport_bench_") as work_dir:
+        paths = write_datasets(os.path.join(work_dir, "data"), args.scale)
+        results = {}
+        for name, setup, run in build_cases(paths, work_dir, args.latency / 1000):
+            if args.only and not any(name.startswith(prefix) for prefix in args.only):
+                continue
+            results[name] = time_case(run, setup, args.repeats)
+
+    run = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "scale": args.scale,
+        "machine": platform.node(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    history = load_history(args.history)
+    baselines, regressions = find_regressions(history, run, args.threshold, args.baseline_runs, args.min_delta_ms)
+    report(run, baselines, regressions)
+    if not baselines:
+        print(f"No previous runs for this scale and machine in {args.history}; nothing to compare against.")
+    # Regressed runs are not recorded, so one slow run cannot drag the baseline down with it
+    if not args.no_record and not regressions:
+        history.append(run)
+        save_history(args.history, history)
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than {args.threshold:.2f}x their baseline.")
+        sys.exit(1)
@@ -0,0 +1,129 @@
+"""
+Synthetic BUS / DART / LUAS datasets with the same columns as the real CSVs.
+
+Sizes are controlled by a few knobs so the same generator covers a few
+hundred edges up to millions. Station graph edge counts are roughly
+``bus_routes * (stops_per_route - 1)`` for BUS plus one edge per DART/LUAS
+station on each of its lines.
+
+    python -m benchmarks.synthetic --scale medium --out /tmp/transport_data
+"""
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from utils.dataset_loader import DATASET_SPECS, FACILITY_COLUMNS
+
+# Named presets: hundreds, tens of thousands and over a million edges
+SCALES = {
+    "small": {"bus_routes": 50, "stops_per_route": 10, "stop_pool": 300, "dart_stations": 60, "luas_stations": 70},
+    "medium": {"bus_routes": 2000, "stops_per_route": 20, "stop_pool": 10000, "dart_stations": 300, "luas_stations": 300},
+    "large": {"bus_routes": 50000, "stops_per_route": 25, "stop_pool": 200000, "dart_stations": 2000, "luas_stations": 2000},
+}
+
+DUBLIN = (53.35, -6.26)
+
+
+def _yes_no(rng, size, p_yes=0.6, p_missing=0.05):
+    values = np.where(rng.random(size) < p_yes, "Yes", "No").astype(object)
+    values[rng.random(size) < p_missing] = None
+    return values
+
+
+def _line_coordinates(rng, size):
+    """
+    Coordinates along a random walk out from the city centre, about 1 km apart.
+    """
+    steps = rng.normal(0.0, 0.006, size=(size, 2))
+    return DUBLIN[0] + np.cumsum(steps[:, 0]), DUBLIN[1] + np.cumsum(steps[:, 1])
+
+
+def generate_bus(rng, bus_routes, stops_per_route, stop_pool, **_):
+    stops = np.array([f"Stop {i}" for i in range(stop_pool)], dtype=object)
+    picks = rng.integers(0, stop_pool, size=(bus_routes, stops_per_route))
+    return pd.DataFrame({
+        "Route Number": [str(route) for route in range(1, bus_routes + 1)],
+        "Key Landmarks": [", ".join(stops[row]) for row in picks],
+        "Frequency": rng.integers(5, 61, size=bus_routes),
+        "Duration": rng.integers(15, 121, size=bus_routes),
+    })
+
+
+def generate_dart(rng, dart_stations, **_):
+    lines = max(2, dart_stations // 30)
+    latitudes, longitudes = _line_coordinates(rng, dart_stations)
+    routes = [
+        ", ".join(sorted({f"Line {station % lines}", f"Line {(station // 30) % lines}"}))
+        for station in range(dart_stations)
+    ]
+    data = {
+        "StationName": [f"DART Station {i}" for i in range(dart_stations)],
+        "Routes Serviced": routes,
+    }
+    for column in FACILITY_COLUMNS:
+        data[column] = _yes_no(rng, dart_stations)
+    data["Weekend Working"] = _yes_no(rng, dart_stations, p_yes=0.8)
+    eircodes = np.array([f"D{rng.integers(1, 25):02d}" for _ in range(dart_stations)], dtype=object)
+    eircodes[rng.random(dart_stations) < 0.1] = None
+    data["Eircode"] = eircodes
+    data["Station Address"] = [f"{i} Station Road" if i % 9 else None for i in range(dart_stations)]
+    data["Latitude"] = latitudes
+    data["Longitude"] = longitudes
+    return pd.DataFrame(data)
+
+
+def generate_luas(rng, luas_stations, dart_stations=0, **_):
+    latitudes, longitudes = _line_coordinates(rng, luas_stations)
+    names = [f"LUAS Station {i}" for i in range(luas_stations)]
+    # A few interchange stations share their name with a DART station
+    for i in range(0, min(luas_stations, dart_stations), 25):
+        names[i] = f"DART Station {i}"
+    footfall = rng.integers(200, 20000, size=luas_stations)
+    return pd.DataFrame({
+        "Station Name": names,
+        "Line": np.where(np.arange(luas_stations) < luas_stations // 2, "Red", "Green"),
+        "Zone": rng.integers(1, 6, size=luas_stations).astype(str),
+        "Daily Footfall": [f"{value:,}" for value in footfall],
+        "Parking Availability": _yes_no(rng, luas_stations, p_yes=0.3),
+        "Accessibility": _yes_no(rng, luas_stations, p_yes=0.9, p_missing=0.0),
+        "Nearby Landmarks": [
+            ", ".join(f"Landmark {rng.integers(0, 500)}" for _ in range(rng.integers(1, 5)))
+            for _ in range(luas_stations)
+        ],
+        "Latitude": latitudes,
+        "Longitude": longitudes,
+    })
+
+
+def generate_datasets(scale="small", seed=0):
+    """
+    :param scale: Name from SCALES or a dict with the same keys.
+    :return: Tuple (bus_data, dart_data, luas_data).
+    """
+    params = SCALES[scale] if isinstance(scale, str) else scale
+    rng = np.random.default_rng(seed)
+    return generate_bus(rng, **params), generate_dart(rng, **params), generate_luas(rng, **params)
+
+
+def write_datasets(out_dir, scale="small", seed=0):
+    """
+    Write the synthetic CSVs under their real file names.
+
+    :return: Dictionary of category to CSV path.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {}
+    for category, data in zip(("BUS", "DART", "LUAS"), generate_datasets(scale, seed)):
+        paths[category] = os.path.join(out_dir, DATASET_SPECS[category]["file"])
+        data.to_csv(paths[category], index=False, encoding="latin1")
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True, help="Output directory for the CSVs")
+    args = parser.parse_args()
+    for category, path in write_datasets(args.out, args.scale, args.seed).items():
+        print(f"{category}: {path}")
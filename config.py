@@ -1,10 +1,109 @@
 # config.py
+import os
 
 # Configuration for Neo4j connection
 NEO4J_CONFIG = {
-    "uri": "bolt://localhost:7687",  # Replace with your Neo4j instance URI
-    "username": "neo4j",            # Replace with your Neo4j username
-    "password": "9820065151",         # Replace with your Neo4j password
+    "uri": os.environ.get("NEO4J_URI", "bolt://localhost:7687"),  # Replace with your Neo4j instance URI
+    "username": os.environ.get("NEO4J_USERNAME", "neo4j"),        # Replace with your Neo4j username
+    "password": os.environ.get("NEO4J_PASSWORD", "9820065151"),   # Replace with your Neo4j password
+}
+
+# Connection pool settings for the shared, process-wide Neo4j driver
+NEO4J_POOL_CONFIG = {
+    "max_connection_pool_size": 20,         # Maximum open connections held by the pool
+    "connection_acquisition_timeout": 10.0,  # Seconds to wait for a free connection
+    "connection_timeout": 5.0,               # Seconds to wait when opening a new connection
+    "max_connection_lifetime": 1800,         # Seconds before a pooled connection is recycled
+    "liveness_check_timeout": 30.0,          # Idle seconds before a connection is health-checked on borrow
+    "keep_alive": True,                      # TCP keep-alive on pooled connections
+}
+
+# Graph analytics backend: "neo4j" runs Cypher on the server, "networkx" runs in process
+GRAPH_BACKEND = os.environ.get("GRAPH_BACKEND", "neo4j")
+
+# Column mapping used to build the in-memory Station/Route/Category graph from the CSV datasets
+GRAPH_SCHEMA = {
+    "BUS": {"route_column": "Route Number", "stops_column": "Key Landmarks"},
+    "DART": {"station_column": "StationName", "routes_column": "Routes Serviced"},
+    "LUAS": {"station_column": "Station Name", "line_column": "Line", "zone_column": "Zone"},
+    "coordinate_columns": ("Latitude", "Longitude"),  # Used for edge distances when present
+}
+
+# Directory for indexes and caches derived from the datasets
+CACHE_DIR = os.environ.get(
+    "TRANSPORT_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+)
+
+# Shared read-only snapshot of the datasets and station graphs (utils/snapshot.py); workers memory-map it
+SNAPSHOT_CONFIG = {
+    "enabled": os.environ.get("TRANSPORT_SNAPSHOTS", "0") == "1",
+    "dir": os.environ.get("TRANSPORT_SNAPSHOT_DIR", os.path.join(CACHE_DIR, "snapshots")),
+    "keep": 2,                # Published snapshots kept on disk; older ones are deleted
+    "lock_timeout": 600.0,    # Seconds after which a build lock left by a crashed worker is ignored
+}
+
+# Precomputed shortest-path index per category: "all_pairs" tables or "landmarks" (ALT)
+PATH_INDEX_CONFIG = {
+    "BUS": "landmarks",
+    "DART": "all_pairs",
+    "LUAS": "all_pairs",
+    "num_landmarks": 8,
+}
+
+# Rendered chart cache shared by every session in the process
+RENDER_CACHE_CONFIG = {
+    "max_bytes": 64 * 1024 * 1024,  # Total size budget before least recently used charts are evicted
+    "dpi": 100,                     # Resolution of cached Matplotlib PNGs
+}
+
+# Bulk CSV-to-Neo4j ingestion settings (utils/graph_ingest.py)
+INGEST_CONFIG = {
+    "chunk_size": 10000,   # CSV rows read per chunk
+    "batch_size": 1000,    # Rows per UNWIND transaction
+    "writer_threads": 4,   # Parallel writer threads
+}
+
+# Result cache for Cypher reads made through the shared driver
+QUERY_CACHE_CONFIG = {
+    "max_bytes": 32 * 1024 * 1024,  # Total size budget before least recently used results are evicted
+    "ttl": 300.0,                   # Seconds a cached result stays valid
+    "version_poll_interval": 5.0,   # Seconds between checks of the graph version stored in Neo4j
+}
+
+# Multimodal journey planner (utils/journey_planner.py); costs are in minutes
+JOURNEY_CONFIG = {
+    "speeds_kmh": {"BUS": 18.0, "DART": 45.0, "LUAS": 25.0, "WALK": 4.8},  # Average speed per mode
+    "hop_minutes": 3.0,                # Cost of a hop between stops without coordinates
+    "transfer_penalty_minutes": 5.0,   # Added to every change of mode
+    "max_walk_km": 0.5,                # Longest walking transfer between stations of different modes
+    "alternatives": 3,                 # Journeys returned per query (k-shortest)
+}
+
+# Hot-path tracing (utils/tracing.py) shown in the app's Performance panel
+TRACING_CONFIG = {
+    "enabled": True,
+    "tracemalloc": os.environ.get("TRANSPORT_TRACEMALLOC", "0") == "1",  # Record memory deltas per span
+    "profile_queries": False,   # Run Cypher reads with PROFILE to collect db hits (adds server work)
+    "max_spans": 2000,          # Spans kept per page run
+}
+
+# Interactive network view (utils/network_view.py); larger graphs are reduced before drawing
+NETWORK_VIEW_CONFIG = {
+    "max_nodes": 200,                      # Nodes drawn before any expansion
+    "max_edges": 1000,                     # Heaviest edges kept in a view
+    "expand_nodes": 25,                    # Nodes added per expanded station or group
+    "max_expansions": 5,                   # Expansions open at once
+    "height": 650,                         # Pixels
+    "cache_bytes": 32 * 1024 * 1024,       # Rendered HTML kept per process
+}
+
+# Single-pass streaming statistics over CSV chunks (utils/streaming_stats.py)
+STATS_CONFIG = {
+    "chunk_rows": 100000,                   # CSV rows parsed per chunk
+    "workers": int(os.environ.get("TRANSPORT_STATS_WORKERS", "0")),  # Worker processes; 0 uses every core
+    "parallel_min_bytes": 64 * 1024 * 1024, # Smaller files are profiled in one process
+    "hll_precision": 14,                    # 2**p HyperLogLog registers per column (about 0.8% error)
+    "quantile_k": 600,                      # Quantile sketch size; the rank error shrinks as 1 / k
 }
 
 def get_neo4j_config():
@@ -15,6 +114,110 @@ def get_neo4j_config():
     """
     return NEO4J_CONFIG
 
+def get_neo4j_pool_config():
+    """
+    Returns the connection pool settings for the shared Neo4j driver.
+
+    :return: Dictionary of keyword arguments for GraphDatabase.driver.
+    """
+    return NEO4J_POOL_CONFIG
+
+def get_graph_backend():
+    """
+    Returns the configured graph analytics backend.
+
+    :return: "neo4j" or "networkx".
+    """
+    return GRAPH_BACKEND
+
+def get_graph_schema():
+    """
+    Returns the dataset column mapping for the in-memory transport graph.
+
+    :return: Dictionary keyed by transport category.
+    """
+    return GRAPH_SCHEMA
+
+def get_cache_dir():
+    """
+    Returns the directory used for persisted indexes and caches.
+
+    :return: Absolute directory path.
+    """
+    return CACHE_DIR
+
+def get_snapshot_config():
+    """
+    Returns whether workers share a snapshot, where snapshots live and how many are kept.
+
+    :return: Dictionary of snapshot settings.
+    """
+    return SNAPSHOT_CONFIG
+
+def get_path_index_config():
+    """
+    Returns the shortest-path index strategy for each transport category.
+
+    :return: Dictionary keyed by transport category.
+    """
+    return PATH_INDEX_CONFIG
+
+def get_render_cache_config():
+    """
+    Returns the size budget and image settings for the chart render cache.
+
+    :return: Dictionary of render cache settings.
+    """
+    return RENDER_CACHE_CONFIG
+
+def get_ingest_config():
+    """
+    Returns the chunk size, batch size and writer thread count for bulk ingestion.
+
+    :return: Dictionary of ingestion settings.
+    """
+    return INGEST_CONFIG
+
+def get_query_cache_config():
+    """
+    Returns the size budget, TTL and version polling interval for the query result cache.
+
+    :return: Dictionary of query cache settings.
+    """
+    return QUERY_CACHE_CONFIG
+
+def get_journey_config():
+    """
+    Returns the speeds, transfer penalty and walking limits for the journey planner.
+
+    :return: Dictionary of journey planner settings.
+    """
+    return JOURNEY_CONFIG
+
+def get_tracing_config():
+    """
+    Returns the switches for span tracing, memory tracking and query profiling.
+
+    :return: Dictionary of tracing settings.
+    """
+    return TRACING_CONFIG
+
+def get_network_view_config():
+    """
+    Returns the node and edge budgets, expansion limits and cache size for network views.
+
+    :return: Dictionary of network view settings.
+    """
+    return NETWORK_VIEW_CONFIG
+
+def get_stats_config():
+    """
+    Returns the chunk size, worker count and sketch sizes for streaming statistics.
+
+    :return: Dictionary of streaming statistics settings.
+    """
+    return STATS_CONFIG
+
 # Example usage (for debugging, remove in production):
 if __name__ == "__main__":
     config = get_neo4j_config()
@@ -0,0 +1,270 @@
+import atexit
+import asyncio
+import time
+import threading
+import pandas as pd
+from neo4j import AsyncGraphDatabase
+from config import get_neo4j_config, get_neo4j_pool_config
+from utils.centrality import DEGREE_COLUMNS, CentralityVisualizationApp
+from utils.neo4j_connection import FrameBuilder, current_graph_version, graph_version, query_cache, query_label
+from utils.pagerank import Neo4jPageRank, PageRankCache
+from utils.tracing import span, traced, profiled, record_summary
+
+# Fewest-hop path per relationship type, with the summed edge distance of that path
+SHORTEST_PATH_QUERIES = {
+    relationship: f"""
+    MATCH (start:Station {{name: $start}}), (end:Station {{name: $end}})
+    MATCH p = shortestPath((start)-[:{relationship}*]-(end))
+    RETURN [n IN nodes(p) | n.name] AS path,
+           reduce(total = 0.0, r IN relationships(p) | total + coalesce(r.distance, 0.0)) AS totalDistance
+    """
+    for relationship in ("CONNECTED_BY_ROUTE", "CONNECTED_BY_LINE")
+}
+
+
+class AsyncBridge:
+    """
+    Runs coroutines on one long-lived event loop thread for synchronous callers.
+
+    Streamlit executes the script in a plain thread, so coroutines are handed
+    to this loop with ``submit`` and come back as concurrent futures. A future
+    submitted under a ``slot`` (e.g. one per browser session) cancels the
+    previous one in that slot, so a stale query stops when the selection
+    changes mid-flight.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="async-bridge", daemon=True)
+        self._thread.start()
+
+    def submit(self, coroutine, slot=None):
+        """
+        Schedule a coroutine on the loop.
+
+        :param slot: Optional key; an unfinished future already in this slot is cancelled.
+        :return: concurrent.futures.Future with the coroutine's result.
+        """
+        # The task runs in a copy of the caller's context, so its spans land in the caller's trace
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        if slot is not None:
+            with self._lock:
+                previous = self._inflight.get(slot)
+                self._inflight[slot] = future
+            if previous is not None:
+                previous.cancel()
+            future.add_done_callback(lambda done: self._release(slot, done))
+        return future
+
+    def _release(self, slot, future):
+        with self._lock:
+            if self._inflight.get(slot) is future:
+                del self._inflight[slot]
+
+    def cancel(self, slot):
+        """
+        Cancel the unfinished future in ``slot``, if any.
+        """
+        with self._lock:
+            future = self._inflight.pop(slot, None)
+        if future is not None:
+            future.cancel()
+
+    def run(self, coroutine, timeout=None):
+        """
+        Block until the coroutine finishes and return its result.
+        """
+        return self.submit(coroutine).result(timeout)
+
+    def close(self):
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+
+
+_bridge = None
+_bridge_lock = threading.Lock()
+_async_driver = None
+
+
+def get_bridge():
+    """
+    Return the process-wide AsyncBridge, starting its loop thread on first use.
+    """
+    global _bridge
+    if _bridge is None:
+        with _bridge_lock:
+            if _bridge is None:
+                _bridge = AsyncBridge()
+                atexit.register(close_async_driver)
+    return _bridge
+
+
+def get_async_driver():
+    """
+    Return the shared AsyncDriver. Async drivers belong to one event loop, so
+    this must be called from coroutines running on the bridge loop.
+    """
+    global _async_driver
+    if _async_driver is None:
+        config = get_neo4j_config()
+        with span("neo4j.create_async_driver"):
+            _async_driver = AsyncGraphDatabase.driver(
+                config["uri"],
+                auth=(config["username"], config["password"]),
+                **get_neo4j_pool_config()
+            )
+    return _async_driver
+
+
+def set_async_driver(driver):
+    """
+    Replace the shared AsyncDriver, e.g. with a local stand-in for benchmarks.
+
+    :param driver: Object exposing session() and an awaitable close() like a neo4j AsyncDriver.
+    """
+    global _async_driver
+    _async_driver = driver
+
+
+def close_async_driver():
+    """
+    Close the shared AsyncDriver on the bridge loop, then stop the loop.
+    """
+    global _async_driver
+    if _bridge is None:
+        return
+    if _async_driver is not None:
+        driver, _async_driver = _async_driver, None
+        _bridge.run(driver.close())
+    _bridge.close()
+
+
+class AsyncQueryExecution:
+    """
+    Async counterparts of the executor queries, built on the neo4j AsyncDriver.
+
+    Queries run on the bridge loop, so a superseded one can be cancelled
+    mid-flight. The independent node and edge reads of PageRank are issued
+    concurrently with ``asyncio.gather``; each borrows its own session from
+    the async connection pool. Degree and
+    PageRank results share their caches with the synchronous helpers when
+    those are passed in.
+    """
+
+    def __init__(self, centrality=None, pagerank_cache=None):
+        """
+        :param centrality: CentralityVisualizationApp whose degree cache is reused.
+        :param pagerank_cache: PageRankCache shared with Neo4jPageRank.
+        """
+        self.centrality = centrality or CentralityVisualizationApp()
+        self.pagerank_cache = pagerank_cache or PageRankCache()
+
+    @staticmethod
+    async def graph_version():
+        """
+        Current graph version; the stored counter is polled in a thread so the loop never blocks.
+        """
+        if graph_version.poll_due():
+            return await asyncio.to_thread(current_graph_version)
+        return graph_version.current()
+
+    async def _cached(self, query, parameters, load):
+        """
+        Serve a read from the shared query cache or await ``load()`` and cache its result.
+        """
+        version = await self.graph_version()
+        key = query_cache.key(query, parameters)
+        value = query_cache.get(key, version)
+        if value is None:
+            start = time.perf_counter()
+            value = await load()
+            query_cache.put(key, version, value, time.perf_counter() - start)
+        return value
+
+    async def execute_query(self, query, parameters=None, cache=True):
+        if cache:
+            with span("neo4j.cached_read", query=query_label(query)):
+                return await self._cached(query, parameters, lambda: self.execute_query(query, parameters, False))
+        with span("neo4j.read", query=query_label(query)) as current:
+            async with get_async_driver().session() as session:
+                result = await session.run(profiled(query), parameters)
+                records = [record async for record in result]
+                record_summary(current, await result.consume())
+                return records
+
+    async def execute_frame(self, query, parameters=None, cache=True):
+        """
+        Stream a query result straight into a DataFrame, one columnar chunk at a time.
+        """
+        if cache:
+            with span("neo4j.cached_read", query=query_label(query)):
+                return await self._cached(query, parameters, lambda: self.execute_frame(query, parameters, False))
+        with span("neo4j.read_frame", query=query_label(query)) as current:
+            async with get_async_driver().session() as session:
+                result = await session.run(profiled(query), parameters)
+                builder = FrameBuilder(await result.keys())
+                async for record in result:
+                    builder.append(record)
+                record_summary(current, await result.consume())
+                return builder.frame()
+
+    async def gather_queries(self, queries):
+        """
+        Run independent queries concurrently.
+
+        :param queries: {name: (query, parameters)}.
+        :return: {name: records}.
+        """
+        names = list(queries)
+        results = await asyncio.gather(*(self.execute_query(*queries[name]) for name in names))
+        return dict(zip(names, results))
+
+    @traced()
+    async def fetch_degree_centrality(self, category, limit=None):
+        """
+        Degree centrality for one category; one query fills the cache for every category.
+
+        :param limit: Keep only the top ``limit`` stations; None for all.
+        """
+        # Refresh the version off-loop first so the synchronous cache check below never polls
+        await self.graph_version()
+        cached = self.centrality.cached_degree_centrality(category, limit)
+        if cached is None:
+            query, parameters = self.centrality.degree_query(limit)
+            grouped = self.centrality.store_degree_frame(await self.execute_frame(query, parameters), parameters)
+            cached = grouped.get(category, pd.DataFrame(columns=DEGREE_COLUMNS))
+        return cached
+
+    @traced()
+    async def calculate_pagerank(self, category, node_label, relationship_type):
+        """
+        :return: ``{"Name", "PageRank"}`` records, recomputed only when the graph version changes.
+        """
+        Neo4jPageRank._check_target(node_label, relationship_type)
+        key = (category, node_label, relationship_type)
+        version = await self.graph_version()
+        cached = self.pagerank_cache.lookup(key, version)
+        if cached is not None:
+            return cached
+        node_query, edge_query = Neo4jPageRank.graph_queries(node_label, relationship_type)
+        results = await self.gather_queries({
+            "nodes": (node_query, {"category": category}),
+            "edges": (edge_query, {"category": category}),
+        })
+        nodes = [record["name"] for record in results["nodes"]]
+        edges = [(record["source"], record["target"]) for record in results["edges"]]
+        # The power iteration is CPU-bound; keep it off the event loop
+        return await asyncio.to_thread(self.pagerank_cache.get, key, version, lambda: (nodes, edges))
+
+    @traced()
+    async def find_shortest_path(self, start_station, end_station, relationship_type):
+        """
+        :return: ``{"path", "totalDistance"}`` records (empty when the stations are not connected).
+        """
+        records = await self.execute_query(
+            SHORTEST_PATH_QUERIES[relationship_type], {"start": start_station, "end": end_station}
+        )
+        return [{"path": record["path"], "totalDistance": record["totalDistance"]} for record in records]
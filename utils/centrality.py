@@ -0,0 +1,116 @@
+import threading
+import pandas as pd
+from utils.neo4j_connection import SharedDriverExecution, current_graph_version
+from utils.tracing import traced
+
+DEGREE_COLUMNS = ["station", "DegreeCentrality"]
+
+
+class CentralityVisualizationApp(SharedDriverExecution):
+    """
+    Degree centrality per transport category, read from Neo4j through the shared driver.
+
+    One instance is shared by every session thread: ``categories`` is an
+    immutable tuple replaced under a lock, and each cached result records the
+    categories it covers, so a category added meanwhile is never served from it.
+    """
+
+    # One parameterized statement for every category, so Neo4j compiles and caches a single plan
+    DEGREE_CENTRALITY_QUERY = """
+    MATCH (category:Category)-[:HAS_STATION]->(s:Station)
+    WHERE category.name IN $categories
+    WITH category, s, COUNT { (s)-[:CONNECTED_BY_ROUTE]-(:Station) } AS DegreeCentrality
+    WHERE DegreeCentrality > 0
+    RETURN category.name AS category, s.name AS station, DegreeCentrality
+    ORDER BY category, DegreeCentrality DESC
+    """
+
+    # Top-N per category: the LIMIT runs inside the per-category subquery on the server
+    DEGREE_CENTRALITY_TOP_QUERY = """
+    UNWIND $categories AS name
+    CALL {
+        WITH name
+        MATCH (category:Category {name: name})-[:HAS_STATION]->(s:Station)
+        WITH s, COUNT { (s)-[:CONNECTED_BY_ROUTE]-(:Station) } AS DegreeCentrality
+        WHERE DegreeCentrality > 0
+        RETURN s.name AS station, DegreeCentrality
+        ORDER BY DegreeCentrality DESC
+        LIMIT $limit
+    }
+    RETURN name AS category, station, DegreeCentrality
+    """
+
+    def __init__(self, categories=("DART", "LUAS", "BUS")):
+        """
+        :param categories: Category names whose degree centrality is fetched together.
+        """
+        self.categories = tuple(categories)
+        self._degree_cache = {}
+        self._lock = threading.Lock()
+
+    def degree_query(self, limit=None):
+        """
+        :param limit: Keep only the top ``limit`` stations per category; None for all.
+        :return: Tuple (query, parameters) covering every category.
+        """
+        categories = list(self.categories)
+        if limit is None:
+            return self.DEGREE_CENTRALITY_QUERY, {"categories": categories}
+        return self.DEGREE_CENTRALITY_TOP_QUERY, {"categories": categories, "limit": int(limit)}
+
+    def store_degree_frame(self, frame, parameters):
+        """
+        Split a degree result frame by category and cache the per-category frames
+        for the current graph version.
+
+        :param parameters: The parameters from degree_query the frame was read with.
+        :return: {category: DataFrame} as cached.
+        """
+        grouped = {
+            category: group[DEGREE_COLUMNS].reset_index(drop=True)
+            for category, group in frame.groupby("category", sort=False)
+        } if len(frame) else {}
+        entry = (current_graph_version(), frozenset(parameters["categories"]), grouped)
+        with self._lock:
+            self._degree_cache[parameters.get("limit")] = entry
+        return grouped
+
+    def load_degree_centrality(self, limit=None):
+        """
+        Compute degree for every category in one round trip and cache the grouped results.
+
+        :return: {category: DataFrame} for every category.
+        """
+        query, parameters = self.degree_query(limit)
+        return self.store_degree_frame(self.execute_frame(query, parameters), parameters)
+
+    def cached_degree_centrality(self, category, limit=None):
+        """
+        Return the cached frame for one category, or None when a query is needed
+        (new category, or the graph changed since it was cached).
+        """
+        with self._lock:
+            if category not in self.categories:
+                self.categories += (category,)
+            entry = self._degree_cache.get(limit)
+        if entry is None or entry[0] != current_graph_version() or category not in entry[1]:
+            return None
+        return entry[2].get(category, pd.DataFrame(columns=DEGREE_COLUMNS))
+
+    @traced()
+    def fetch_degree_centrality(self, category, limit=None):
+        """
+        Return degree centrality for one category, served from the local cache after the first call.
+
+        :param limit: Keep only the top ``limit`` stations; None for all.
+        :return: DataFrame with "station" and "DegreeCentrality", highest first.
+        """
+        cached = self.cached_degree_centrality(category, limit)
+        if cached is None:
+            # Taken from the loaded result, not a second lookup that a version change could miss
+            cached = self.load_degree_centrality(limit).get(category, pd.DataFrame(columns=DEGREE_COLUMNS))
+        return cached
+
+    def clear_cache(self):
+        with self._lock:
+            self._degree_cache.clear()
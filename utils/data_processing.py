@@ -1,7 +1,11 @@
 import os
 import pandas as pd
-import matplotlib.pyplot as plt
 import streamlit as st
+from utils.dataset_loader import DATASET_SPECS, load_dataset
+from utils.facility_index import FacilityIndex
+from utils.render_cache import new_figure
+from utils.streaming_stats import profile_csv, profile_frame
+from utils.text_normalization import normalize_datasets
 
 
 class IrishTransportData:
@@ -24,9 +28,9 @@ class IrishTransportData:
         Load datasets for Bus, Dart, and Luas.
         """
         try:
-            self.bus_data = pd.read_csv(self.BUS_CSV_FILE_PATH, encoding=self.encoding)
-            self.dart_data = pd.read_csv(self.DART_CSV_FILE_PATH, encoding=self.encoding)
-            self.luas_data = pd.read_csv(self.LUAS_CSV_FILE_PATH, encoding=self.encoding)
+            self.bus_data = load_dataset(self.BUS_CSV_FILE_PATH, DATASET_SPECS["BUS"], encoding=self.encoding)
+            self.dart_data = load_dataset(self.DART_CSV_FILE_PATH, DATASET_SPECS["DART"], encoding=self.encoding)
+            self.luas_data = load_dataset(self.LUAS_CSV_FILE_PATH, DATASET_SPECS["LUAS"], encoding=self.encoding)
             print("Datasets loaded successfully.")
         except Exception as e:
             print(f"Error loading datasets: {e}")
@@ -54,6 +58,9 @@ class IrishTransportData:
                 'Refreshments', 'Phone Charging', 'Ticket Vending Machine', 'Smart Card Enabled'
             ]
             for column in fill_columns:
+                if isinstance(self.dart_data[column].dtype, pd.CategoricalDtype) \
+                        and 'Unknown' not in self.dart_data[column].cat.categories:
+                    self.dart_data[column] = self.dart_data[column].cat.add_categories('Unknown')
                 self.dart_data[column] = self.dart_data[column].fillna('Unknown')
 
             self.dart_data['Eircode'] = self.dart_data['Eircode'].fillna('Unknown')
@@ -66,27 +73,47 @@ class IrishTransportData:
     def clean_data(self):
         """
         Clean text fields in datasets for uniformity.
+
+        Repeated labels are normalized once per category and the three datasets
+        are processed in parallel. Columns cleaned by an earlier call are skipped.
         """
         if self.bus_data is not None and self.dart_data is not None and self.luas_data is not None:
-            datasets = [self.bus_data, self.dart_data, self.luas_data]
-            for dataset in datasets:
-                for col in dataset.select_dtypes(include=['object']).columns:
-                    dataset[col] = dataset[col].str.strip().str.lower()
+            normalize_datasets([self.bus_data, self.dart_data, self.luas_data])
             print("Data cleaning completed.")
         else:
             print("One or more datasets are not loaded. Use the load_data() method first.")
 
+    def profile(self, data):
+        """
+        Single-pass streaming profile of a dataset.
+
+        :param data: DataFrame, or path of a CSV file, which is read in chunks
+                     (by several processes when it is large) and never held in memory whole.
+        :return: StreamingProfile.
+        """
+        if isinstance(data, (str, os.PathLike)):
+            spec = next((spec for spec in DATASET_SPECS.values() if spec["file"] == os.path.basename(data)), None)
+            return profile_csv(data, numeric=spec["numeric"] if spec else None, encoding=self.encoding)
+        return profile_frame(data)
+
     def exploratory_data_analysis(self, data):
         """
         Perform basic exploratory data analysis (EDA) on a dataset.
+
+        :param data: DataFrame or CSV file path (see profile). Unique counts are HyperLogLog
+                     estimates and quartiles come from quantile sketches.
         """
         if data is not None:
+            profile = self.profile(data)
             print("Basic Statistics:")
-            print(data.describe(include='all'))
+            print(profile.describe())
             print("\nUnique Values per Column:")
-            print(data.nunique())
+            print(profile.nunique())
             print("\nSample Data:")
-            print(data.head())
+            if isinstance(data, (str, os.PathLike)):
+                print(pd.read_csv(data, encoding=self.encoding, nrows=5))
+            else:
+                print(data.head())
         else:
             print("Dataset not loaded.")
 
@@ -96,35 +123,35 @@ class IrishTransportData:
         """
         if "Weekend Working" in data.columns:
             counts = data["Weekend Working"].value_counts()
-            fig, ax = plt.subplots(figsize=(8, 6))
+            fig, ax = new_figure(figsize=(8, 6))
             counts.plot(kind="bar", color="skyblue", ax=ax)
             ax.set_title("Number of Stations Operational on Weekends")
             ax.set_xlabel("Weekend Status")
             ax.set_ylabel("Number of Stations")
-            plt.xticks(rotation=0)
+            ax.tick_params(axis="x", labelrotation=0)
             return fig
         else:
             print("'Weekend Working' column not found in the dataset.")
 
-    def plot_station_facilities(self, data):
+    def plot_station_facilities(self, data, facility_index=None):
         """
         Plot graph for stations with specific facilities.
+
+        :param facility_index: Compiled FacilityIndex holding ``data``'s stations, e.g. the app's cached one;
+            only built from ``data`` when not given.
         """
-        facility_columns = [
-            "ATM", "Wi-Fi & Internet Access", "Refreshments",
-            "Phone Charging", "Ticket Vending Machine", "Smart Card Enabled"
-        ]
-        facility_counts = {}
-        for facility in facility_columns:
-            if facility in data.columns:
-                facility_counts[facility] = data[facility].value_counts().get('yes', 0)
+        if facility_index is None:
+            facility_index = FacilityIndex.from_datasets(dart_data=data)
+        facility_counts = facility_index.counts("DART")
 
-        fig, ax = plt.subplots(figsize=(11, 7))
+        fig, ax = new_figure(figsize=(11, 7))
         ax.bar(facility_counts.keys(), facility_counts.values(), color="coral")
         ax.set_title("Number of Stations with Specific Facilities")
         ax.set_xlabel("Facilities")
         ax.set_ylabel("Number of Stations")
-        plt.xticks(rotation=45, ha='right')
+        ax.tick_params(axis="x", labelrotation=45)
+        for label in ax.get_xticklabels():
+            label.set_horizontalalignment("right")
         return fig
 
     def plot_common_stations_in_routes(self, data, top_n=10):
@@ -135,12 +162,14 @@ class IrishTransportData:
             all_routes = data["Routes Serviced"].str.split(",").explode()
             station_counts = all_routes.value_counts()
 
-            fig, ax = plt.subplots(figsize=(12, 6))
+            fig, ax = new_figure(figsize=(12, 6))
             station_counts.head(top_n).plot(kind="bar", color="lightgreen", ax=ax)
             ax.set_title(f"Top {top_n} Most Common Stations in Routes Serviced")
             ax.set_xlabel("Station Name")
             ax.set_ylabel("Frequency in Routes")
-            plt.xticks(rotation=45, ha='right')
+            ax.tick_params(axis="x", labelrotation=45)
+            for label in ax.get_xticklabels():
+                label.set_horizontalalignment("right")
             return fig
         else:
             print("'Routes Serviced' column not found in the dataset.")
@@ -148,18 +177,20 @@ class IrishTransportData:
     def advanced_correlation_analysis(self, data):
         """
         Perform correlation analysis between numeric columns.
+
+        :param data: DataFrame or CSV file path (see profile).
         """
         if data is not None:
-            numeric_data = data.select_dtypes(include=['number'])
-            if not numeric_data.empty:
-                correlation_matrix = numeric_data.corr()
+            profile = self.profile(data)
+            if profile.numeric:
+                correlation_matrix = profile.corr()
                 print("Correlation Matrix:")
                 print(correlation_matrix)
 
                 # Heatmap visualization
-                fig, ax = plt.subplots(figsize=(10, 8))
+                fig, ax = new_figure(figsize=(10, 8))
                 cax = ax.matshow(correlation_matrix, cmap='coolwarm')
-                plt.colorbar(cax)
+                fig.colorbar(cax)
                 ax.set_xticks(range(len(correlation_matrix.columns)))
                 ax.set_xticklabels(correlation_matrix.columns, rotation=90)
                 ax.set_yticks(range(len(correlation_matrix.columns)))
@@ -0,0 +1,161 @@
+import os
+import json
+import threading
+import pandas as pd
+from config import get_cache_dir
+from utils.path_index import file_fingerprint
+from utils.tracing import span
+
+# Bump when the specs or parsing below change so stale binary caches are ignored
+LOADER_VERSION = 1
+
+FACILITY_COLUMNS = [
+    "ATM", "Wi-Fi & Internet Access", "Refreshments",
+    "Phone Charging", "Ticket Vending Machine", "Smart Card Enabled"
+]
+
+# Per-dataset parsing rules; columns missing from a file are skipped
+DATASET_SPECS = {
+    "BUS": {
+        "file": "BUS_Dataset.csv",
+        "categorical": [],
+        "numeric": ["Frequency", "Duration"],
+    },
+    "DART": {
+        "file": "DART_Dataset.csv",
+        "categorical": FACILITY_COLUMNS + ["Weekend Working"],
+        "numeric": [],
+    },
+    "LUAS": {
+        "file": "LUAS_Dataset.csv",
+        "categorical": ["Line", "Zone", "Parking Availability", "Accessibility"],
+        "numeric": ["Daily Footfall"],
+    },
+}
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+def _parse_csv(path, spec, encoding):
+    """
+    Parse a CSV with explicit dtypes: categoricals for repeated labels, numbers
+    (thousands separators removed) for the numeric columns.
+    """
+    header = pd.read_csv(path, encoding=encoding, nrows=0).columns
+    categorical = [col for col in spec["categorical"] if col in header]
+    numeric = [col for col in spec["numeric"] if col in header]
+    data = pd.read_csv(
+        path,
+        encoding=encoding,
+        dtype={**{col: "category" for col in categorical}, **{col: str for col in numeric}},
+    )
+    for col in numeric:
+        data[col] = pd.to_numeric(data[col].str.replace(",", "", regex=False), errors="coerce")
+    return data
+
+
+def _cache_paths(path, cache_dir):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{name}.parquet"), os.path.join(cache_dir, f"{name}.meta.json")
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_binary_cache(data, stat, fingerprint, parquet_path, meta_path):
+    os.makedirs(os.path.dirname(parquet_path), exist_ok=True)
+    temp_path = f"{parquet_path}.{os.getpid()}.tmp"
+    data.to_parquet(temp_path, index=False)
+    os.replace(temp_path, parquet_path)
+    _write_meta(meta_path, stat, fingerprint)
+
+
+def _write_meta(meta_path, stat, fingerprint):
+    temp_path = f"{meta_path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        json.dump({
+            "version": LOADER_VERSION,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": fingerprint,
+        }, handle)
+    os.replace(temp_path, meta_path)
+
+
+def _load_uncached(path, spec, stat, encoding, cache_dir):
+    """
+    Read the Parquet cache if it still matches the CSV, otherwise parse the CSV and refresh it.
+    """
+    parquet_path, meta_path = _cache_paths(path, cache_dir)
+    meta = _read_meta(meta_path)
+    if meta is not None and meta.get("version") == LOADER_VERSION and os.path.exists(parquet_path):
+        if meta.get("mtime_ns") == stat.st_mtime_ns and meta.get("size") == stat.st_size:
+            with span("dataset.read_parquet"):
+                return pd.read_parquet(parquet_path)
+        fingerprint = file_fingerprint(path)
+        if meta.get("sha256") == fingerprint:
+            # Touched but unchanged: keep the binary cache and remember the new mtime
+            _write_meta(meta_path, stat, fingerprint)
+            with span("dataset.read_parquet"):
+                return pd.read_parquet(parquet_path)
+    else:
+        fingerprint = file_fingerprint(path)
+    with span("dataset.parse_csv"):
+        data = _parse_csv(path, spec, encoding)
+    with span("dataset.write_parquet"):
+        _write_binary_cache(data, stat, fingerprint, parquet_path, meta_path)
+    return data
+
+
+def load_dataset(path, spec, encoding="latin1", cache_dir=None):
+    """
+    Load one dataset through the in-process memo and the on-disk Parquet cache.
+
+    Repeat calls only stat the file. The returned frame is a shallow copy, so
+    callers may add or replace columns without touching the cached one.
+
+    :param path: CSV file path.
+    :param spec: Entry from DATASET_SPECS.
+    """
+    with span("dataset.load", file=os.path.basename(path)) as current:
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        with _memo_lock:
+            cached = _memo.get(key)
+            fresh = cached is not None and cached[0] == (stat.st_mtime_ns, stat.st_size)
+            current.set(memo_hit=fresh)
+            if not fresh:
+                data = _load_uncached(path, spec, stat, encoding, cache_dir or get_cache_dir())
+                cached = ((stat.st_mtime_ns, stat.st_size), data)
+                _memo[key] = cached
+        return cached[1].copy(deep=False)
+
+
+def clear_memo():
+    """
+    Forget the in-process copies so the next load reads the Parquet cache (or CSV) again.
+    """
+    with _memo_lock:
+        _memo.clear()
+
+
+def load_datasets(data_dir=None, encoding="latin1", cache_dir=None):
+    """
+    Load the BUS, DART and LUAS datasets.
+
+    :param data_dir: Directory holding the CSVs; defaults to the project's data folder.
+    :return: Tuple (bus_data, dart_data, luas_data).
+    """
+    if data_dir is None:
+        data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+    return tuple(
+        load_dataset(os.path.join(data_dir, DATASET_SPECS[name]["file"]), DATASET_SPECS[name],
+                     encoding=encoding, cache_dir=cache_dir)
+        for name in ("BUS", "DART", "LUAS")
+    )
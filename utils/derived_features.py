@@ -0,0 +1,40 @@
+import pandas as pd
+
+
+def count_list_items(series):
+    """
+    Number of items in a comma-separated text column; missing cells count as 0.
+    """
+    return (series.astype("string").str.count(",") + 1).fillna(0).astype(int)
+
+
+def to_numeric_footfall(series):
+    """
+    Parse footfall figures such as "12,345" to floats; numeric columns pass through.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    return pd.to_numeric(series.astype("string").str.replace(",", "", regex=False), errors="coerce")
+
+
+def add_derived_features(bus_data, dart_data, luas_data):
+    """
+    Compute the chart-only columns once, on copies of the datasets.
+
+    Adds "Landmarks Count" (BUS and LUAS), "Routes Count" (DART) and a
+    numeric "Daily Footfall" (LUAS). The input frames are left untouched.
+
+    :return: Tuple (bus_data, dart_data, luas_data) with the derived columns.
+    """
+    bus_data = bus_data.copy(deep=False)
+    dart_data = dart_data.copy(deep=False)
+    luas_data = luas_data.copy(deep=False)
+    if "Key Landmarks" in bus_data.columns:
+        bus_data["Landmarks Count"] = count_list_items(bus_data["Key Landmarks"])
+    if "Routes Serviced" in dart_data.columns:
+        dart_data["Routes Count"] = count_list_items(dart_data["Routes Serviced"])
+    if "Nearby Landmarks" in luas_data.columns:
+        luas_data["Landmarks Count"] = count_list_items(luas_data["Nearby Landmarks"])
+    if "Daily Footfall" in luas_data.columns:
+        luas_data["Daily Footfall"] = to_numeric_footfall(luas_data["Daily Footfall"])
+    return bus_data, dart_data, luas_data
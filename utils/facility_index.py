@@ -0,0 +1,201 @@
+import numpy as np
+import pandas as pd
+from config import get_graph_schema
+from utils.dataset_loader import FACILITY_COLUMNS
+from utils.station_index import normalize_name
+
+# Yes/No columns compiled into the index, per dataset
+FACILITY_SOURCES = {
+    "DART": FACILITY_COLUMNS,
+    "LUAS": ["Parking Availability", "Accessibility"],
+}
+
+_WORD_BITS = 64
+
+if hasattr(np, "bitwise_count"):
+    def popcount(words):
+        """
+        Number of set bits in an array of uint64 words.
+        """
+        return int(np.bitwise_count(words).sum())
+else:
+    _BYTE_COUNTS = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+    def popcount(words):
+        """
+        Number of set bits in an array of uint64 words.
+        """
+        return int(_BYTE_COUNTS[words.view(np.uint8)].sum(dtype=np.int64))
+
+
+def yes_mask(series):
+    """
+    Rows whose value reads "yes", whatever its case or padding ("Yes", " yes").
+    Missing values count as no.
+
+    :return: Boolean numpy array.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # One comparison per category; the trailing False is what code -1 (missing) picks
+        matches = [isinstance(value, str) and value.strip().casefold() == "yes" for value in series.cat.categories]
+        return np.array(matches + [False], dtype=bool)[series.cat.codes.to_numpy()]
+    values = series.astype("string").str.strip().str.casefold()
+    return (values == "yes").fillna(False).to_numpy(dtype=bool)
+
+
+def pack(mask):
+    """
+    Pack a boolean array into uint64 words: element i is bit i % 64 of word i // 64.
+    """
+    padded = np.zeros(-(-len(mask) // _WORD_BITS) * _WORD_BITS, dtype=bool)
+    padded[:len(mask)] = mask
+    return np.packbits(padded, bitorder="little").view("<u8")
+
+
+class FacilityIndex:
+    """
+    Station facilities compiled once into one bitset per facility.
+
+    Stations are the DART and LUAS stations, joined on their normalized name
+    so an interchange appears once. Each facility (and each dataset's station
+    membership) is a row of uint64 words holding one bit per station, so
+    counts and multi-facility filters are a few bitwise ANDs and a popcount
+    over n / 64 words, whatever the number of stations.
+    """
+
+    def __init__(self, stations, categories, facilities):
+        """
+        :param stations: Station names, one per bit position.
+        :param categories: {category: boolean array}, the stations listed in each dataset.
+        :param facilities: {facility: (category, boolean array)}, the stations offering each facility.
+        """
+        self.stations = np.asarray(stations, dtype=object)
+        self.categories = {category: pack(mask) for category, mask in categories.items()}
+        self.facilities = {facility: (category, pack(mask)) for facility, (category, mask) in facilities.items()}
+        self._all = pack(np.ones(len(self.stations), dtype=bool))
+
+    @classmethod
+    def from_datasets(cls, dart_data=None, luas_data=None, schema=None):
+        """
+        Index the facility columns of the DART and LUAS datasets; either may be None.
+        Facility columns missing from a dataset are left out.
+        """
+        schema = schema or get_graph_schema()
+        frames = {}
+        for category, data in (("DART", dart_data), ("LUAS", luas_data)):
+            column = schema[category]["station_column"]
+            if data is not None and column in data.columns:
+                frames[category] = data[data[column].notna()]
+        names = pd.concat(
+            [data[schema[category]["station_column"]].astype(str).str.strip() for category, data in frames.items()],
+            ignore_index=True,
+        ) if frames else pd.Series([], dtype=object)
+        # Normalize each distinct name once, across both datasets
+        codes, uniques = pd.factorize(names)
+        keys = pd.Index([normalize_name(name) for name in uniques])[codes]
+
+        listed = pd.DataFrame({"key": keys, "name": names.to_numpy()})
+        # The first spelling seen (DART before LUAS) names an interchange
+        listed = listed[listed["key"] != ""].drop_duplicates("key")
+        position = pd.Index(listed["key"])
+
+        categories, facilities = {}, {}
+        start = 0
+        for category, data in frames.items():
+            positions = position.get_indexer(keys[start:start + len(data)])
+            start += len(data)
+            present = positions >= 0
+            data, positions = data[present], positions[present]
+            membership = np.zeros(len(position), dtype=bool)
+            membership[positions] = True
+            categories[category] = membership
+            for facility in FACILITY_SOURCES[category]:
+                if facility in data.columns:
+                    offered = np.zeros(len(position), dtype=bool)
+                    # A station listed on several rows has a facility if any row says so
+                    offered[positions[yes_mask(data[facility])]] = True
+                    facilities[facility] = (category, offered)
+        return cls(listed["name"].to_numpy(), categories, facilities)
+
+    def __len__(self):
+        return len(self.stations)
+
+    def facility_names(self, category=None):
+        """
+        Indexed facilities, in dataset column order.
+
+        :param category: Only facilities recorded by this dataset; None for all.
+        """
+        return [facility for facility, (source, _) in self.facilities.items() if category in (None, source)]
+
+    def _row(self, facility):
+        if facility not in self.facilities:
+            raise ValueError(f"Unknown facility: {facility}")
+        return self.facilities[facility]
+
+    def mask(self, require=(), exclude=(), category=None):
+        """
+        Stations offering every facility in ``require`` and none in ``exclude``.
+
+        A station only counts as lacking a facility when the dataset recording
+        that facility lists it; an excluded DART facility therefore also limits
+        the result to DART stations.
+
+        :param category: Only stations listed in this dataset; None for all.
+        :return: Packed uint64 words, one bit per station.
+        """
+        if category is not None and category not in self.categories:
+            return np.zeros_like(self._all)
+        words = self._all.copy() if category is None else self.categories[category].copy()
+        for facility in require:
+            words &= self._row(facility)[1]
+        for facility in exclude:
+            source, offered = self._row(facility)
+            words &= self.categories[source] & ~offered
+        return words
+
+    def count(self, require=(), exclude=(), category=None):
+        """
+        Number of stations matching a filter (see mask).
+        """
+        return popcount(self.mask(require, exclude, category))
+
+    def positions(self, words):
+        """
+        Station positions of the set bits of a mask, ascending.
+        """
+        bits = np.unpackbits(words.view(np.uint8), count=len(self.stations), bitorder="little")
+        return np.flatnonzero(bits)
+
+    def stations_matching(self, require=(), exclude=(), category=None, limit=None):
+        """
+        Names of the stations matching a filter (see mask), in dataset order.
+
+        :param limit: Return at most this many names; None for all.
+        """
+        return self.stations[self.positions(self.mask(require, exclude, category))[:limit]].tolist()
+
+    def counts(self, category=None):
+        """
+        Stations offering each facility.
+
+        :param category: Only facilities recorded by this dataset; None for all.
+        :return: {facility: number of stations}.
+        """
+        return {facility: popcount(self.facilities[facility][1]) for facility in self.facility_names(category)}
+
+    def table(self, require=(), exclude=(), category=None, limit=None):
+        """
+        Matching stations with the datasets listing them and their facilities.
+
+        :param limit: Return at most this many rows; None for all.
+        :return: DataFrame with a "Station" column and one boolean column per dataset and facility.
+        """
+        selected = self.positions(self.mask(require, exclude, category))[:limit]
+        columns = {"Station": self.stations[selected]}
+        rows = [(name, words) for name, words in self.categories.items()]
+        rows += [(facility, words) for facility, (_, words) in self.facilities.items()]
+        for name, words in rows:
+            bits = np.unpackbits(words.view(np.uint8), count=len(self.stations), bitorder="little")
+            columns[name] = bits[selected].astype(bool)
+        return pd.DataFrame(columns)
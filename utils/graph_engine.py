@@ -0,0 +1,514 @@
+import os
+import math
+import pandas as pd
+import networkx as nx
+from config import get_graph_schema, get_cache_dir, get_path_index_config
+from utils.path_index import (
+    AllPairsPathIndex, LandmarkPathIndex, file_fingerprint, index_fingerprint, load_or_build_path_index
+)
+from utils.pagerank import PageRankCache
+from utils.dataset_loader import DATASET_SPECS, load_dataset
+from utils.centrality_kernels import SparseGraph, degree_kernel, closeness_kernel, betweenness_kernel
+from utils.tracing import traced
+
+CATEGORIES = ("BUS", "DART", "LUAS")
+
+# Pseudo-category for the merged Bus+DART+LUAS station graph
+MULTIMODAL = "MULTIMODAL"
+
+# Key of the BUS Route graph among a snapshot's graphs
+ROUTES = "ROUTES"
+
+# Relationship type linking stations within each category, as used by the Neo4j executors
+STATION_RELATIONSHIPS = {
+    "BUS": "CONNECTED_BY_ROUTE",
+    "DART": "CONNECTED_BY_ROUTE",
+    "LUAS": "CONNECTED_BY_LINE",
+}
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance between two coordinates in kilometres.
+    """
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+
+def split_names(value):
+    """
+    Split a comma-separated cell into stripped, non-empty names.
+    """
+    if pd.isna(value):
+        return []
+    return [name.strip() for name in str(value).split(",") if name.strip()]
+
+
+def row_coordinates(row, schema):
+    """
+    (latitude, longitude) of a dataset row, or None when the columns are missing or empty.
+    """
+    lat_col, lon_col = schema["coordinate_columns"]
+    lat, lon = row.get(lat_col), row.get(lon_col)
+    if lat is None or lon is None or pd.isna(lat) or pd.isna(lon):
+        return None
+    return float(lat), float(lon)
+
+
+def link_distance(a, b):
+    """
+    Edge distance in kilometres when both ends have coordinates, otherwise one hop.
+    """
+    return haversine_km(*a, *b) if a and b else 1.0
+
+
+class StationChain:
+    """
+    Turns DART/LUAS station rows into stations and links.
+
+    Stations that share a route or line are chained in file order. The chain
+    state carries over between ``feed`` calls, so rows can arrive in chunks.
+    """
+
+    def __init__(self, category, schema):
+        columns = schema[category]
+        self.schema = schema
+        self.station_column = columns["station_column"]
+        self.group_column = columns.get("routes_column") or columns.get("line_column")
+        self._previous = {}
+
+    def feed(self, rows):
+        """
+        :param rows: Iterable of row dicts.
+        :return: (stations, links): [(name, coords, row)] and [(source, target, distance)].
+        """
+        stations, links = [], []
+        for row in rows:
+            station = row.get(self.station_column)
+            if station is None or pd.isna(station) or not str(station).strip():
+                continue
+            station = str(station).strip()
+            coords = row_coordinates(row, self.schema)
+            stations.append((station, coords, row))
+            for group in split_names(row.get(self.group_column)):
+                previous = self._previous.get(group)
+                if previous is not None and previous[0] != station:
+                    links.append((previous[0], station, link_distance(previous[1], coords)))
+                self._previous[group] = (station, coords)
+        return stations, links
+
+
+class BusRouteChain:
+    """
+    Turns BUS route rows into routes, stops and stop-to-stop links.
+
+    Routes sharing a stop are remembered across ``feed`` calls and returned by
+    ``route_links`` once every chunk has been seen.
+    """
+
+    def __init__(self, schema):
+        self.route_column = schema["BUS"]["route_column"]
+        self.stops_column = schema["BUS"]["stops_column"]
+        self.routes_at_stop = {}
+
+    def feed(self, rows):
+        """
+        :param rows: Iterable of row dicts.
+        :return: (routes, stops, links): [(route, row)], [stop] and [(source, target, distance)].
+        """
+        routes, stops, links = [], [], []
+        for row in rows:
+            route = row.get(self.route_column)
+            if route is None or pd.isna(route):
+                continue
+            route = str(route).strip()
+            routes.append((route, row))
+            route_stops = split_names(row.get(self.stops_column))
+            for stop in route_stops:
+                stops.append(stop)
+                self.routes_at_stop.setdefault(stop, set()).add(route)
+            links.extend((a, b, 1.0) for a, b in zip(route_stops, route_stops[1:]) if a != b)
+        return routes, stops, links
+
+    def route_links(self):
+        """
+        Every pair of routes that share at least one stop, each pair once.
+        """
+        pairs = set()
+        for routes in self.routes_at_stop.values():
+            ordered = sorted(routes)
+            for i, source in enumerate(ordered):
+                for target in ordered[i + 1:]:
+                    pairs.add((source, target))
+        return sorted(pairs)
+
+
+class TransportGraph:
+    """
+    In-memory Station/Route/Category graph built once from the three datasets.
+
+    Each category keeps its own undirected station graph whose edges carry a
+    ``distance`` (kilometres when coordinates are available, otherwise one per
+    hop). BUS routes additionally form a Route graph linked by CONNECTED_TO
+    wherever two routes share a stop.
+    """
+
+    def __init__(self, bus_data, dart_data, luas_data, schema=None):
+        self.schema = schema or get_graph_schema()
+        self.station_graphs = {category: nx.Graph() for category in CATEGORIES}
+        self.route_graph = nx.Graph()
+        self.source_paths = {}
+        self.path_indexes = {}
+        self.path_index_fingerprints = {}
+        self.pagerank_cache = PageRankCache()
+        self.kernel_reports = {}
+        self.version = 0
+        self.snapshot = None
+        self._merged = None
+        self._build_bus(bus_data)
+        self._build_chained("DART", dart_data)
+        self._build_chained("LUAS", luas_data)
+        self._index_names()
+
+    def _index_names(self):
+        self._name_lookup = {
+            category: {name.casefold(): name for name in graph.nodes}
+            for category, graph in self.station_graphs.items()
+        }
+
+    @classmethod
+    @traced()
+    def from_csv(cls, bus_path, dart_path, luas_path, encoding="latin1"):
+        """
+        Build the graph straight from the dataset CSV files.
+        """
+        transport_graph = cls(
+            load_dataset(bus_path, DATASET_SPECS["BUS"], encoding=encoding),
+            load_dataset(dart_path, DATASET_SPECS["DART"], encoding=encoding),
+            load_dataset(luas_path, DATASET_SPECS["LUAS"], encoding=encoding),
+        )
+        transport_graph.source_paths = {"BUS": bus_path, "DART": dart_path, "LUAS": luas_path}
+        return transport_graph
+
+    @classmethod
+    @traced()
+    def from_snapshot(cls, snapshot, source_paths):
+        """
+        Build the graph from a shared snapshot's memory-mapped graphs (see
+        utils/snapshot.py) instead of the CSV files.
+
+        The station, merged and Route graphs are SnapshotGraphs reading the
+        mapped arrays, so a worker holds no networkx copy of its own. The
+        result is read-only.
+
+        :param source_paths: {category: dataset CSV path}; the snapshot must have been built from these versions.
+        :return: TransportGraph, or None when the snapshot is stale or lacks any of the graphs.
+        """
+        if not snapshot.matches(source_paths):
+            return None
+        graphs = {key: snapshot.graph(key) for key in CATEGORIES + (MULTIMODAL, ROUTES)}
+        if any(graph is None for graph in graphs.values()):
+            return None
+        transport_graph = cls(None, None, None)
+        transport_graph.station_graphs = {category: graphs[category] for category in CATEGORIES}
+        transport_graph.route_graph = graphs[ROUTES]
+        transport_graph._merged = (transport_graph.version, graphs[MULTIMODAL])
+        transport_graph._index_names()
+        transport_graph.source_paths = dict(source_paths)
+        transport_graph.snapshot = snapshot
+        return transport_graph
+
+    def snapshot_graphs(self):
+        """
+        The graphs a snapshot stores for from_snapshot: each station graph, the merged graph and the Route graph.
+        """
+        return {**self.station_graphs, MULTIMODAL: self.merged_station_graph(), ROUTES: self.route_graph}
+
+    @traced()
+    def build_path_indexes(self, cache_dir=None):
+        """
+        Load or build the precomputed shortest-path index for every category.
+
+        Indexes are persisted under ``cache_dir`` and rebuilt whenever the
+        category's source CSV, its graph schema, the index options or the
+        index-building code change. A graph loaded from a snapshot maps the
+        snapshot's indexes instead when their fingerprints match.
+        """
+        cache_dir = cache_dir or get_cache_dir()
+        index_config = get_path_index_config()
+        for category in CATEGORIES:
+            source_path = self.source_paths.get(category)
+            if source_path is None:
+                continue
+            index_path = os.path.join(cache_dir, f"{category.lower()}_path_index.npz")
+            schema = {category: self.schema.get(category), "coordinate_columns": self.schema.get("coordinate_columns")}
+            if index_config.get(category) == "landmarks":
+                options = {"num_landmarks": index_config["num_landmarks"]}
+                index_class = LandmarkPathIndex
+            else:
+                options = {}
+                index_class = AllPairsPathIndex
+            fingerprint = index_fingerprint(file_fingerprint(source_path), schema=schema, **options)
+            self.path_index_fingerprints[category] = fingerprint
+            index = self.snapshot.path_index(category, fingerprint) if self.snapshot is not None else None
+            if index is None or index.kind != index_class.kind:
+                index = load_or_build_path_index(
+                    index_class, self.station_graphs[category], fingerprint, index_path, **options
+                )
+            self.path_indexes[category] = index
+
+    def snapshot_path_indexes(self):
+        """
+        {category: (fingerprint, index)} of the built path indexes, for a snapshot to store.
+        """
+        return {
+            category: (self.path_index_fingerprints[category], index)
+            for category, index in self.path_indexes.items()
+        }
+
+    def _shared_graph(self, category, node_label):
+        """
+        The snapshot's SparseGraph for a graph loaded from it, otherwise None.
+        """
+        if self.snapshot is None:
+            return None
+        return self.snapshot.graph(ROUTES if node_label == "Route" else category).sparse_graph()
+
+    # --------------------------------------
+    # Graph construction
+    # --------------------------------------
+    def _link(self, graph, source, target, relationship, distance):
+        if graph.has_edge(source, target):
+            edge = graph.edges[source, target]
+            edge["distance"] = min(edge["distance"], distance)
+        else:
+            graph.add_edge(source, target, distance=distance, type=relationship)
+
+    def _build_chained(self, category, data):
+        """
+        Add one station per row and chain stations that share a route/line in file order.
+        """
+        graph = self.station_graphs[category]
+        relationship = STATION_RELATIONSHIPS[category]
+        if data is None or self.schema[category]["station_column"] not in data.columns:
+            return
+        chain = StationChain(category, self.schema)
+        zone_column = self.schema[category].get("zone_column")
+        stations, links = chain.feed(data.to_dict("records"))
+        for station, coords, row in stations:
+            # Routes/lines (in order of first appearance) and zone, used to group stations in network views
+            groups = graph.nodes[station]["groups"] if station in graph else ()
+            groups += tuple(group for group in split_names(row.get(chain.group_column)) if group not in groups)
+            zone = row.get(zone_column) if zone_column else None
+            graph.add_node(station, label="Station", category=category, coords=coords, groups=groups,
+                           zone=None if zone is None or pd.isna(zone) else str(zone).strip())
+        for source, target, distance in links:
+            self._link(graph, source, target, relationship, distance)
+
+    def _build_bus(self, data):
+        """
+        Chain the stops of every BUS route and link routes that share a stop.
+        """
+        graph = self.station_graphs["BUS"]
+        chain = BusRouteChain(self.schema)
+        if data is None or chain.route_column not in data.columns or chain.stops_column not in data.columns:
+            return
+        routes, stops, links = chain.feed(data.to_dict("records"))
+        self.route_graph.add_nodes_from((route for route, _ in routes), label="Route")
+        graph.add_nodes_from(stops, label="Station", category="BUS", coords=None, zone=None)
+        for stop, stop_routes in chain.routes_at_stop.items():
+            graph.nodes[stop]["groups"] = tuple(sorted(stop_routes))
+        for source, target, distance in links:
+            self._link(graph, source, target, STATION_RELATIONSHIPS["BUS"], distance)
+        self.route_graph.add_edges_from(chain.route_links(), type="CONNECTED_TO")
+
+    # --------------------------------------
+    # Updates
+    # --------------------------------------
+    def add_connection(self, category, source, target, distance=1.0):
+        """
+        Add (or shorten) a station-to-station edge and bump the graph version.
+        """
+        self._check_writable()
+        graph = self.station_graphs[category]
+        for station in (source, target):
+            if station not in graph:
+                graph.add_node(station, label="Station", category=category, coords=None)
+                self._name_lookup[category][station.casefold()] = station
+        if graph.has_edge(source, target):
+            distance = min(distance, graph.edges[source, target]["distance"])
+        graph.add_edge(source, target, distance=distance, type=STATION_RELATIONSHIPS[category])
+        self._graph_changed(category)
+
+    def remove_connection(self, category, source, target):
+        """
+        Remove a station-to-station edge, if present, and bump the graph version.
+        """
+        self._check_writable()
+        graph = self.station_graphs[category]
+        if graph.has_edge(source, target):
+            graph.remove_edge(source, target)
+            self._graph_changed(category)
+
+    def _check_writable(self):
+        if self.snapshot is not None:
+            raise ValueError("A transport graph loaded from a snapshot is read-only; use from_csv to edit it.")
+
+    def _graph_changed(self, category):
+        # Persisted path indexes describe the CSV topology, so stop serving paths from them
+        self.version += 1
+        self.path_indexes.pop(category, None)
+
+    # --------------------------------------
+    # Lookups
+    # --------------------------------------
+    def resolve_station(self, category, name):
+        """
+        Map user input to a station node name, ignoring case and surrounding whitespace.
+        """
+        if name is None:
+            return None
+        name = str(name).strip()
+        if name in self.station_graphs[category]:
+            return name
+        return self._name_lookup[category].get(name.casefold())
+
+    def graph_for(self, category, node_label="Station"):
+        """
+        Return the graph an analysis runs on: the BUS Route graph, a category's
+        station graph, or the merged station graph for MULTIMODAL.
+        """
+        if node_label == "Route":
+            return self.route_graph
+        if category == MULTIMODAL:
+            return self.merged_station_graph()
+        return self.station_graphs[category]
+
+    def merged_station_graph(self):
+        """
+        All station graphs composed into one; stations with the same name are shared.
+        """
+        if self._merged is None or self._merged[0] != self.version:
+            self._merged = (self.version, nx.compose_all(list(self.station_graphs.values())))
+        return self._merged[1]
+
+    # --------------------------------------
+    # Analytics
+    # --------------------------------------
+    @traced()
+    def shortest_path(self, category, start_station, end_station):
+        """
+        Weighted shortest path between two stations of a category.
+
+        :return: List with one ``{"path", "totalDistance"}`` record, or an empty list.
+        """
+        graph = self.station_graphs[category]
+        source = self.resolve_station(category, start_station)
+        target = self.resolve_station(category, end_station)
+        if source is None or target is None:
+            return []
+        index = self.path_indexes.get(category)
+        if index is None and self.snapshot is not None:
+            # No networkx graph to search; the snapshot graph runs Dijkstra on its mapped arrays
+            index = graph
+        if index is not None:
+            found = index.path(source, target)
+            if found is None:
+                return []
+            distance, path = found
+            return [{"path": path, "totalDistance": round(distance, 3)}]
+        try:
+            distance, path = nx.single_source_dijkstra(graph, source, target, weight="distance")
+        except nx.NetworkXNoPath:
+            return []
+        return [{"path": path, "totalDistance": round(distance, 3)}]
+
+    @traced()
+    def pagerank(self, category, node_label="Station"):
+        """
+        PageRank over a category graph, sorted by rank.
+
+        Computed once per graph version; after an edge change the previous rank
+        vector warm-starts the power iteration.
+
+        :return: List of ``{"Name", "PageRank"}`` records.
+        """
+        graph = self.graph_for(category, node_label)
+
+        def load_graph():
+            shared = self._shared_graph(category, node_label)
+            if shared is not None:
+                return shared
+            # Undirected edges contribute rank in both directions (PageRankCache stores both)
+            return list(graph.nodes), list(graph.edges)
+
+        key = (category, node_label)
+        records = self.pagerank_cache.get(key, self.version, load_graph)
+        self.kernel_reports[(category, "pagerank")] = self.pagerank_cache.stats(key)
+        return records
+
+    @traced()
+    def centrality(self, category, measure, node_label="Station", **options):
+        """
+        Run one of the sparse centrality kernels on a category graph.
+
+        :param measure: "degree", "closeness" or "betweenness" (``samples=`` for sampled).
+        :return: Kernel report with ``scores``, ``iterations``, ``residual`` and ``wall_time``.
+        """
+        kernels = {"degree": degree_kernel, "closeness": closeness_kernel, "betweenness": betweenness_kernel}
+        graph = self._shared_graph(category, node_label)
+        if graph is None:
+            graph = SparseGraph.from_networkx(self.graph_for(category, node_label))
+        report = kernels[measure](graph, **options)
+        self.kernel_reports[(category, measure)] = {
+            name: report[name] for name in ("iterations", "residual", "wall_time")
+        }
+        return report
+
+    def fetch_degree_centrality(self, category, limit=None):
+        """
+        Station degree within a category, matching CentralityVisualizationApp's output.
+
+        :param limit: Keep only the top ``limit`` stations; None for all.
+        :return: DataFrame with "station" and "DegreeCentrality", highest first.
+        """
+        scores = self.centrality(category, "degree")["scores"]
+        degrees = pd.Series(scores, dtype=float).astype(int)
+        degrees = degrees[degrees > 0]
+        degrees = degrees.nlargest(limit) if limit is not None else degrees.sort_values(ascending=False, kind="stable")
+        return pd.DataFrame({"station": degrees.index, "DegreeCentrality": degrees.values})
+
+    def executor(self, category):
+        """
+        Return an object exposing the Neo4j executor methods for one category.
+        """
+        return InMemoryExecution(self, category)
+
+
+class InMemoryExecution:
+    """
+    Drop-in replacement for the neo4jdb executors backed by a TransportGraph.
+    """
+
+    def __init__(self, transport_graph, category):
+        self.transport_graph = transport_graph
+        self.category = category
+
+    def close(self):
+        pass
+
+    def find_shortest_path(self, start_station, end_station):
+        return self.transport_graph.shortest_path(self.category, start_station, end_station)
+
+    def calculate_shortest_path(self, start_station, end_station):
+        return self.find_shortest_path(start_station, end_station)
+
+    def calculate_pagerank(self, node_label, relationship_type):
+        """
+        Compute PageRank and return the ranks directly (no write-back round trip).
+        """
+        return self.transport_graph.pagerank(self.category, node_label)
+
+    def fetch_degree_centrality(self, category=None, limit=None):
+        return self.transport_graph.fetch_degree_centrality(category or self.category, limit)
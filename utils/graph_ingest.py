@@ -0,0 +1,251 @@
+import os
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from config import get_cache_dir, get_graph_schema, get_ingest_config
+from utils.dataset_loader import DATASET_SPECS
+from utils.graph_engine import CATEGORIES, STATION_RELATIONSHIPS, StationChain, BusRouteChain
+from utils.neo4j_connection import get_session, close_driver, bump_graph_version
+from utils.graph_schema import apply_schema
+from utils.path_index import file_fingerprint
+
+CATEGORY_QUERY = """
+UNWIND $rows AS row
+MERGE (:Category {name: row.name})
+"""
+
+STATION_QUERY = """
+UNWIND $rows AS row
+MERGE (s:Station {name: row.name})
+SET s += row.properties
+WITH s, row
+MATCH (c:Category {name: row.category})
+MERGE (c)-[:HAS_STATION]->(s)
+"""
+
+ROUTE_QUERY = """
+UNWIND $rows AS row
+MERGE (r:Route {name: row.name})
+SET r += row.properties
+"""
+
+# Relationship types cannot be parameters; one statement per type keeps each plan cacheable
+LINK_QUERIES = {
+    relationship: f"""
+    UNWIND $rows AS row
+    MATCH (a:Station {{name: row.source}})
+    MATCH (b:Station {{name: row.target}})
+    MERGE (a)-[r:{relationship}]->(b)
+    SET r.distance = row.distance
+    """
+    for relationship in ("CONNECTED_BY_ROUTE", "CONNECTED_BY_LINE")
+}
+
+ROUTE_LINK_QUERY = """
+UNWIND $rows AS row
+MATCH (a:Route {name: row.source})
+MATCH (b:Route {name: row.target})
+MERGE (a)-[:CONNECTED_TO]->(b)
+"""
+
+
+def clean_properties(row, exclude=()):
+    """
+    Neo4j-safe property map: missing values dropped, NumPy scalars unwrapped.
+    """
+    properties = {}
+    for key, value in row.items():
+        if key in exclude or value is None or (not isinstance(value, str) and pd.isna(value)):
+            continue
+        properties[key] = value.item() if hasattr(value, "item") else value
+    return properties
+
+
+class IngestCheckpoint:
+    """
+    Append-only log of committed batches so an interrupted load can resume.
+
+    Entries are tied to the fingerprint of the source CSV; batches recorded
+    for an older version of a file are ignored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._done = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as handle:
+                self._done = {line.rstrip("\n") for line in handle if line.strip()}
+
+    def is_done(self, batch_id):
+        return batch_id in self._done
+
+    def mark_done(self, batch_id):
+        with self._lock:
+            self._done.add(batch_id)
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(batch_id + "\n")
+                handle.flush()
+
+    def reset(self):
+        with self._lock:
+            self._done.clear()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class GraphIngestor:
+    """
+    Streams the transport CSVs into Neo4j with batched ``UNWIND $rows`` writes.
+
+    Each CSV is read in chunks. For every chunk the node batches are written
+    first, then the relationship batches that refer to them, spread over a
+    pool of writer threads. Every committed batch is checkpointed, and MERGE
+    keeps re-runs idempotent, so a partial load can simply be restarted.
+    """
+
+    def __init__(self, data_dir=None, chunk_size=None, batch_size=None, writer_threads=None,
+                 checkpoint_path=None, encoding="latin1"):
+        config = get_ingest_config()
+        self.data_dir = data_dir or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+        self.chunk_size = chunk_size or config["chunk_size"]
+        self.batch_size = batch_size or config["batch_size"]
+        self.writer_threads = writer_threads or config["writer_threads"]
+        self.encoding = encoding
+        self.schema = get_graph_schema()
+        self.checkpoint = IngestCheckpoint(checkpoint_path or os.path.join(get_cache_dir(), "ingest_checkpoint.log"))
+        self.rows_written = 0
+        self.batches_skipped = 0
+        self._count_lock = threading.Lock()
+
+    # --------------------------------------
+    # Writing
+    # --------------------------------------
+    def create_schema(self):
+        """
+        Create the uniqueness constraints (and their backing indexes) MERGE relies on.
+        """
+        for problem in apply_schema():
+            print(problem)
+
+    def _write_batch(self, batch_id, query, rows):
+        if self.checkpoint.is_done(batch_id):
+            with self._count_lock:
+                self.batches_skipped += 1
+            return
+        with get_session() as session:
+            # execute_write retries transient failures such as deadlocks between writer threads
+            session.execute_write(lambda tx: tx.run(query, rows=rows).consume())
+        self.checkpoint.mark_done(batch_id)
+        with self._count_lock:
+            self.rows_written += len(rows)
+
+    def _write_all(self, pool, prefix, query, rows):
+        """
+        Split rows into batches, write them on the pool and wait for every batch.
+        """
+        futures = [
+            pool.submit(self._write_batch, f"{prefix}:{start // self.batch_size}", query,
+                        rows[start:start + self.batch_size])
+            for start in range(0, len(rows), self.batch_size)
+        ]
+        for future in futures:
+            future.result()
+
+    # --------------------------------------
+    # Datasets
+    # --------------------------------------
+    def _chunks(self, category):
+        path = os.path.join(self.data_dir, DATASET_SPECS[category]["file"])
+        fingerprint = file_fingerprint(path)
+        prefix = f"{category}:{fingerprint[:16]}:{self.chunk_size}:{self.batch_size}"
+        reader = pd.read_csv(path, encoding=self.encoding, chunksize=self.chunk_size)
+        for index, chunk in enumerate(reader):
+            yield f"{prefix}:{index}", chunk.to_dict("records")
+
+    def _ingest_stations(self, pool, category):
+        chain = StationChain(category, self.schema)
+        station_column = chain.station_column
+        csv_rows = 0
+        for chunk_id, rows in self._chunks(category):
+            csv_rows += len(rows)
+            stations, links = chain.feed(rows)
+            station_rows = [
+                {"name": name, "category": category, "properties": clean_properties(row, exclude=(station_column,))}
+                for name, _, row in stations
+            ]
+            link_rows = [{"source": s, "target": t, "distance": d} for s, t, d in links]
+            self._write_all(pool, f"{chunk_id}:stations", STATION_QUERY, station_rows)
+            self._write_all(pool, f"{chunk_id}:links", LINK_QUERIES[STATION_RELATIONSHIPS[category]], link_rows)
+        return csv_rows
+
+    def _ingest_bus(self, pool):
+        chain = BusRouteChain(self.schema)
+        csv_rows = 0
+        last_chunk_id = "BUS"
+        for chunk_id, rows in self._chunks("BUS"):
+            csv_rows += len(rows)
+            last_chunk_id = chunk_id
+            routes, stops, links = chain.feed(rows)
+            route_rows = [
+                {"name": name, "properties": clean_properties(row, exclude=(chain.route_column,))}
+                for name, row in routes
+            ]
+            stop_rows = [{"name": stop, "category": "BUS", "properties": {}} for stop in dict.fromkeys(stops)]
+            link_rows = [{"source": s, "target": t, "distance": d} for s, t, d in links]
+            self._write_all(pool, f"{chunk_id}:routes", ROUTE_QUERY, route_rows)
+            self._write_all(pool, f"{chunk_id}:stops", STATION_QUERY, stop_rows)
+            self._write_all(pool, f"{chunk_id}:links", LINK_QUERIES[STATION_RELATIONSHIPS["BUS"]], link_rows)
+        route_links = [{"source": s, "target": t} for s, t in chain.route_links()]
+        self._write_all(pool, f"{last_chunk_id}:route_links", ROUTE_LINK_QUERY, route_links)
+        return csv_rows
+
+    def run(self, categories=CATEGORIES):
+        """
+        Load the selected datasets and report throughput.
+
+        :return: Dictionary with CSV rows read, rows written, batches skipped and rows/sec.
+        """
+        started = time.perf_counter()
+        self.create_schema()
+        csv_rows = 0
+        with ThreadPoolExecutor(max_workers=self.writer_threads, thread_name_prefix="ingest") as pool:
+            self._write_all(pool, "categories", CATEGORY_QUERY, [{"name": name} for name in categories])
+            for category in categories:
+                if category == "BUS":
+                    csv_rows += self._ingest_bus(pool)
+                else:
+                    csv_rows += self._ingest_stations(pool, category)
+        # Readers in every process drop their cached results on their next version poll
+        bump_graph_version()
+        elapsed = time.perf_counter() - started
+        stats = {
+            "csv_rows": csv_rows,
+            "rows_written": self.rows_written,
+            "batches_skipped": self.batches_skipped,
+            "seconds": elapsed,
+            "rows_per_second": self.rows_written / elapsed if elapsed > 0 else 0.0,
+        }
+        print(f"Ingested {csv_rows} CSV rows as {self.rows_written} graph rows in {elapsed:.2f}s "
+              f"({stats['rows_per_second']:.0f} rows/sec, {self.batches_skipped} batches already loaded).")
+        return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load the transport datasets into Neo4j.")
+    parser.add_argument("--data-dir", help="Directory containing the dataset CSVs")
+    parser.add_argument("--chunk-size", type=int, help="CSV rows read per chunk")
+    parser.add_argument("--batch-size", type=int, help="Rows per UNWIND transaction")
+    parser.add_argument("--threads", type=int, help="Parallel writer threads")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and load everything again")
+    args = parser.parse_args()
+    ingestor = GraphIngestor(args.data_dir, args.chunk_size, args.batch_size, args.threads)
+    if args.restart:
+        ingestor.checkpoint.reset()
+    try:
+        ingestor.run()
+    finally:
+        close_driver()
@@ -0,0 +1,169 @@
+import re
+import sys
+import argparse
+from utils.neo4j_connection import GRAPH_VERSION_QUERY, get_session, close_driver
+from utils.centrality import CentralityVisualizationApp
+from utils.pagerank import PAGERANK_TARGETS, Neo4jPageRank
+from utils.async_queries import SHORTEST_PATH_QUERIES
+
+# Uniqueness constraints on every label the app matches by name; each is backed by a range index
+REQUIRED_CONSTRAINTS = [
+    {"name": "category_name", "label": "Category", "property": "name"},
+    {"name": "station_name", "label": "Station", "property": "name"},
+    {"name": "route_name", "label": "Route", "property": "name"},
+    {"name": "graph_meta_name", "label": "GraphMeta", "property": "name"},
+]
+
+# Plan operators that mean a query reads every node (of a label) instead of seeking an index
+FULL_SCAN_OPERATORS = {"AllNodesScan", "NodeByLabelScan"}
+
+# Example parameters for planning; the values only need the right types
+_PLAN_PARAMETERS = {"categories": ["DART", "LUAS", "BUS"], "limit": 25, "category": "DART", "start": "", "end": ""}
+
+
+def known_queries():
+    """
+    The read queries the app sends, taken from the constants that issue them,
+    with the scans each one may legitimately use.
+
+    :return: {query name: {"query", "parameters", "allowed"}}.
+    """
+    queries = {
+        "degree centrality": (CentralityVisualizationApp.DEGREE_CENTRALITY_QUERY, set()),
+        "degree centrality top-N": (CentralityVisualizationApp.DEGREE_CENTRALITY_TOP_QUERY, set()),
+        "graph version": (GRAPH_VERSION_QUERY, set()),
+    }
+    for node_label, relationship_type in sorted(PAGERANK_TARGETS):
+        node_query, edge_query = Neo4jPageRank.graph_queries(node_label, relationship_type)
+        # Route PageRank reads every Route by design, so a label scan is expected; a full node scan is not
+        allowed = {"NodeByLabelScan"} if node_label == "Route" else set()
+        queries[f"pagerank {node_label}/{relationship_type} nodes"] = (node_query, allowed)
+        queries[f"pagerank {node_label}/{relationship_type} edges"] = (edge_query, allowed)
+    for relationship_type, query in SHORTEST_PATH_QUERIES.items():
+        queries[f"shortest path {relationship_type}"] = (query, set())
+    return {
+        name: {
+            "query": query,
+            "parameters": {key: value for key, value in _PLAN_PARAMETERS.items() if re.search(rf"\${key}\b", query)},
+            "allowed": allowed,
+        }
+        for name, (query, allowed) in queries.items()
+    }
+
+
+KNOWN_QUERIES = known_queries()
+
+
+class QueryPlanError(Exception):
+    """
+    Raised when a known query plans a full scan where an index seek is expected.
+    """
+
+
+def constraint_statement(constraint):
+    return (
+        f"CREATE CONSTRAINT {constraint['name']} IF NOT EXISTS "
+        f"FOR (n:{constraint['label']}) REQUIRE n.{constraint['property']} IS UNIQUE"
+    )
+
+
+def missing_schema():
+    """
+    Compare the declared constraints with the database.
+
+    :return: List of human-readable problems (missing constraints or backing indexes not ONLINE).
+    """
+    with get_session() as session:
+        constraints = {
+            (record["labelsOrTypes"][0], record["properties"][0])
+            for record in session.run(
+                "SHOW CONSTRAINTS YIELD type, labelsOrTypes, properties "
+                "WHERE type IN ['UNIQUENESS', 'NODE_KEY'] RETURN labelsOrTypes, properties"
+            )
+            if len(record["properties"]) == 1
+        }
+        index_states = {
+            (record["labelsOrTypes"][0], record["properties"][0]): record["state"]
+            for record in session.run(
+                "SHOW INDEXES YIELD labelsOrTypes, properties, state, type "
+                "WHERE type = 'RANGE' RETURN labelsOrTypes, properties, state"
+            )
+            if record["labelsOrTypes"] and record["properties"] and len(record["properties"]) == 1
+        }
+    problems = []
+    for constraint in REQUIRED_CONSTRAINTS:
+        key = (constraint["label"], constraint["property"])
+        if key not in constraints:
+            problems.append(f"Missing uniqueness constraint on :{key[0]}({key[1]})")
+        elif index_states.get(key) != "ONLINE":
+            problems.append(f"Index on :{key[0]}({key[1]}) is {index_states.get(key, 'missing')}")
+    return problems
+
+
+def apply_schema():
+    """
+    Create any missing constraints; safe to call on every startup.
+
+    :return: List of problems that remain after applying (empty when the schema is complete).
+    """
+    if not missing_schema():
+        return []
+    with get_session() as session:
+        for constraint in REQUIRED_CONSTRAINTS:
+            session.run(constraint_statement(constraint)).consume()
+        session.run("CALL db.awaitIndexes(300)").consume()
+    return missing_schema()
+
+
+def _plan_operators(plan):
+    """
+    Operator names of a plan tree, without the runtime suffix (e.g. "@neo4j").
+    """
+    if not plan:
+        return []
+    operator = plan.get("operatorType", "").split("@")[0]
+    children = plan.get("children", []) or []
+    return [operator] + [name for child in children for name in _plan_operators(child)]
+
+
+def check_query_plans(profile=False):
+    """
+    EXPLAIN (or PROFILE) every known query and collect the full scans it plans.
+
+    :param profile: Run the queries with PROFILE to check the executed plan.
+    :raises QueryPlanError: If any query plans a disallowed scan.
+    :return: {query name: [operators]} for every checked query.
+    """
+    prefix = "PROFILE" if profile else "EXPLAIN"
+    operators_by_query = {}
+    violations = []
+    with get_session() as session:
+        for name, known in KNOWN_QUERIES.items():
+            summary = session.run(f"{prefix} {known['query']}", known["parameters"]).consume()
+            operators = _plan_operators(summary.profile if profile else summary.plan)
+            operators_by_query[name] = operators
+            scans = sorted(set(operators) & (FULL_SCAN_OPERATORS - known["allowed"]))
+            if scans:
+                violations.append(f"{name}: {', '.join(scans)}")
+    if violations:
+        raise QueryPlanError("Full scans planned for known queries: " + "; ".join(violations))
+    return operators_by_query
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply and verify the Neo4j schema for the transport graph.")
+    parser.add_argument("--check-only", action="store_true", help="Report missing schema without creating it")
+    parser.add_argument("--profile", action="store_true", help="Use PROFILE instead of EXPLAIN for the plan check")
+    args = parser.parse_args()
+    try:
+        problems = missing_schema() if args.check_only else apply_schema()
+        for problem in problems:
+            print(problem)
+        check_query_plans(profile=args.profile)
+        print("Schema complete and no known query plans a full scan." if not problems else "Schema incomplete.")
+        sys.exit(1 if problems else 0)
+    except QueryPlanError as e:
+        print(e)
+        sys.exit(1)
+    finally:
+        close_driver()
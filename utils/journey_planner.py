@@ -0,0 +1,350 @@
+import math
+import time
+import heapq
+import numpy as np
+from config import get_journey_config
+from utils.graph_engine import CATEGORIES, haversine_km
+from utils.station_index import normalize_name
+from utils.tracing import traced
+
+# Virtual start node that links to every mode the start station is served by
+SOURCE = -1
+
+TRANSFER = "TRANSFER"
+WALK = "WALK"
+
+
+class JourneyPlanner:
+    """
+    Door-to-door routing across Bus, DART and LUAS on one merged graph.
+
+    Every (mode, station) pair is a node, so a change of mode is an explicit
+    edge that carries the transfer penalty: stations with the same name in
+    two modes are joined directly, and stations of different modes within
+    walking distance are joined by a walking edge. Edge costs are minutes.
+
+    Searches use a binary-heap A* whose heuristic is the straight-line time at
+    the fastest mode's speed. It is only enabled when it is consistent for
+    every edge (all connected stations have coordinates); otherwise the same
+    search runs as plain Dijkstra. Alternatives come from Yen's k-shortest
+    paths, skipping ones that differ only by a pointless change at either end.
+    Its spur searches are guided by exact distances to the destination from
+    one reverse Dijkstra (edges are symmetric); removing edges can only make
+    paths longer, so those distances stay admissible and prune most of each
+    spur search.
+    """
+
+    def __init__(self, transport_graph, config=None):
+        self.config = config or get_journey_config()
+        self.version = transport_graph.version
+        self.nodes = []
+        self.coords = []
+        self.adjacency = []
+        self._by_name = {}
+        self._index = {}
+        speeds = self.config["speeds_kmh"]
+        self._minutes_per_km = {mode: 60.0 / speed for mode, speed in speeds.items()}
+        self._min_minutes_per_km = 60.0 / max(speeds.values())
+        for mode in CATEGORIES:
+            for station, data in transport_graph.station_graphs[mode].nodes(data=True):
+                self._add_node(mode, station, data.get("coords"))
+        for mode in CATEGORIES:
+            self._add_ride_edges(mode, transport_graph.station_graphs[mode])
+        self._add_same_name_transfers()
+        self._add_walking_transfers()
+        coords = np.array([c if c is not None else (np.nan, np.nan) for c in self.coords], dtype=float)
+        self._latitudes = np.radians(coords[:, 0]) if len(coords) else np.empty(0)
+        self._longitudes = np.radians(coords[:, 1]) if len(coords) else np.empty(0)
+        self.geographic = self._heuristic_is_consistent()
+
+    # --------------------------------------
+    # Graph construction
+    # --------------------------------------
+    def _add_node(self, mode, station, coords):
+        node = len(self.nodes)
+        self.nodes.append((mode, station))
+        self.coords.append(coords)
+        self.adjacency.append({})
+        self._index[(mode, station)] = node
+        self._by_name.setdefault(normalize_name(station), []).append(node)
+
+    def _connect(self, u, v, minutes, km, kind):
+        for a, b in ((u, v), (v, u)):
+            current = self.adjacency[a].get(b)
+            if current is None or minutes < current[0]:
+                self.adjacency[a][b] = (minutes, km, kind)
+
+    def _add_ride_edges(self, mode, graph):
+        """
+        In-mode edges: travel time from the distance where both stops have coordinates, else a fixed hop.
+        """
+        for source, target, data in graph.edges(data=True):
+            u, v = self._index[(mode, source)], self._index[(mode, target)]
+            if self.coords[u] is not None and self.coords[v] is not None:
+                km = data["distance"]
+                minutes = km * self._minutes_per_km[mode]
+            else:
+                km, minutes = None, self.config["hop_minutes"]
+            self._connect(u, v, minutes, km, mode)
+
+    def _add_same_name_transfers(self):
+        penalty = self.config["transfer_penalty_minutes"]
+        for nodes in self._by_name.values():
+            for i, u in enumerate(nodes):
+                for v in nodes[i + 1:]:
+                    if self.nodes[u][0] != self.nodes[v][0]:
+                        self._connect(u, v, penalty, 0.0, TRANSFER)
+
+    def _add_walking_transfers(self):
+        """
+        Link stations of different modes within ``max_walk_km`` using a uniform grid,
+        so only stations in neighbouring cells are compared.
+        """
+        max_km = self.config["max_walk_km"]
+        located = [(node, coords) for node, coords in enumerate(self.coords) if coords is not None]
+        if max_km <= 0 or not located:
+            return
+        lat_cell = max_km / 111.2
+        max_abs_lat = min(max(abs(coords[0]) for _, coords in located), 89.0)
+        lon_cell = lat_cell / math.cos(math.radians(max_abs_lat))
+        grid = {}
+        for node, (lat, lon) in located:
+            grid.setdefault((math.floor(lat / lat_cell), math.floor(lon / lon_cell)), []).append(node)
+        walk_minutes_per_km = self._minutes_per_km[WALK]
+        penalty = self.config["transfer_penalty_minutes"]
+        for (row, col), cell_nodes in grid.items():
+            neighbours = [
+                other for d_row in (-1, 0, 1) for d_col in (-1, 0, 1)
+                for other in grid.get((row + d_row, col + d_col), ())
+            ]
+            for u in cell_nodes:
+                for v in neighbours:
+                    if v <= u or self.nodes[u][0] == self.nodes[v][0] or v in self.adjacency[u]:
+                        continue
+                    km = haversine_km(*self.coords[u], *self.coords[v])
+                    if km <= max_km:
+                        self._connect(u, v, km * walk_minutes_per_km + penalty, km, WALK)
+
+    def _heuristic_is_consistent(self):
+        """
+        The straight-line heuristic is consistent if no edge is faster than the
+        fastest mode over its straight-line distance, and no edge joins a
+        located station to one without coordinates (whose heuristic is 0).
+        """
+        for u, edges in enumerate(self.adjacency):
+            for v, (minutes, _, _) in edges.items():
+                a, b = self.coords[u], self.coords[v]
+                if a is None and b is None:
+                    continue
+                if a is None or b is None:
+                    return False
+                if minutes + 1e-9 < haversine_km(*a, *b) * self._min_minutes_per_km:
+                    return False
+        return True
+
+    # --------------------------------------
+    # Search
+    # --------------------------------------
+    def resolve(self, name):
+        """
+        Nodes of every mode serving a station name, compared by the station
+        search key (case, accents, punctuation and spacing ignored).
+        """
+        if name is None:
+            return []
+        return list(self._by_name.get(normalize_name(name), ()))
+
+    def _heuristic(self, targets):
+        """
+        Minutes lower bound from every node to the nearest target, or None when disabled.
+        """
+        if not self.geographic:
+            return None
+        target_coords = [self.coords[t] for t in targets if self.coords[t] is not None]
+        if len(target_coords) < len(targets):
+            return None
+        bound = np.full(len(self.nodes), np.inf)
+        for lat, lon in target_coords:
+            lat, lon = math.radians(lat), math.radians(lon)
+            a = (np.sin((self._latitudes - lat) / 2) ** 2
+                 + np.cos(self._latitudes) * math.cos(lat) * np.sin((self._longitudes - lon) / 2) ** 2)
+            bound = np.minimum(bound, 6371.0 * 2 * np.arcsin(np.sqrt(a)))
+        return np.nan_to_num(bound * self._min_minutes_per_km, nan=0.0).tolist()
+
+    def _distances_to(self, targets):
+        """
+        Minutes from every node to the nearest target (inf when unreachable), by one full Dijkstra.
+        """
+        distances = [math.inf] * len(self.nodes)
+        heap = [(0.0, node) for node in targets]
+        for node in targets:
+            distances[node] = 0.0
+        while heap:
+            cost, u = heapq.heappop(heap)
+            if cost > distances[u]:
+                continue
+            for v, (minutes, _, _) in self.adjacency[u].items():
+                candidate = cost + minutes
+                if candidate < distances[v]:
+                    distances[v] = candidate
+                    heapq.heappush(heap, (candidate, v))
+        return distances
+
+    def _search(self, starts, targets, heuristic, banned_nodes=frozenset(), banned_edges=frozenset()):
+        """
+        A* (Dijkstra without a heuristic) from several start nodes to the nearest target.
+
+        :param starts: [(node, cost already spent)].
+        :return: (minutes, [nodes]) or None when no target is reachable.
+        """
+        best = {}
+        parent = {}
+        heap = []
+        for node, cost in starts:
+            if node in banned_nodes or cost >= best.get(node, math.inf):
+                continue
+            best[node] = cost
+            parent[node] = None
+            heapq.heappush(heap, (cost + (heuristic[node] if heuristic else 0.0), cost, node))
+        while heap:
+            _, cost, u = heapq.heappop(heap)
+            if cost > best[u]:
+                continue
+            if u in targets:
+                path = [u]
+                while parent[path[-1]] is not None:
+                    path.append(parent[path[-1]])
+                return cost, path[::-1]
+            for v, (minutes, _, _) in self.adjacency[u].items():
+                if v in banned_nodes or (u, v) in banned_edges:
+                    continue
+                estimate = heuristic[v] if heuristic else 0.0
+                candidate = cost + minutes
+                if estimate < math.inf and candidate < best.get(v, math.inf):
+                    best[v] = candidate
+                    parent[v] = u
+                    heapq.heappush(heap, (candidate + estimate, candidate, v))
+        return None
+
+    def _path_cost(self, path):
+        return sum(self.adjacency[u][v][0] for u, v in zip(path, path[1:]) if u != SOURCE)
+
+    def _signature(self, nodes):
+        """
+        Node sequence without same-name changes at either end, used to drop near-duplicate alternatives.
+        """
+        start, end = 0, len(nodes)
+        while end - start > 1 and self.adjacency[nodes[start]][nodes[start + 1]][2] == TRANSFER:
+            start += 1
+        while end - start > 1 and self.adjacency[nodes[end - 2]][nodes[end - 1]][2] == TRANSFER:
+            end -= 1
+        return tuple(nodes[start:end])
+
+    def _k_shortest(self, sources, targets, k, heuristic):
+        """
+        Yen's algorithm over paths that begin at the virtual SOURCE node.
+
+        :param heuristic: Lower bounds for the first search; spur searches use exact distances.
+        :return: [(minutes, (SOURCE, node, ...))], fastest first.
+        """
+        first = self._search([(node, 0.0) for node in sources], targets, heuristic)
+        if first is None:
+            return []
+        if k > 1:
+            heuristic = self._distances_to(targets)
+        accepted = [(first[0], (SOURCE,) + tuple(first[1]))]
+        signatures = {self._signature(first[1])}
+        seen = {accepted[0][1]}
+        candidates = []
+        while len(accepted) < k:
+            previous = accepted[-1][1]
+            for i in range(len(previous) - 1):
+                root = previous[:i + 1]
+                spur = root[-1]
+                banned_edges = {path[i:i + 2] for _, path in accepted if path[:i + 1] == root and len(path) > i + 1}
+                banned_nodes = set(root[:-1]) - {SOURCE}
+                if spur == SOURCE:
+                    starts = [(node, 0.0) for node in sources if (SOURCE, node) not in banned_edges]
+                else:
+                    starts = [(spur, self._path_cost(root))]
+                found = self._search(starts, targets, heuristic, banned_nodes, banned_edges)
+                if found is None:
+                    continue
+                cost, spur_path = found
+                path = (SOURCE,) + tuple(spur_path) if spur == SOURCE else root + tuple(spur_path[1:])
+                if path not in seen:
+                    seen.add(path)
+                    heapq.heappush(candidates, (cost, path))
+            while candidates:
+                cost, path = heapq.heappop(candidates)
+                signature = self._signature(path[1:])
+                if signature not in signatures:
+                    signatures.add(signature)
+                    accepted.append((cost, path))
+                    break
+            else:
+                break
+        return accepted
+
+    def _journey(self, minutes, nodes):
+        """
+        Group a node path into legs: rides per mode, same-station changes and walks.
+        """
+        legs = []
+        for u, v in zip(nodes, nodes[1:]):
+            step_minutes, km, kind = self.adjacency[u][v]
+            if legs and kind in CATEGORIES and legs[-1]["mode"] == kind:
+                leg = legs[-1]
+                leg["to"] = self.nodes[v][1]
+                leg["stops"] += 1
+                leg["minutes"] += step_minutes
+                leg["km"] += km or 0.0
+            else:
+                legs.append({
+                    "mode": kind, "from": self.nodes[u][1], "to": self.nodes[v][1],
+                    "stops": 1 if kind in CATEGORIES else 0, "minutes": step_minutes, "km": km or 0.0,
+                })
+        for leg in legs:
+            leg["minutes"] = round(leg["minutes"], 1)
+            leg["km"] = round(leg["km"], 3)
+        path = []
+        for node in nodes:
+            name = self.nodes[node][1]
+            if not path or path[-1] != name:
+                path.append(name)
+        return {
+            "path": path,
+            "legs": legs,
+            "transfers": sum(1 for leg in legs if leg["mode"] in (TRANSFER, WALK)),
+            "totalMinutes": round(minutes, 1),
+            "totalDistance": round(sum(leg["km"] for leg in legs), 3),
+        }
+
+    @traced()
+    def plan(self, start_station, end_station, alternatives=None):
+        """
+        Fastest journeys between two stations over every mode.
+
+        The planner is shared between sessions, so the timing report is returned
+        with the journeys rather than kept on the instance.
+
+        :param alternatives: Number of journeys to return; defaults to the configured value.
+        :return: Tuple (journeys, report). Journeys are ``{"path", "legs", "transfers", "totalMinutes",
+            "totalDistance"}``, fastest first; empty when a station is unknown or unreachable. The
+            report holds ``wall_time``, ``alternatives`` and ``heuristic``.
+        """
+        started = time.perf_counter()
+        sources = self.resolve(start_station)
+        targets = set(self.resolve(end_station))
+        heuristic = None
+        journeys = []
+        if sources and targets and not targets.intersection(sources):
+            heuristic = self._heuristic(targets)
+            found = self._k_shortest(sources, targets, alternatives or self.config["alternatives"], heuristic)
+            journeys = [self._journey(minutes, path[1:]) for minutes, path in found]
+        report = {
+            "wall_time": time.perf_counter() - started,
+            "alternatives": len(journeys),
+            "heuristic": "geographic" if heuristic is not None else "none",
+        }
+        return journeys, report
@@ -0,0 +1,245 @@
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+import pandas as pd
+from neo4j import GraphDatabase
+from config import get_neo4j_config, get_neo4j_pool_config, get_query_cache_config
+from utils.query_cache import GraphVersion, QueryCache, normalize_query
+from utils.tracing import span, profiled, record_summary
+
+logger = logging.getLogger(__name__)
+
+_driver = None
+_driver_lock = threading.Lock()
+
+# Counter every writer bumps; readers in other processes poll it to invalidate cached results
+GRAPH_VERSION_QUERY = """
+OPTIONAL MATCH (m:GraphMeta {name: 'transport'})
+RETURN coalesce(m.version, 0) AS version
+"""
+
+BUMP_GRAPH_VERSION_QUERY = """
+MERGE (m:GraphMeta {name: 'transport'})
+SET m.version = coalesce(m.version, 0) + 1
+RETURN m.version AS version
+"""
+
+_cache_config = get_query_cache_config()
+query_cache = QueryCache(_cache_config["max_bytes"], _cache_config["ttl"])
+graph_version = GraphVersion(_cache_config["version_poll_interval"])
+
+
+def get_driver():
+    """
+    Return the process-wide Neo4j driver, creating it on first use.
+
+    Streamlit re-executes app.py on every interaction but keeps imported
+    modules loaded, so the driver and its connection pool live for the
+    lifetime of the server process.
+    """
+    global _driver
+    if _driver is None:
+        with _driver_lock:
+            if _driver is None:
+                config = get_neo4j_config()
+                with span("neo4j.create_driver"):
+                    _driver = GraphDatabase.driver(
+                        config["uri"],
+                        auth=(config["username"], config["password"]),
+                        **get_neo4j_pool_config()
+                    )
+                atexit.register(close_driver)
+    return _driver
+
+
+def set_driver(driver):
+    """
+    Replace the shared driver, e.g. with one pointed at a local Bolt stand-in.
+
+    :param driver: Object exposing session() and close() like a neo4j Driver.
+    """
+    global _driver
+    with _driver_lock:
+        if _driver is not None and _driver is not driver:
+            _driver.close()
+        _driver = driver
+
+
+def close_driver():
+    """
+    Close the shared driver and release every pooled connection.
+    """
+    global _driver
+    with _driver_lock:
+        if _driver is not None:
+            _driver.close()
+            _driver = None
+
+
+@contextmanager
+def get_session(**session_config):
+    """
+    Borrow a session from the shared connection pool.
+
+    :param session_config: Keyword arguments passed to Driver.session().
+    """
+    with get_driver().session(**session_config) as session:
+        yield session
+
+
+def current_graph_version():
+    """
+    Return the graph version, re-reading the stored counter when the poll interval has passed.
+
+    If the database cannot be reached the last known version is kept, so
+    cached results keep being served until their TTL runs out.
+    """
+    if graph_version.poll_due():
+        try:
+            with span("neo4j.graph_version"), get_session() as session:
+                graph_version.observe(session.run(GRAPH_VERSION_QUERY).single()["version"])
+        except Exception as e:
+            logger.warning("Could not read the graph version: %s", e)
+            graph_version.observe(graph_version.remote)
+    return graph_version.current()
+
+
+def bump_graph_version(session=None):
+    """
+    Record a write: invalidate this process's cached reads and bump the stored counter.
+
+    :param session: Open session to run the bump in; a pooled one is borrowed otherwise.
+    """
+    graph_version.bump()
+    if session is not None:
+        session.run(BUMP_GRAPH_VERSION_QUERY).consume()
+    else:
+        with get_session() as own_session:
+            own_session.run(BUMP_GRAPH_VERSION_QUERY).consume()
+
+
+def query_label(query):
+    """
+    Short one-line form of a Cypher query for span attributes.
+    """
+    return normalize_query(query)[:80]
+
+
+class SharedDriver:
+    """
+    Mixin for executor classes that keep their connection in a ``driver``
+    attribute, e.g. ``class SharedBusExecution(SharedDriver, BusExecution)``.
+
+    The executor's own __init__ runs as usual. The driver it opens for itself
+    is closed as soon as it is assigned; ``driver`` reads resolve to the shared
+    driver at call time, so one swapped in later with set_driver() is picked
+    up. close() leaves the shared driver open.
+    """
+
+    @property
+    def driver(self):
+        return get_driver()
+
+    @driver.setter
+    def driver(self, own_driver):
+        if own_driver is not None and own_driver is not _driver:
+            own_driver.close()
+
+    def close(self):
+        """
+        The shared driver is closed once at interpreter exit.
+        """
+
+
+class FrameBuilder:
+    """
+    Collects streamed records in fixed-size chunks and builds one DataFrame at the end.
+
+    Each full chunk is converted to a columnar DataFrame straight away, so
+    only one chunk of records is held as Python rows at a time; the rest of
+    the result lives in typed column arrays. The final frame is assembled one
+    column at a time, dropping that column from the chunks as it goes, so the
+    peak is the result plus one column's chunks rather than twice the result.
+    """
+
+    def __init__(self, keys, chunk_size=1000):
+        """
+        :param chunk_size: Records per chunk, e.g. the driver's fetch size.
+        """
+        self.keys = list(keys)
+        self.chunk_size = chunk_size
+        self._rows = []
+        self._chunks = []
+
+    def append(self, record):
+        self._rows.append(tuple(record.values()))
+        if len(self._rows) >= self.chunk_size:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            self._chunks.append(pd.DataFrame.from_records(self._rows, columns=self.keys))
+            self._rows = []
+
+    def frame(self):
+        self._flush()
+        if not self._chunks:
+            return pd.DataFrame(columns=self.keys)
+        if len(self._chunks) == 1:
+            return self._chunks.pop()
+        chunks, self._chunks = self._chunks, []
+        columns = {key: pd.concat([chunk.pop(key) for chunk in chunks], ignore_index=True) for key in self.keys}
+        return pd.DataFrame(columns, columns=self.keys, copy=False)
+
+
+class SharedDriverExecution:
+    """
+    Base class for query helpers that borrow sessions from the shared driver.
+    """
+
+    @property
+    def driver(self):
+        return get_driver()
+
+    def close(self):
+        """
+        Sessions are returned to the pool after each query; the shared driver
+        is closed once at interpreter exit, so there is nothing to do here.
+        """
+
+    def execute_query(self, query, parameters=None, cache=True):
+        """
+        Run a read query; results are served from the shared query cache unless ``cache`` is False.
+        """
+        if cache:
+            with span("neo4j.cached_read", query=query_label(query)):
+                return query_cache.get_or_load(
+                    query, parameters, current_graph_version(), lambda: self.execute_query(query, parameters, False)
+                )
+        with span("neo4j.read", query=query_label(query)) as current, get_session() as session:
+            result = session.run(profiled(query), parameters)
+            records = [record for record in result]
+            record_summary(current, result.consume())
+            return records
+
+    def execute_frame(self, query, parameters=None, cache=True):
+        """
+        Stream a query result straight into a DataFrame.
+
+        Records are pulled from the server in fetch-size batches and each
+        batch becomes a columnar chunk as it arrives. Cached frames are
+        shared, so callers must not modify them in place.
+        """
+        if cache:
+            with span("neo4j.cached_read", query=query_label(query)):
+                return query_cache.get_or_load(
+                    query, parameters, current_graph_version(), lambda: self.execute_frame(query, parameters, False)
+                )
+        with span("neo4j.read_frame", query=query_label(query)) as current, get_session() as session:
+            result = session.run(profiled(query), parameters)
+            builder = FrameBuilder(result.keys())
+            for record in result:
+                builder.append(record)
+            record_summary(current, result.consume())
+            return builder.frame()
@@ -0,0 +1,266 @@
+import json
+import math
+import weakref
+import itertools
+from collections import Counter
+import numpy as np
+import pandas as pd
+import networkx as nx
+from pyvis.network import Network
+from config import get_network_view_config
+from utils.centrality_kernels import adjacency_arrays
+from utils.render_cache import RenderCache
+from utils.snapshot import SnapshotGraph
+from utils.tracing import span
+
+# Ways stations are collapsed into group nodes
+GROUP_BY = {"line": "Line / route", "zone": "Zone"}
+
+# Group node standing in for every group beyond the node budget
+OTHER_GROUP = "Other stations"
+
+# Width and height of the box views are laid out in, in vis.js canvas units
+_CANVAS = 1000.0
+
+# Rendered views keyed by graph, graph version and view settings
+network_cache = RenderCache(get_network_view_config()["cache_bytes"])
+
+# Per transport graph: an id for cache keys, and the prepared GraphReducer per category
+_reducers = weakref.WeakKeyDictionary()
+_graph_ids = itertools.count()
+
+
+def group_keys(graph, by="line"):
+    """
+    Group each station is drawn in when the view is collapsed: its zone, or
+    the largest line/route serving it, prefixed with its category.
+    Stations with neither share one group per category.
+
+    :param by: "line" or "zone"; stations without a zone fall back to their line.
+    :return: {station: group name}.
+    """
+    sizes = Counter(
+        (data.get("category"), group) for _, data in graph.nodes(data=True) for group in data.get("groups") or ()
+    )
+    keys = {}
+    for station, data in graph.nodes(data=True):
+        category = data.get("category") or "Station"
+        groups = data.get("groups") or ()
+        if by == "zone" and data.get("zone"):
+            keys[station] = f"{category} zone {data['zone']}"
+        elif groups:
+            keys[station] = f"{category} {max(groups, key=lambda group: (sizes[(category, group)], group))}"
+        else:
+            keys[station] = f"{category} (no line)"
+    return keys
+
+
+class GraphReducer:
+    """
+    A station graph as integer arrays (CSR adjacency, degrees, ranks,
+    coordinates), prepared once per graph version so every view, including
+    each expansion, is reduced with vectorized operations over all edges.
+    """
+
+    def __init__(self, graph, ranks):
+        """
+        :param ranks: {station: score} used to pick stations, e.g. PageRank.
+        """
+        self.graph = graph
+        if isinstance(graph, SnapshotGraph):
+            # Adjacency and coordinates straight from the mapped snapshot arrays
+            self.names, self.indptr, self.indices = graph.names(), graph.indptr, graph.indices
+            self.coords = np.column_stack([graph.latitude, graph.longitude])
+        else:
+            self.names, self.indptr, self.indices, _ = adjacency_arrays(graph)
+            self.coords = np.array([graph.nodes[name].get("coords") or (np.nan, np.nan) for name in self.names],
+                                   dtype=float).reshape(-1, 2)
+        self.position = {name: i for i, name in enumerate(self.names)}
+        self.degree = np.diff(self.indptr)
+        # Each undirected edge once, from its lower to its higher position
+        rows = np.repeat(np.arange(len(self.names), dtype=np.int64), self.degree)
+        upper = rows < self.indices
+        self.sources, self.targets = rows[upper], self.indices[upper]
+        self.rank = np.array([ranks.get(name, 0.0) for name in self.names])
+        self._groups = {}
+
+    def groups(self, by):
+        """
+        :return: (group code per station, group names), computed once per grouping.
+        """
+        if by not in self._groups:
+            keys = group_keys(self.graph, by)
+            codes, names = pd.factorize(pd.Series([keys[name] for name in self.names], dtype=object))
+            self._groups[by] = (codes.astype(np.int64), list(names))
+        return self._groups[by]
+
+    def _top(self, stations, count):
+        return stations[np.argsort(-self.rank[stations], kind="stable")[:count]]
+
+    def reduce(self, mode="top", by="line", min_degree=0, expanded=(), config=None):
+        """
+        Reduce the graph to a view of bounded size.
+
+        "top" keeps the ``max_nodes`` stations with the highest rank; "groups"
+        collapses stations into one node per zone or line (the smallest groups
+        folded into OTHER_GROUP past ``max_nodes``). Stations with fewer than
+        ``min_degree`` connections are dropped first. Each expanded item, a
+        drawn station or group, adds its ``expand_nodes`` highest ranked
+        neighbours or members. Parallel connections between drawn nodes become
+        one weighted edge, and only the ``max_edges`` heaviest are kept.
+
+        :param expanded: Drawn node names to expand, applied in order.
+        :return: networkx Graph whose nodes carry label, title, value, group, kind and coords.
+        """
+        config = config or get_network_view_config()
+        max_nodes, expand_nodes = config["max_nodes"], config["expand_nodes"]
+        candidates = np.flatnonzero(self.degree >= min_degree)
+
+        # View node per station: a group code below ``offset``, ``offset + i`` for station i drawn alone, -1 if hidden
+        mapping = np.full(len(self.names), -1, dtype=np.int64)
+        if mode == "groups":
+            codes, names = self.groups(by)
+            sizes = np.bincount(codes[candidates], minlength=len(names))
+            present = np.argsort(-sizes, kind="stable")[:np.count_nonzero(sizes)]
+            labels = names + [OTHER_GROUP]
+            group_map = np.full(len(labels), len(names), dtype=np.int64)
+            kept = present if len(present) <= max_nodes else present[:max_nodes - 1]
+            group_map[kept] = kept
+            mapping[candidates] = group_map[codes[candidates]]
+        else:
+            labels = []
+            top = self._top(candidates, max_nodes)
+            mapping[top] = top
+        offset = len(labels)
+
+        label_code = {label: code for code, label in enumerate(labels)}
+        for item in expanded:
+            position = self.position.get(item)
+            if position is not None and mapping[position] == offset + position:
+                members = self.indices[self.indptr[position]:self.indptr[position + 1]]
+            elif item in label_code:
+                members = np.flatnonzero(mapping == label_code[item])
+            else:
+                continue
+            members = self._top(members, expand_nodes)
+            mapping[members] = offset + members
+
+        a, b = mapping[self.sources], mapping[self.targets]
+        linked = (a >= 0) & (b >= 0) & (a != b)
+        low, high = np.minimum(a[linked], b[linked]), np.maximum(a[linked], b[linked])
+        pairs, weights = np.unique(low * (offset + len(self.names)) + high, return_counts=True)
+        heaviest = np.argsort(-weights, kind="stable")[:config["max_edges"]]
+
+        drawn = mapping >= 0
+        counts = np.bincount(mapping[drawn], minlength=offset + len(self.names))
+        located = drawn & ~np.isnan(self.coords[:, 0])
+        sums = [np.bincount(mapping[located], weights=self.coords[located, axis], minlength=len(counts))
+                for axis in (0, 1)]
+        located_counts = np.bincount(mapping[located], minlength=len(counts))
+
+        def name(node):
+            return self.names[node - offset] if node >= offset else labels[node]
+
+        view = nx.Graph()
+        for node in np.flatnonzero(counts).tolist():
+            if node >= offset:
+                station = self.names[node - offset]
+                data = self.graph.nodes[station]
+                score = self.rank[node - offset]
+                # Sized like a group of 1 + (rank relative to the average station) members
+                view.add_node(
+                    station, label=station, kind="station", value=1 + score * len(self.names),
+                    group=data.get("category"), coords=data.get("coords"),
+                    title=f"{data.get('category')} station\nPageRank {score:.4f}\n"
+                          f"{self.degree[node - offset]} connection(s)",
+                )
+            else:
+                count = int(counts[node])
+                view.add_node(
+                    labels[node], label=f"{labels[node]} ({count})", kind="group", value=count,
+                    group=labels[node].split(" ")[0], title=f"{count} station(s); expand to show them",
+                    coords=(sums[0][node] / located_counts[node], sums[1][node] / located_counts[node])
+                    if located_counts[node] else None,
+                )
+        for pair, weight in zip(pairs[heaviest].tolist(), weights[heaviest].tolist()):
+            low, high = divmod(pair, offset + len(self.names))
+            view.add_edge(name(low), name(high), weight=weight)
+        return view
+
+
+def layout(view):
+    """
+    Fixed positions for every node, so the browser draws without running physics.
+
+    Geographic coordinates are used when every node has them, otherwise a
+    seeded spring layout.
+
+    :return: {node: (x, y)} within a _CANVAS-sized box.
+    """
+    if not len(view):
+        return {}
+    coords = dict(view.nodes(data="coords"))
+    if all(coords.values()):
+        scale = math.cos(math.radians(sum(lat for lat, _ in coords.values()) / len(coords)))
+        positions = {node: (lon * scale, -lat) for node, (lat, lon) in coords.items()}
+    else:
+        positions = {node: tuple(xy) for node, xy in nx.spring_layout(view, seed=0).items()}
+    xs, ys = zip(*positions.values())
+    span_x, span_y = (max(xs) - min(xs)) or 1.0, (max(ys) - min(ys)) or 1.0
+    factor = _CANVAS / max(span_x, span_y)
+    return {
+        node: ((x - min(xs) - span_x / 2) * factor, (y - min(ys) - span_y / 2) * factor)
+        for node, (x, y) in positions.items()
+    }
+
+
+def render_html(view, height=None):
+    """
+    Standalone pyvis page for a reduced view; vis.js is loaded from its CDN to keep the page small.
+    """
+    height = height or get_network_view_config()["height"]
+    network = Network(height=f"{height}px", width="100%", cdn_resources="remote")
+    for node, (x, y) in layout(view).items():
+        data = view.nodes[node]
+        network.add_node(
+            node, label=data["label"], title=data["title"], value=data["value"], group=data["group"],
+            shape="dot" if data["kind"] == "station" else "square", x=x, y=y,
+        )
+    for a, b, weight in view.edges(data="weight"):
+        network.add_edge(a, b, value=weight, title=f"{weight} connection(s)")
+    network.toggle_physics(False)
+    return network.generate_html()
+
+
+def reducer_for(transport_graph, category):
+    """
+    GraphReducer of a category (or MULTIMODAL), rebuilt when the graph version changes.
+    """
+    prepared = _reducers.setdefault(transport_graph, {"id": next(_graph_ids)})
+    cached = prepared.get(category)
+    if cached is None or cached[0] != transport_graph.version:
+        with span("network_view.prepare", category=category):
+            ranks = {record["Name"]: record["PageRank"] for record in transport_graph.pagerank(category)}
+            cached = (transport_graph.version, GraphReducer(transport_graph.graph_for(category), ranks))
+        prepared[category] = cached
+    return cached[1]
+
+
+def network_html(transport_graph, category, mode="top", by="line", min_degree=0, expanded=()):
+    """
+    Reduced, laid-out network view of a category (or MULTIMODAL) as HTML,
+    cached per graph version and view settings.
+
+    :return: (html, names of the drawn nodes).
+    """
+    reducer = reducer_for(transport_graph, category)
+    key = ("network", _reducers[transport_graph]["id"], category, transport_graph.version,
+           mode, by, min_degree, tuple(expanded))
+    elements = network_cache.get(key)
+    if elements is None:
+        with span("network_view.render", category=category, mode=mode) as current:
+            view = reducer.reduce(mode, by, min_degree, expanded)
+            current.set(nodes=view.number_of_nodes(), edges=view.number_of_edges())
+            elements = [("html", render_html(view)), ("nodes", json.dumps(sorted(view.nodes)))]
+        network_cache.put(key, elements)
+    return elements[0][1], json.loads(elements[1][1])
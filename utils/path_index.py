@@ -0,0 +1,308 @@
+import os
+import json
+import hashlib
+import heapq
+import numpy as np
+
+INDEX_FORMAT_VERSION = 3
+
+# Modules whose code decides an index's contents; editing them invalidates persisted indexes
+_BUILD_SOURCES = (
+    os.path.abspath(__file__),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "graph_engine.py"),
+)
+
+
+def file_fingerprint(*paths):
+    """
+    SHA-256 over the contents of one or more source files.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as handle:
+            for chunk in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def index_fingerprint(source_fingerprint, **options):
+    """
+    Fingerprint of an index: its source data, the build options and settings
+    (e.g. number of landmarks, graph schema) and the code that builds it.
+    """
+    digest = hashlib.sha256(source_fingerprint.encode())
+    digest.update(json.dumps(options, sort_keys=True, default=str).encode())
+    digest.update(file_fingerprint(*_BUILD_SOURCES).encode())
+    return digest.hexdigest()
+
+
+def _read_index_file(path, fingerprint, kind):
+    """
+    Return the arrays stored at ``path`` if they were built from ``fingerprint``, else None.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as stored:
+            arrays = {key: stored[key] for key in stored.files}
+    except (OSError, ValueError):
+        return None
+    if (str(arrays.get("fingerprint")) != fingerprint
+            or str(arrays.get("kind")) != kind
+            or int(arrays.get("version", -1)) != INDEX_FORMAT_VERSION):
+        return None
+    return arrays
+
+
+def _write_index_file(path, fingerprint, kind, **arrays):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(temp_path, fingerprint=fingerprint, kind=kind, version=INDEX_FORMAT_VERSION, **arrays)
+    os.replace(temp_path, path)
+
+
+class AllPairsPathIndex:
+    """
+    All-pairs distance and next-hop tables for a small, static station graph.
+
+    Built with a vectorised Floyd-Warshall, so path queries are a walk along
+    the next-hop table in O(path length).
+    """
+    kind = "all_pairs"
+
+    def __init__(self, nodes, distances, next_hop):
+        self.nodes = list(nodes)
+        self.position = {name: i for i, name in enumerate(self.nodes)}
+        self.distances = distances
+        self.next_hop = next_hop
+
+    @classmethod
+    def build(cls, graph, weight="distance"):
+        nodes = list(graph.nodes)
+        n = len(nodes)
+        position = {name: i for i, name in enumerate(nodes)}
+        distances = np.full((n, n), np.inf)
+        next_hop = np.full((n, n), -1, dtype=np.int32)
+        np.fill_diagonal(distances, 0.0)
+        np.fill_diagonal(next_hop, np.arange(n, dtype=np.int32))
+        for source, target, data in graph.edges(data=True):
+            i, j = position[source], position[target]
+            w = data.get(weight, 1.0)
+            if w < distances[i, j]:
+                distances[i, j] = distances[j, i] = w
+                next_hop[i, j], next_hop[j, i] = j, i
+        for k in range(n):
+            through_k = distances[:, k, None] + distances[None, k, :]
+            improved = through_k < distances
+            if improved.any():
+                distances = np.where(improved, through_k, distances)
+                next_hop = np.where(improved, next_hop[:, k, None], next_hop)
+        return cls(nodes, distances, next_hop)
+
+    def path(self, source, target):
+        """
+        :return: (distance, [station, ...]) or None when unreachable.
+        """
+        i, j = self.position.get(source), self.position.get(target)
+        if i is None or j is None or not np.isfinite(self.distances[i, j]):
+            return None
+        path = [self.nodes[i]]
+        while i != j:
+            i = int(self.next_hop[i, j])
+            path.append(self.nodes[i])
+        return float(self.distances[self.position[source], j]), path
+
+    def arrays(self):
+        """
+        The index as named arrays, e.g. for a snapshot; from_arrays reverses it.
+        """
+        return {"nodes": np.array(self.nodes, dtype=str), "distances": self.distances, "next_hop": self.next_hop}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays["nodes"].tolist(), arrays["distances"], arrays["next_hop"])
+
+    def save(self, path, fingerprint):
+        _write_index_file(path, fingerprint, self.kind, **self.arrays())
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        arrays = _read_index_file(path, fingerprint, cls.kind)
+        return cls.from_arrays(arrays) if arrays is not None else None
+
+
+class LandmarkPathIndex:
+    """
+    ALT (A*, landmarks, triangle inequality) index for the larger BUS graph.
+
+    Stores exact distances from a handful of far-apart landmark stations; the
+    triangle inequality turns them into an admissible A* heuristic. The graph
+    is kept as CSR arrays, so a loaded index can stay memory-mapped.
+    """
+    kind = "landmarks"
+
+    def __init__(self, nodes, indptr, indices, weights, landmark_distances):
+        self.nodes = list(nodes)
+        self.position = {name: i for i, name in enumerate(self.nodes)}
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.landmark_distances = landmark_distances
+
+    @staticmethod
+    def _csr(graph, nodes, weight):
+        """
+        :return: (indptr, indices, weights) with every undirected edge stored in both directions.
+        """
+        position = {name: i for i, name in enumerate(nodes)}
+        edges = [(position[source], position[target], data.get(weight, 1.0))
+                 for source, target, data in graph.edges(data=True)]
+        rows = np.array([u for u, _, _ in edges] + [v for _, v, _ in edges], dtype=np.int64)
+        cols = np.array([v for _, v, _ in edges] + [u for u, _, _ in edges], dtype=np.int64)
+        weights = np.array([w for _, _, w in edges] * 2, dtype=float)
+        order = np.argsort(rows, kind="stable")
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(nodes)))]).astype(np.int64)
+        return indptr, cols[order], weights[order]
+
+    def _neighbours(self, u):
+        start, end = int(self.indptr[u]), int(self.indptr[u + 1])
+        return zip(self.indices[start:end].tolist(), self.weights[start:end].tolist())
+
+    def _dijkstra(self, source):
+        distances = np.full(len(self.nodes), np.inf)
+        distances[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > distances[u]:
+                continue
+            for v, w in self._neighbours(u):
+                nd = d + w
+                if nd < distances[v]:
+                    distances[v] = nd
+                    heapq.heappush(heap, (nd, v))
+        return distances
+
+    def _components(self):
+        """
+        Connected components as lists of node positions, largest first.
+        """
+        component = np.full(len(self.nodes), -1)
+        components = []
+        for start in range(len(self.nodes)):
+            if component[start] >= 0:
+                continue
+            component[start] = len(components)
+            members, stack = [], [start]
+            while stack:
+                u = stack.pop()
+                members.append(u)
+                for v, _ in self._neighbours(u):
+                    if component[v] < 0:
+                        component[v] = len(components)
+                        stack.append(v)
+            components.append(members)
+        return sorted(components, key=len, reverse=True)
+
+    @classmethod
+    def build(cls, graph, num_landmarks=8, weight="distance"):
+        nodes = list(graph.nodes)
+        index = cls(nodes, *cls._csr(graph, nodes, weight), np.zeros((0, len(nodes))))
+        degree = np.diff(index.indptr)
+        rows = []
+        # Landmarks in one component give no bound in another, so each component
+        # gets its own: a share of num_landmarks by size, at least one where a
+        # search can take more than one hop
+        for members in index._components():
+            if len(members) < 3:
+                continue
+            count = min(len(members), max(1, round(num_landmarks * len(members) / len(nodes))))
+            # Farthest-point selection: each new landmark is the member farthest from those chosen
+            closest = np.full(len(nodes), np.inf)
+            landmark = max(members, key=lambda i: degree[i])
+            for _ in range(count):
+                row = index._dijkstra(landmark)
+                rows.append(row)
+                closest = np.minimum(closest, row)
+                landmark = max(members, key=lambda i: closest[i])
+                if closest[landmark] <= 0:
+                    break
+        if rows:
+            index.landmark_distances = np.vstack(rows)
+        return index
+
+    def _heuristic(self, u, target):
+        du = self.landmark_distances[:, u]
+        dt = self.landmark_distances[:, target]
+        finite = np.isfinite(du) & np.isfinite(dt)
+        if not finite.any():
+            return 0.0
+        return float(np.abs(du[finite] - dt[finite]).max())
+
+    def path(self, source, target):
+        """
+        :return: (distance, [station, ...]) or None when unreachable.
+        """
+        s, t = self.position.get(source), self.position.get(target)
+        if s is None or t is None:
+            return None
+        best = {s: 0.0}
+        parent = {s: None}
+        heap = [(self._heuristic(s, t), 0.0, s)]
+        while heap:
+            _, d, u = heapq.heappop(heap)
+            if u == t:
+                path = []
+                while u is not None:
+                    path.append(self.nodes[u])
+                    u = parent[u]
+                return d, path[::-1]
+            if d > best[u]:
+                continue
+            for v, w in self._neighbours(u):
+                nd = d + w
+                if nd < best.get(v, np.inf):
+                    best[v] = nd
+                    parent[v] = u
+                    heapq.heappush(heap, (nd + self._heuristic(v, t), nd, v))
+        return None
+
+    def arrays(self):
+        """
+        The index as named arrays, e.g. for a snapshot; from_arrays reverses it.
+        """
+        return {
+            "nodes": np.array(self.nodes, dtype=str),
+            "indptr": self.indptr,
+            "indices": self.indices,
+            "weights": self.weights,
+            "landmark_distances": self.landmark_distances,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays["nodes"].tolist(), arrays["indptr"], arrays["indices"], arrays["weights"],
+                   arrays["landmark_distances"])
+
+    def save(self, path, fingerprint):
+        _write_index_file(path, fingerprint, self.kind, **self.arrays())
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        arrays = _read_index_file(path, fingerprint, cls.kind)
+        return cls.from_arrays(arrays) if arrays is not None else None
+
+
+# Index classes by their ``kind``, as recorded next to stored indexes
+INDEX_CLASSES = {index_class.kind: index_class for index_class in (AllPairsPathIndex, LandmarkPathIndex)}
+
+
+def load_or_build_path_index(index_class, graph, fingerprint, index_path, **build_options):
+    """
+    Load a persisted index if it matches the source fingerprint, otherwise rebuild and save it.
+    """
+    index = index_class.load(index_path, fingerprint)
+    if index is None:
+        index = index_class.build(graph, **build_options)
+        index.save(index_path, fingerprint)
+    return index
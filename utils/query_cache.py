@@ -0,0 +1,179 @@
+import sys
+import json
+import time
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+
+def normalize_query(query):
+    """
+    Collapse whitespace so the same statement formatted differently shares a cache entry.
+    """
+    return " ".join(query.split())
+
+
+def result_size(value):
+    """
+    Approximate memory footprint of a cached result in bytes.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    size = sys.getsizeof(value)
+    for record in value:
+        size += sys.getsizeof(record) + sum(sys.getsizeof(item) for item in record.values())
+    return size
+
+
+class GraphVersion:
+    """
+    Identifies the current state of the graph as (local, remote).
+
+    ``local`` is bumped by writes made from this process. ``remote`` mirrors a
+    counter stored in Neo4j that every writer (e.g. the ingest CLI) bumps; it is
+    re-read at most every ``poll_interval`` seconds.
+    """
+
+    def __init__(self, poll_interval):
+        self.poll_interval = poll_interval
+        self.local = 0
+        self.remote = 0
+        self._polled_at = None
+        self._lock = threading.Lock()
+
+    def bump(self):
+        with self._lock:
+            self.local += 1
+
+    def poll_due(self):
+        return self._polled_at is None or time.monotonic() - self._polled_at >= self.poll_interval
+
+    def observe(self, remote):
+        with self._lock:
+            self.remote = remote
+            self._polled_at = time.monotonic()
+
+    def current(self):
+        return (self.local, self.remote)
+
+
+class QueryCache:
+    """
+    Memory-bounded LRU of read query results with a TTL.
+
+    Keys are the normalized query text plus its parameters. Every entry
+    belongs to one graph version; when a lookup sees a different version all
+    entries are dropped at once. Counters track hits, misses, evictions, expirations
+    and invalidations, plus the database time spent on misses and the time
+    hits saved.
+    """
+
+    def __init__(self, max_bytes, ttl):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.version = None
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.db_seconds = 0.0
+        self.saved_seconds = 0.0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(query, parameters=None):
+        return normalize_query(query), json.dumps(parameters or {}, sort_keys=True, default=str)
+
+    def _check_version(self, version):
+        """
+        Drop every entry when the version changes, in either direction: a
+        remote counter that goes backwards (e.g. the database was wiped and
+        re-ingested) is a new graph too.
+        """
+        if version != self.version:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self.total_bytes = 0
+            self.version = version
+
+    def get(self, key, version):
+        """
+        :return: The cached result, or None on a miss.
+        """
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is not None and entry["expires_at"] <= time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += entry["latency"]
+            return entry["value"]
+
+    def put(self, key, version, value, latency):
+        """
+        Store a result loaded in ``latency`` seconds for ``version``.
+        """
+        size = result_size(value)
+        with self._lock:
+            self.db_seconds += latency
+            # A load that started before the version changed must not repopulate the cache
+            if version != self.version or size > self.max_bytes:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = {
+                "value": value,
+                "size": size,
+                "latency": latency,
+                "expires_at": time.monotonic() + self.ttl,
+            }
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key):
+        self.total_bytes -= self._entries.pop(key)["size"]
+
+    def get_or_load(self, query, parameters, version, load):
+        """
+        Serve a read from the cache or call ``load()`` and cache its result.
+        """
+        key = self.key(query, parameters)
+        value = self.get(key, version)
+        if value is None:
+            start = time.perf_counter()
+            value = load()
+            self.put(key, version, value, time.perf_counter() - start)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "db_seconds": self.db_seconds,
+                "saved_seconds": self.saved_seconds,
+            }
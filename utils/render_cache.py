@@ -0,0 +1,174 @@
+import io
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+import pandas as pd
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+import plotly.io as pio
+import streamlit as st
+from config import get_render_cache_config
+from utils.tracing import span
+
+_capture = threading.local()
+
+
+def frame_fingerprint(data):
+    """
+    Content hash of a DataFrame (values and index), stable across processes.
+    """
+    digest = hashlib.sha1(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+    digest.update("|".join(map(str, data.columns)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    Memory-bounded LRU of rendered chart output.
+
+    Each entry is the list of elements a plot method produced (PNG bytes,
+    Plotly JSON, tables, headings), keyed by method, arguments and dataset
+    fingerprint. Least recently used entries are evicted once the total size
+    passes ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, elements):
+        size = sum(_element_size(kind, payload) for kind, payload in elements)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (elements, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def _element_size(kind, payload):
+    if kind == "dataframe":
+        return int(payload.memory_usage(deep=True).sum())
+    return len(payload)
+
+
+render_cache = RenderCache(get_render_cache_config()["max_bytes"])
+
+
+def emit(kind, payload):
+    """
+    Record an element while a cached render is capturing, otherwise draw it immediately.
+    """
+    elements = getattr(_capture, "elements", None)
+    if elements is not None:
+        elements.append((kind, payload))
+    else:
+        replay([(kind, payload)])
+
+
+def new_figure(figsize):
+    """
+    Matplotlib figure and axes that pyplot does not track.
+
+    pyplot keeps a process-wide list of open figures and a "current" one,
+    which concurrent sessions would share; these figures are drawn only
+    through their own methods.
+
+    :return: Tuple (fig, ax).
+    """
+    fig = Figure(figsize=figsize)
+    return fig, fig.subplots()
+
+
+def emit_pyplot(fig):
+    """
+    Serialize a Matplotlib figure to PNG, close it, and emit the bytes.
+    """
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight", dpi=get_render_cache_config()["dpi"])
+    if fig.canvas.manager is not None:
+        # Only figures created through pyplot are registered with it
+        plt.close(fig)
+    emit("png", buffer.getvalue())
+
+
+def emit_plotly(fig):
+    emit("plotly", fig.to_json())
+
+
+def replay(elements):
+    """
+    Draw previously captured elements in order.
+    """
+    for kind, payload in elements:
+        if kind == "png":
+            st.image(payload, use_container_width=True)
+        elif kind == "plotly":
+            st.plotly_chart(pio.from_json(payload))
+        elif kind == "dataframe":
+            st.dataframe(payload)
+        elif kind == "subheader":
+            st.subheader(payload)
+        elif kind == "error":
+            st.error(payload)
+
+
+def cached_render(dataset):
+    """
+    Decorator for plot methods: replay cached output or capture a fresh render.
+
+    :param dataset: Name of the instance attribute holding the plotted DataFrame;
+        its fingerprint is part of the cache key.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with span(f"render.{method.__name__}") as current:
+                key = (method.__name__, args, tuple(sorted(kwargs.items())), self.fingerprint(dataset))
+                elements = render_cache.get(key)
+                current.set(cached=elements is not None)
+                if elements is None:
+                    previous = getattr(_capture, "elements", None)
+                    _capture.elements = []
+                    try:
+                        method(self, *args, **kwargs)
+                        elements = _capture.elements
+                    finally:
+                        _capture.elements = previous
+                    render_cache.put(key, elements)
+                replay(elements)
+        return wrapper
+    return decorator
@@ -0,0 +1,577 @@
+import os
+import json
+import time
+import shutil
+import argparse
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse import csgraph
+from config import get_snapshot_config
+from utils.centrality_kernels import SparseGraph, adjacency_arrays
+from utils.dataset_loader import DATASET_SPECS, LOADER_VERSION, load_datasets
+from utils.path_index import INDEX_CLASSES
+from utils.tracing import span
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:
+    pa = None
+
+# Bump when the files written below change so older snapshots are rebuilt
+SNAPSHOT_FORMAT_VERSION = 3
+
+CATEGORIES = ("BUS", "DART", "LUAS")
+
+# File naming the published snapshot; replaced atomically on every publish
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = "build.lock"
+
+# Node attributes stored as UTF-8 string tables ({field}_offsets.npy into {field}_data.npy); "" means None
+STRING_FIELDS = ("name", "category", "zone", "groups")
+
+# Joins a station's routes/lines into one string; route names may contain commas
+GROUP_SEPARATOR = "\x1f"
+
+if pa is not None:
+    # Text columns stay in the mapped Arrow buffers instead of becoming Python strings
+    _ARROW_STRINGS = {pa.string(): pd.StringDtype("pyarrow"), pa.large_string(): pd.StringDtype("pyarrow")}
+
+
+def source_stamps(source_paths):
+    """
+    {category: {"file", "mtime_ns", "size"}} of the dataset files a snapshot is built from.
+    """
+    stamps = {}
+    for category, path in source_paths.items():
+        stat = os.stat(path)
+        stamps[category] = {"file": os.path.basename(path), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+    return stamps
+
+
+def _write_frame(path, data):
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    with ipc.new_file(path, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _read_frame(path):
+    """
+    Memory-map an Arrow IPC file as a DataFrame. Numeric columns without
+    missing values and text columns point into the mapped pages (read-only);
+    only categorical codes and columns with missing numbers are copied.
+    """
+    table = ipc.open_file(pa.memory_map(path)).read_all()
+    return table.to_pandas(split_blocks=True, types_mapper=_ARROW_STRINGS.get)
+
+
+def _string_table(values):
+    """
+    :return: (offsets, data): value i is ``data[offsets[i]:offsets[i + 1]]`` as UTF-8.
+    """
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.concatenate([[0], np.cumsum([len(value) for value in encoded], dtype=np.int64)])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def _write_arrays(directory, arrays):
+    os.makedirs(directory)
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), array)
+
+
+def _map_arrays(directory):
+    """
+    Every .npy file in ``directory``, memory-mapped read-only, by name.
+    """
+    return {
+        entry[:-len(".npy")]: np.load(os.path.join(directory, entry), mmap_mode="r")
+        for entry in os.listdir(directory) if entry.endswith(".npy")
+    }
+
+
+def _write_graph(directory, graph):
+    """
+    Store a graph as one .npy file per array: CSR adjacency (indptr, indices,
+    distance), node coordinates (NaN when unknown) and the string tables.
+
+    :return: Manifest entry: node count, undirected edge count and node label.
+    """
+    # scipy keeps int32 index arrays as they are; wider ones are only needed past 2**31 entries
+    index_dtype = np.int32 if 2 * graph.number_of_edges() < 2 ** 31 else np.int64
+    nodes, indptr, indices, distance = adjacency_arrays(graph, weight="distance", index_dtype=index_dtype)
+    data = [graph.nodes[name] for name in nodes]
+    coords = np.array([node.get("coords") or (np.nan, np.nan) for node in data], dtype=float).reshape(-1, 2)
+    arrays = {
+        "indptr": indptr,
+        "indices": indices,
+        "distance": distance,
+        "latitude": coords[:, 0],
+        "longitude": coords[:, 1],
+    }
+    strings = {
+        "name": [str(name) for name in nodes],
+        "category": [node.get("category") or "" for node in data],
+        "zone": [node.get("zone") or "" for node in data],
+        "groups": [GROUP_SEPARATOR.join(node.get("groups") or ()) for node in data],
+    }
+    for field in STRING_FIELDS:
+        arrays[f"{field}_offsets"], arrays[f"{field}_data"] = _string_table(strings[field])
+    _write_arrays(directory, arrays)
+    labels = {node.get("label") for node in data}
+    return {
+        "nodes": len(nodes),
+        "edges": graph.number_of_edges(),
+        "label": labels.pop() if len(labels) == 1 else None,
+    }
+
+
+class SnapshotNodes:
+    """
+    ``nodes`` of a SnapshotGraph, used like networkx's node view: iterate the
+    names, test ``name in nodes``, read ``nodes[name]`` or ``nodes(data=True)``.
+    """
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __iter__(self):
+        return iter(self._graph.names())
+
+    def __len__(self):
+        return len(self._graph)
+
+    def __contains__(self, name):
+        return name in self._graph.position
+
+    def __getitem__(self, name):
+        return self._graph.attributes(self._graph.position[name])
+
+    def __call__(self, data=False):
+        """
+        :param data: True for (name, attributes) pairs, an attribute name for (name, value) pairs.
+        """
+        if not data:
+            return iter(self)
+        rows = self._graph.node_data()
+        return rows if data is True else ((name, attributes.get(data)) for name, attributes in rows)
+
+
+class SnapshotGraph:
+    """
+    One stored graph as read-only, memory-mapped CSR arrays and node attributes.
+
+    Every process opening the snapshot maps the same files, so the adjacency
+    exists once in the page cache however many workers use it. The part of
+    the networkx graph API the engine, journey planner and network view read
+    (``nodes``, ``edges``, ``in``, sizes) is answered from the arrays; node
+    attribute dicts are built when asked for, not kept.
+    """
+
+    def __init__(self, directory, entry):
+        """
+        :param entry: The graph's manifest entry (node and edge counts, node label).
+        """
+        arrays = _map_arrays(directory)
+        self.indptr = arrays["indptr"]
+        self.indices = arrays["indices"]
+        self.distance = arrays["distance"]
+        self.latitude = arrays["latitude"]
+        self.longitude = arrays["longitude"]
+        self._strings = {field: (arrays[f"{field}_offsets"], arrays[f"{field}_data"]) for field in STRING_FIELDS}
+        self.label = entry.get("label")
+        self._edge_count = entry["edges"]
+        self.nodes = SnapshotNodes(self)
+        self._names = None
+        self._position = None
+        self._sparse = None
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def __iter__(self):
+        return iter(self.names())
+
+    def __contains__(self, name):
+        return name in self.position
+
+    def number_of_nodes(self):
+        return len(self)
+
+    def number_of_edges(self):
+        return self._edge_count
+
+    def is_directed(self):
+        return False
+
+    def _decode(self, field, i=None):
+        """
+        Value ``i`` of a string table, or every value when ``i`` is None.
+        """
+        offsets, data = self._strings[field]
+        if i is not None:
+            return data[offsets[i]:offsets[i + 1]].tobytes().decode("utf-8")
+        data = data.tobytes()
+        offsets = offsets.tolist()
+        return [data[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+
+    def name(self, i):
+        """
+        Name of the node at position ``i``.
+        """
+        return self._decode("name", i)
+
+    def names(self):
+        """
+        Every node name, in position order; decoded once per process.
+        """
+        if self._names is None:
+            self._names = self._decode("name")
+        return self._names
+
+    @property
+    def position(self):
+        """
+        {name: position}, built on first use.
+        """
+        if self._position is None:
+            self._position = {name: i for i, name in enumerate(self.names())}
+        return self._position
+
+    def _attributes(self, i, category, zone, groups):
+        lat, lon = float(self.latitude[i]), float(self.longitude[i])
+        return {
+            "label": self.label,
+            "category": category or None,
+            "coords": None if np.isnan(lat) or np.isnan(lon) else (lat, lon),
+            "groups": tuple(groups.split(GROUP_SEPARATOR)) if groups else (),
+            "zone": zone or None,
+        }
+
+    def attributes(self, i):
+        """
+        Attributes of the node at position ``i``, as a networkx station node carries them.
+        """
+        return self._attributes(i, *(self._decode(field, i) for field in ("category", "zone", "groups")))
+
+    def node_data(self):
+        """
+        (name, attributes) for every node, decoding each string table once.
+        """
+        columns = zip(self.names(), *(self._decode(field) for field in ("category", "zone", "groups")))
+        for i, (name, category, zone, groups) in enumerate(columns):
+            yield name, self._attributes(i, category, zone, groups)
+
+    def edges(self, data=False):
+        """
+        Each undirected edge once, as (source, target) or, with ``data``, (source, target, {"distance": d}).
+        """
+        names = self.names()
+        rows = np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.indptr))
+        upper = rows <= self.indices
+        for u, v, distance in zip(rows[upper].tolist(), self.indices[upper].tolist(), self.distance[upper].tolist()):
+            yield (names[u], names[v], {"distance": distance}) if data else (names[u], names[v])
+
+    def sparse_graph(self):
+        """
+        SparseGraph whose CSR adjacency (edge ``distance`` as weight) wraps the mapped arrays without copying them.
+        """
+        if self._sparse is None:
+            adjacency = sp.csr_matrix((self.distance, self.indices, self.indptr), shape=(len(self), len(self)))
+            self._sparse = SparseGraph(self.names(), adjacency)
+        return self._sparse
+
+    def path(self, source, target):
+        """
+        Dijkstra over the mapped adjacency, for graphs without a path index.
+
+        :return: (distance, [node, ...]) or None when unreachable.
+        """
+        s, t = self.position.get(source), self.position.get(target)
+        if s is None or t is None:
+            return None
+        # Explicit zeros in a sparse matrix are edges to csgraph, so zero-length links are kept
+        distances, predecessors = csgraph.dijkstra(self.sparse_graph().adjacency, indices=s,
+                                                   return_predecessors=True)
+        if not np.isfinite(distances[t]):
+            return None
+        path = [t]
+        while path[-1] != s:
+            path.append(int(predecessors[path[-1]]))
+        names = self.names()
+        return float(distances[t]), [names[i] for i in reversed(path)]
+
+
+class Snapshot:
+    """
+    A published, immutable snapshot: the typed datasets as Arrow IPC files,
+    the graphs (see TransportGraph.snapshot_graphs) and the shortest-path
+    indexes as .npy arrays, opened memory-mapped.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.name = os.path.basename(directory)
+        with open(os.path.join(directory, MANIFEST_FILE), "r", encoding="utf-8") as handle:
+            self.manifest = json.load(handle)
+        self._frames = {}
+        self._graphs = {}
+        self._indexes = {}
+
+    @classmethod
+    def open(cls, root=None, name=None, mapped=True):
+        """
+        Open a snapshot by name, by default the published one.
+
+        :param mapped: Map every dataset, graph and index file now. A pruned
+            snapshot's files stay readable through existing mappings, so a
+            long-lived worker never opens one after it was deleted.
+            False reads only the manifest.
+        :return: Snapshot, or None when there is none, it was written by another
+            format version or its files are gone.
+        """
+        root = root or get_snapshot_config()["dir"]
+        name = name or current_snapshot(root)
+        if name is None:
+            return None
+        try:
+            snapshot = cls(os.path.join(root, name))
+            if snapshot.manifest.get("format") != SNAPSHOT_FORMAT_VERSION:
+                return None
+            if mapped:
+                snapshot._map_all()
+        except (OSError, ValueError):
+            return None
+        return snapshot
+
+    def _map_all(self):
+        if self.has_datasets():
+            for category in CATEGORIES:
+                self.frame(category)
+        for key in self.manifest["graphs"]:
+            self.graph(key)
+        for category, entry in self.manifest["indexes"].items():
+            arrays = _map_arrays(os.path.join(self.directory, "indexes", category))
+            self._indexes[category] = INDEX_CLASSES[entry["kind"]].from_arrays(arrays)
+
+    def matches(self, source_paths):
+        """
+        True when the snapshot was built from the current versions (mtime and size) of the source files.
+        """
+        if self.manifest.get("loader_version") != LOADER_VERSION:
+            return False
+        try:
+            return all(self.manifest["sources"].get(category) == stamp
+                       for category, stamp in source_stamps(source_paths).items())
+        except OSError:
+            return False
+
+    def has_datasets(self):
+        return pa is not None and all(category in self.manifest["datasets"] for category in CATEGORIES)
+
+    def frame(self, category):
+        """
+        The snapshot's copy of one dataset, mapped once per process.
+        """
+        if category not in self._frames:
+            with span("snapshot.map_dataset", category=category):
+                self._frames[category] = _read_frame(os.path.join(self.directory, "datasets", f"{category}.arrow"))
+        return self._frames[category]
+
+    def datasets(self):
+        """
+        The BUS, DART and LUAS datasets, as returned by load_datasets but backed by the snapshot files.
+
+        Frames are shallow copies, so callers may add or replace columns; the
+        mapped columns themselves are read-only.
+
+        :return: Tuple (bus_data, dart_data, luas_data), or None when the snapshot holds no datasets.
+        """
+        if not self.has_datasets():
+            return None
+        return tuple(self.frame(category).copy(deep=False) for category in CATEGORIES)
+
+    def graph(self, key):
+        """
+        SnapshotGraph stored under ``key`` (e.g. a category), or None when the snapshot does not hold it.
+        """
+        if key not in self.manifest["graphs"]:
+            return None
+        if key not in self._graphs:
+            self._graphs[key] = SnapshotGraph(os.path.join(self.directory, "graphs", key), self.manifest["graphs"][key])
+        return self._graphs[key]
+
+    def path_index(self, category, fingerprint):
+        """
+        The category's memory-mapped shortest-path index, or None when the
+        snapshot holds none built from ``fingerprint`` (see TransportGraph.build_path_indexes).
+        """
+        entry = self.manifest["indexes"].get(category)
+        if entry is None or entry["fingerprint"] != fingerprint:
+            return None
+        return self._indexes.get(category)
+
+
+def current_snapshot(root=None):
+    """
+    Name of the published snapshot, or None.
+    """
+    root = root or get_snapshot_config()["dir"]
+    try:
+        with open(os.path.join(root, CURRENT_FILE), "r", encoding="utf-8") as handle:
+            return handle.read().strip() or None
+    except OSError:
+        return None
+
+
+def _publish(root, name):
+    # Readers see either the old name or the new one, never a partial file
+    temp_path = os.path.join(root, f"{CURRENT_FILE}.{os.getpid()}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        handle.write(name)
+    os.replace(temp_path, os.path.join(root, CURRENT_FILE))
+
+
+def _prune(root, keep):
+    """
+    Delete all but the newest ``keep`` snapshots. Snapshot.open maps every
+    file up front, so workers holding a deleted snapshot keep reading it
+    until they switch; where the platform refuses to delete mapped files the
+    directory is left for the next prune.
+    """
+    names = sorted(entry for entry in os.listdir(root)
+                   if os.path.isdir(os.path.join(root, entry)) and not entry.startswith("."))
+    current = current_snapshot(root)
+    for name in names[:-keep] if keep > 0 else names:
+        if name != current:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def build_snapshot(source_paths, datasets, graphs=None, path_indexes=None, root=None):
+    """
+    Write a new snapshot and publish it.
+
+    Files are written into a hidden directory that is renamed into place once
+    complete, then CURRENT is replaced atomically, so readers only ever open
+    finished snapshots. Older snapshots beyond the configured ``keep`` are deleted.
+
+    :param source_paths: {category: dataset CSV path}, recorded to detect stale snapshots.
+    :param datasets: Tuple (bus_data, dart_data, luas_data) as returned by load_datasets.
+    :param graphs: Optional {key: networkx graph}, e.g. TransportGraph.snapshot_graphs().
+    :param path_indexes: Optional {category: (fingerprint, index)}, e.g. TransportGraph.snapshot_path_indexes().
+    :return: Name of the published snapshot.
+    """
+    config = get_snapshot_config()
+    root = root or config["dir"]
+    os.makedirs(root, exist_ok=True)
+    # Names sort by creation time, which is the order _prune relies on
+    name = f"{time.time_ns()}-{os.getpid()}"
+    temp_dir = os.path.join(root, f".{name}.tmp")
+    manifest = {
+        "format": SNAPSHOT_FORMAT_VERSION,
+        "loader_version": LOADER_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "sources": source_stamps(source_paths),
+        "datasets": [],
+        "graphs": {},
+        "indexes": {},
+    }
+    try:
+        with span("snapshot.build", snapshot=name):
+            if pa is not None:
+                os.makedirs(os.path.join(temp_dir, "datasets"))
+                for category, data in zip(CATEGORIES, datasets):
+                    _write_frame(os.path.join(temp_dir, "datasets", f"{category}.arrow"), data)
+                    manifest["datasets"].append(category)
+            else:
+                os.makedirs(temp_dir)
+            for key, graph in (graphs or {}).items():
+                manifest["graphs"][key] = _write_graph(os.path.join(temp_dir, "graphs", key), graph)
+            for category, (fingerprint, index) in (path_indexes or {}).items():
+                _write_arrays(os.path.join(temp_dir, "indexes", category), index.arrays())
+                manifest["indexes"][category] = {"kind": index.kind, "fingerprint": fingerprint}
+            with open(os.path.join(temp_dir, MANIFEST_FILE), "w", encoding="utf-8") as handle:
+                json.dump(manifest, handle, indent=2)
+            os.rename(temp_dir, os.path.join(root, name))
+    except BaseException:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+    _publish(root, name)
+    _prune(root, config["keep"])
+    return name
+
+
+def _acquire_lock(root, timeout):
+    """
+    Take the build lock, breaking one older than ``timeout`` seconds.
+
+    :return: Lock path, or None when another process holds it.
+    """
+    path = os.path.join(root, LOCK_FILE)
+    for _ in range(2):
+        try:
+            handle = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) < timeout:
+                    return None
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        os.write(handle, str(os.getpid()).encode())
+        os.close(handle)
+        return path
+    return None
+
+
+def refresh_snapshot(source_paths, load, root=None):
+    """
+    Name of a published snapshot built from the current source files,
+    building and publishing one when the published snapshot is missing or stale.
+
+    One process builds at a time; the others keep returning the published
+    (possibly stale) snapshot, or None, until the new one is published.
+
+    :param load: Callable returning (datasets, graphs, path_indexes) for build_snapshot; only called when building.
+    :return: Snapshot name, or None.
+    """
+    config = get_snapshot_config()
+    root = root or config["dir"]
+    os.makedirs(root, exist_ok=True)
+    lock = _acquire_lock(root, config["lock_timeout"])
+    if lock is None:
+        return current_snapshot(root)
+    try:
+        # Another process may have published while this one waited for the lock
+        published = Snapshot.open(root, mapped=False)
+        if published is not None and published.matches(source_paths):
+            return published.name
+        datasets, graphs, path_indexes = load()
+        return build_snapshot(source_paths, datasets, graphs, path_indexes, root)
+    finally:
+        os.remove(lock)
+
+
+if __name__ == "__main__":
+    from utils.graph_engine import TransportGraph
+
+    parser = argparse.ArgumentParser(description="Build and publish a shared snapshot of the datasets and graphs.")
+    parser.add_argument("--data-dir", default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                           "data"))
+    parser.add_argument("--root", help="Snapshot directory (default: the configured one)")
+    parser.add_argument("--no-graphs", action="store_true", help="Leave out the graphs and path indexes")
+    args = parser.parse_args()
+    paths = {category: os.path.join(args.data_dir, DATASET_SPECS[category]["file"]) for category in CATEGORIES}
+    graphs = path_indexes = None
+    if not args.no_graphs:
+        transport_graph = TransportGraph.from_csv(*paths.values())
+        transport_graph.build_path_indexes()
+        graphs, path_indexes = transport_graph.snapshot_graphs(), transport_graph.snapshot_path_indexes()
+    name = build_snapshot(paths, load_datasets(args.data_dir), graphs, path_indexes, args.root)
+    snapshot = Snapshot.open(args.root, name, mapped=False)
+    print(f"Published {snapshot.name} in {os.path.dirname(snapshot.directory)}")
+    print(json.dumps({key: snapshot.manifest[key] for key in ("datasets", "graphs", "indexes")}, indent=2))
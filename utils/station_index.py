@@ -0,0 +1,198 @@
+import re
+import bisect
+import difflib
+import unicodedata
+from collections import Counter
+from config import get_graph_schema
+
+_DROPPED = re.compile(r"['’.]")
+_SEPARATORS = re.compile(r"[^\w]+")
+
+# Similarity (difflib ratio) a fuzzy match needs before an input is resolved to it
+MIN_FUZZY_SCORE = 0.75
+
+# Names rescored per fuzzy lookup, picked by the number of trigrams they share with the input
+FUZZY_CANDIDATES = 50
+
+# Trigrams in more than this share of names (and at least this many) are too common to pick candidates
+COMMON_GRAM_SHARE = 0.02
+COMMON_GRAM_FLOOR = 500
+
+
+def normalize_name(name):
+    """
+    Comparison key for a station name: accents, case, apostrophes and
+    punctuation removed, whitespace collapsed ("St. Stephen's Green" -> "st stephens green").
+    """
+    text = unicodedata.normalize("NFKD", str(name))
+    if not text.isascii():
+        text = "".join(char for char in text if not unicodedata.combining(char))
+    return _SEPARATORS.sub(" ", _DROPPED.sub("", text.casefold())).strip()
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def dataset_station_names(bus_data, dart_data, luas_data, schema=None):
+    """
+    Station names per category exactly as TransportGraph names its nodes:
+    DART and LUAS station columns, and the stops listed on every BUS route.
+
+    :return: {category: list of unique names}.
+    """
+    schema = schema or get_graph_schema()
+    columns = {
+        "BUS": (bus_data, schema["BUS"]["stops_column"], True),
+        "DART": (dart_data, schema["DART"]["station_column"], False),
+        "LUAS": (luas_data, schema["LUAS"]["station_column"], False),
+    }
+    names = {}
+    for category, (data, column, listed) in columns.items():
+        if data is None or column not in data.columns:
+            names[category] = []
+            continue
+        values = data[column].dropna().astype(str)
+        if listed:
+            values = values.str.split(",").explode()
+        values = values.str.strip()
+        names[category] = values[values != ""].unique().tolist()
+    return names
+
+
+class StationNameIndex:
+    """
+    Normalized station-name index for autocomplete and typo-tolerant lookups.
+
+    Completion uses a sorted array (one per category, one for all) of every
+    word-start suffix of every normalized name, so a prefix search is one
+    binary search plus a short scan and also matches later words ("green"
+    finds "St. Stephen's Green"). Fuzzy matching picks candidates sharing
+    character trigrams through an inverted index and ranks them by edit
+    similarity, so transposed letters still match. Answers are canonical
+    node names: the spelling the graph (in memory or in Neo4j) uses.
+    """
+
+    def __init__(self, names_by_category):
+        """
+        :param names_by_category: {category: iterable of canonical station names}.
+        """
+        canonical = {}
+        for category, names in names_by_category.items():
+            for name in names:
+                key = normalize_name(name)
+                if key:
+                    canonical.setdefault(key, {}).setdefault(category, name)
+        self.keys = sorted(canonical)
+        self.canonical = [canonical[key] for key in self.keys]
+        self._position = {key: i for i, key in enumerate(self.keys)}
+
+        # Word-start suffixes, sorted, with the word position and the owning key
+        suffixes = {None: []}
+        for i, key in enumerate(self.keys):
+            entries = [(key, 0, i)] + [(key[match.end():], 1, i) for match in re.finditer(" ", key)]
+            suffixes[None].extend(entries)
+            for category in self.canonical[i]:
+                suffixes.setdefault(category, []).extend(entries)
+        self._suffixes = {}
+        for category, entries in suffixes.items():
+            entries.sort()
+            self._suffixes[category] = ([suffix for suffix, _, _ in entries],
+                                        [(later_word, i) for _, later_word, i in entries])
+
+        self._postings = {}
+        for i, key in enumerate(self.keys):
+            for gram in trigrams(key):
+                self._postings.setdefault(gram, []).append(i)
+        self._common_posting = max(COMMON_GRAM_FLOOR, int(len(self.keys) * COMMON_GRAM_SHARE))
+
+    @classmethod
+    def from_datasets(cls, bus_data, dart_data, luas_data, schema=None):
+        """
+        Index the stations of the BUS, DART and LUAS datasets.
+        """
+        return cls(dataset_station_names(bus_data, dart_data, luas_data, schema))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _name(self, i, category):
+        names = self.canonical[i]
+        if category is None:
+            return next(iter(names.values()))
+        return names.get(category)
+
+    def complete(self, text, category=None, limit=10):
+        """
+        Station names starting with ``text``, or with a later word starting with it.
+
+        Names whose first word matches come first, then shorter names.
+
+        :param category: Only names of this category; None for any.
+        :return: Up to ``limit`` canonical names.
+        """
+        prefix = normalize_name(text)
+        if not prefix or category not in self._suffixes:
+            return []
+        suffixes, owners = self._suffixes[category]
+        start = bisect.bisect_left(suffixes, prefix)
+        found = {}
+        # Scan a bounded window so a one-letter prefix stays cheap on large indexes
+        for position in range(start, min(start + limit * 10, len(suffixes))):
+            if not suffixes[position].startswith(prefix):
+                break
+            later_word, i = owners[position]
+            found[i] = min(found.get(i, later_word), later_word)
+        ranked = sorted(found, key=lambda i: (found[i], len(self.keys[i]), self.keys[i]))
+        return [self._name(i, category) for i in ranked[:limit]]
+
+    def fuzzy(self, text, category=None, limit=5):
+        """
+        Names most similar to ``text`` by difflib similarity ratio.
+
+        :return: List of (canonical name, score) pairs, best first.
+        """
+        key = normalize_name(text)
+        if not key:
+            return []
+        grams = trigrams(key)
+        postings = [self._postings[gram] for gram in grams if gram in self._postings]
+        # Trigrams shared by a large share of all names (e.g. "sta") only pick candidates when nothing rarer matched
+        rare = [posting for posting in postings if len(posting) <= self._common_posting]
+        shared = Counter()
+        for posting in rare or postings:
+            shared.update(posting)
+        matcher = difflib.SequenceMatcher(autojunk=False)
+        matcher.set_seq2(key)
+        scored = []
+        for i, _ in shared.most_common(FUZZY_CANDIDATES):
+            if self._name(i, category) is not None:
+                matcher.set_seq1(self.keys[i])
+                if matcher.real_quick_ratio() >= MIN_FUZZY_SCORE / 2 and matcher.quick_ratio() >= MIN_FUZZY_SCORE / 2:
+                    scored.append((matcher.ratio(), i))
+        scored.sort(key=lambda item: (-item[0], self.keys[item[1]]))
+        return [(self._name(i, category), round(score, 3)) for score, i in scored[:limit]]
+
+    def resolve(self, text, category=None):
+        """
+        Map user input to one canonical station name before any path query is sent.
+
+        Tries, in order: the normalized name, a prefix with a single completion,
+        then the best fuzzy match scoring at least MIN_FUZZY_SCORE.
+
+        :return: (name, "exact" | "prefix" | "fuzzy"), or (None, None) when nothing matches.
+        """
+        key = normalize_name(text) if text is not None else ""
+        if not key:
+            return None, None
+        position = self._position.get(key)
+        if position is not None and self._name(position, category) is not None:
+            return self._name(position, category), "exact"
+        completions = self.complete(key, category, limit=2)
+        if len(completions) == 1:
+            return completions[0], "prefix"
+        matches = self.fuzzy(key, category, limit=1)
+        if matches and matches[0][1] >= MIN_FUZZY_SCORE:
+            return matches[0][0], "fuzzy"
+        return None, None
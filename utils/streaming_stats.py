@@ -0,0 +1,481 @@
+import io
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from config import get_stats_config
+from utils.tracing import span
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+# Rows of the file read up front to fix the column names and numeric columns
+_SAMPLE_ROWS = 1000
+
+
+def hash_values(series):
+    """
+    64-bit hashes of the non-missing values of a column, stable across chunks
+    and processes. Numbers are hashed as floats, so 3 and 3.0 count once.
+    """
+    values = series.dropna()
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        values = values.astype("float64")
+    return pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+
+def to_numbers(series):
+    """
+    A column as float64 values: text is parsed with thousands separators
+    removed, and anything unparseable becomes NaN.
+    """
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype="float64", na_value=np.nan)
+    if pa is not None:
+        # Arrow parses a clean column in one pass; anything it rejects takes the coercing path below
+        try:
+            text = pa.array(series, type=pa.string(), from_pandas=True)
+            numbers = pc.cast(pc.replace_substring(text, ",", ""), pa.float64())
+            return numbers.to_numpy(zero_copy_only=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass
+    text = series.astype("string").str.replace(",", "", regex=False)
+    return pd.to_numeric(text, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+
+class Moments:
+    """
+    Pairwise-complete count, mean, variance and covariance of numeric columns.
+
+    Each entry [i, j] describes column i over the rows where both i and j
+    are present, which is what DataFrame.corr() uses. A chunk is reduced
+    with a few matrix products around its own column means, then folded in
+    with the parallel form of Welford's update (Chan et al.), so merging
+    chunks or worker results gives the same answer as one pass over all rows.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        size = len(self.columns)
+        self.count = np.zeros((size, size))
+        self.mean = np.zeros((size, size))
+        self.m2 = np.zeros((size, size))
+        self.comoment = np.zeros((size, size))
+
+    def update(self, values):
+        """
+        :param values: 2D float array, one column per entry of ``columns``; NaN marks missing values.
+        """
+        present = ~np.isnan(values)
+        weights = present.astype("float64")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            counts = present.sum(axis=0)
+            shift = np.where(counts > 0, np.where(present, values, 0.0).sum(axis=0) / np.maximum(counts, 1), 0.0)
+            centered = np.where(present, values - shift, 0.0)
+            chunk = Moments(self.columns)
+            chunk.count = weights.T @ weights
+            sums = centered.T @ weights
+            shifted_mean = np.where(chunk.count > 0, sums / chunk.count, 0.0)
+            chunk.mean = shifted_mean + shift[:, None]
+            chunk.m2 = (centered * centered).T @ weights - sums * shifted_mean
+            chunk.comoment = centered.T @ centered - sums * shifted_mean.T
+        self.merge(chunk)
+
+    def merge(self, other):
+        count = self.count + other.count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share = np.where(count > 0, other.count / count, 0.0)
+        delta = other.mean - self.mean
+        weight = self.count * share
+        self.mean = self.mean + delta * share
+        self.m2 = self.m2 + other.m2 + delta * delta * weight
+        self.comoment = self.comoment + other.comoment + delta * delta.T * weight
+        self.count = count
+
+    def _frame(self, values):
+        return pd.DataFrame(values, index=self.columns, columns=self.columns)
+
+    def variance(self):
+        """
+        :return: Sample variance per column (NaN below two values).
+        """
+        count = np.diag(self.count)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return pd.Series(np.where(count > 1, np.diag(self.m2) / (count - 1), np.nan), index=self.columns)
+
+    def covariance(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self._frame(np.where(self.count > 1, self.comoment / (self.count - 1), np.nan))
+
+    def correlation(self):
+        """
+        Pearson correlation over pairwise-complete rows, as DataFrame.corr() computes it.
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            correlation = self.comoment / np.sqrt(self.m2 * self.m2.T)
+        return self._frame(np.clip(correlation, -1.0, 1.0))
+
+
+class HyperLogLog:
+    """
+    Approximate distinct count in 2**precision one-byte registers.
+    Merging takes the register-wise maximum, so any split of the data gives the same estimate.
+    """
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        if not len(hashes):
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        shift = np.uint64(64 - self.precision)
+        buckets = (hashes >> shift).astype(np.intp)
+        # The payload is the top 64 - precision bits after the shift; a sentinel in the
+        # highest of the vacated low bits caps the rank at 64 - precision + 1
+        rest = (hashes << np.uint64(self.precision)) | (np.uint64(1) << np.uint64(self.precision - 1))
+        # Highest set bit from a float log2; rounding can overshoot by one, which the shift check corrects
+        top = np.minimum(np.floor(np.log2(rest.astype("float64"))), 63).astype(np.uint64)
+        top -= ((rest >> top) == 0).astype(np.uint64)
+        ranks = (np.uint64(64) - top).astype(np.uint8)
+        np.maximum.at(self.registers, buckets, ranks)
+
+    def update(self, series):
+        self.add_hashes(hash_values(series))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        """
+        :return: Estimated number of distinct values (linear counting while registers are mostly empty).
+        """
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        raw = alpha * size * size / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * size and empty:
+            return int(round(size * np.log(size / empty)))
+        return int(round(raw))
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with a bounded rank error (KLL).
+
+    Values are kept in levels of compactors; an item at level h stands for
+    2**h values. When a level outgrows its capacity it is sorted and every
+    other item moves up a level, so the sketch holds O(k log(n / k)) items
+    and the rank error of its quantiles shrinks as 1 / k, whatever the value
+    distribution. Merging concatenates levels and compacts again.
+    """
+
+    def __init__(self, k=600):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.count = 0
+        # A fixed seed keeps profiles reproducible; the coin flips only need to be unbiased
+        self._rng = np.random.default_rng(0)
+
+    def _capacity(self, level):
+        return max(2, int(self.k * (2 / 3) ** (len(self.levels) - 1 - level)))
+
+    def _compact(self):
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(self.levels[level])
+                # An odd item out stays behind at this level
+                kept, items = items[len(items) - len(items) % 2:], items[:len(items) - len(items) % 2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], items[self._rng.integers(2)::2]])
+                self.levels[level] = kept
+            level += 1
+
+    def update(self, values):
+        """
+        :param values: Float array; NaN values are ignored.
+        """
+        values = values[~np.isnan(values)]
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.count += len(values)
+        self._compact()
+
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compact()
+
+    def quantile(self, q):
+        """
+        :return: Approximate q-quantile (0 <= q <= 1), or NaN for an empty sketch.
+        """
+        if not self.count:
+            return np.nan
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        position = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+        return float(items[order[min(position, len(order) - 1)]])
+
+
+class StreamingProfile:
+    """
+    Single-pass summary of a table read in chunks: row and non-null counts,
+    approximate distinct counts for every column, and exact min/max,
+    quantile sketches and pairwise moments for the numeric columns.
+
+    Memory is bounded by the number of columns, not rows. Profiles of
+    different chunks, files or worker processes combine with ``merge``.
+    """
+
+    QUANTILES = (0.25, 0.5, 0.75)
+
+    def __init__(self, columns=(), numeric=(), precision=None, quantile_k=None):
+        """
+        :param columns: Columns summarized; columns first seen in a chunk are added.
+        :param numeric: Columns parsed as numbers (text with thousands separators included).
+        """
+        config = get_stats_config()
+        self.precision = precision or config["hll_precision"]
+        self.quantile_k = quantile_k or config["quantile_k"]
+        self.rows = 0
+        self.columns = []
+        self.non_null = {}
+        self.distinct = {}
+        self.numeric = list(numeric)
+        self.moments = Moments(self.numeric)
+        self.quantiles = {col: QuantileSketch(self.quantile_k) for col in self.numeric}
+        self.minimum = dict.fromkeys(self.numeric, np.nan)
+        self.maximum = dict.fromkeys(self.numeric, np.nan)
+        self._add_columns(columns)
+
+    def _add_columns(self, columns):
+        for col in columns:
+            if col not in self.non_null:
+                self.columns.append(col)
+                self.non_null[col] = 0
+                self.distinct[col] = HyperLogLog(self.precision)
+
+    def update(self, chunk):
+        """
+        Fold one chunk (DataFrame) into the profile.
+        """
+        self._add_columns(chunk.columns)
+        self.rows += len(chunk)
+        for col in chunk.columns:
+            self.non_null[col] += int(chunk[col].notna().sum())
+        values = np.column_stack([
+            to_numbers(chunk[col]) if col in chunk.columns else np.full(len(chunk), np.nan)
+            for col in self.numeric
+        ]) if self.numeric else np.empty((len(chunk), 0))
+        for position, col in enumerate(self.numeric):
+            column = values[:, position]
+            self.quantiles[col].update(column)
+            if not np.isnan(column).all():
+                self.minimum[col] = np.fmin(self.minimum[col], np.nanmin(column))
+                self.maximum[col] = np.fmax(self.maximum[col], np.nanmax(column))
+        self.moments.update(values)
+        for col in chunk.columns:
+            if col in self.quantiles:
+                self.distinct[col].add_hashes(hash_values(pd.Series(values[:, self.numeric.index(col)])))
+            else:
+                self.distinct[col].update(chunk[col])
+
+    def merge(self, other):
+        """
+        Fold another profile of the same numeric columns into this one.
+        """
+        if other.numeric != self.numeric:
+            raise ValueError("Profiles with different numeric columns cannot be merged.")
+        self._add_columns(other.columns)
+        self.rows += other.rows
+        for col in other.columns:
+            self.non_null[col] += other.non_null[col]
+            self.distinct[col].merge(other.distinct[col])
+        for col in self.numeric:
+            self.quantiles[col].merge(other.quantiles[col])
+            self.minimum[col] = np.fmin(self.minimum[col], other.minimum[col])
+            self.maximum[col] = np.fmax(self.maximum[col], other.maximum[col])
+        self.moments.merge(other.moments)
+        return self
+
+    def nunique(self):
+        """
+        :return: Series of approximate distinct (non-missing) values per column.
+        """
+        return pd.Series({col: self.distinct[col].estimate() for col in self.columns}, dtype="int64")
+
+    def describe(self):
+        """
+        Counterpart of ``describe(include='all')``: count and unique for every
+        column; mean, std, min, quartiles and max for the numeric ones.
+        """
+        variance = self.moments.variance()
+        summary = {}
+        for col in self.columns:
+            stats = {"count": self.non_null[col], "unique": self.distinct[col].estimate()}
+            if col in self.quantiles:
+                position = self.numeric.index(col)
+                stats.update({
+                    "mean": self.moments.mean[position, position] if self.non_null[col] else np.nan,
+                    "std": np.sqrt(variance[col]),
+                    "min": self.minimum[col],
+                })
+                for q in self.QUANTILES:
+                    # Sketch values are clamped to the exact range
+                    value = self.quantiles[col].quantile(q)
+                    stats[f"{q:.0%}"] = min(max(value, self.minimum[col]), self.maximum[col])
+                stats["max"] = self.maximum[col]
+            summary[col] = stats
+        index = ["count", "unique", "mean", "std", "min"] + [f"{q:.0%}" for q in self.QUANTILES] + ["max"]
+        return pd.DataFrame(summary, index=index, columns=self.columns)
+
+    def corr(self):
+        """
+        :return: Pearson correlation matrix of the numeric columns.
+        """
+        return self.moments.correlation()
+
+
+def profile_frame(data, numeric=None, chunk_rows=None):
+    """
+    Profile an in-memory frame chunk by chunk.
+
+    :param numeric: Columns parsed as numbers; defaults to the frame's numeric columns.
+    """
+    chunk_rows = chunk_rows or get_stats_config()["chunk_rows"]
+    if numeric is None:
+        numeric = data.select_dtypes(include=["number"]).columns
+    profile = StreamingProfile(data.columns, [col for col in numeric if col in data.columns])
+    for start in range(0, len(data), chunk_rows):
+        profile.update(data.iloc[start:start + chunk_rows])
+    return profile
+
+
+class _ByteRange(io.RawIOBase):
+    """
+    Read-only view of ``length`` bytes of an open binary file from its current position.
+    """
+
+    def __init__(self, handle, length):
+        self.handle = handle
+        self.remaining = length
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.remaining <= 0:
+            return 0
+        count = self.handle.readinto(memoryview(buffer)[:self.remaining])
+        self.remaining -= count
+        return count
+
+
+def _profile_range(path, start, end, columns, numeric, chunk_rows, encoding, read_csv_kwargs):
+    """
+    Profile the CSV rows between two byte offsets; runs in a worker process.
+    """
+    profile = StreamingProfile(columns, numeric)
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        reader = pd.read_csv(
+            io.BufferedReader(_ByteRange(handle, end - start)), header=None, names=columns,
+            encoding=encoding, chunksize=chunk_rows, **read_csv_kwargs,
+        )
+        for chunk in reader:
+            profile.update(chunk)
+    return profile
+
+
+def _line_boundaries(path, parts):
+    """
+    Split a CSV into at most ``parts`` byte ranges of whole lines after the header.
+
+    :return: List of (start, end) offsets.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as handle:
+        handle.readline()
+        data_start = handle.tell()
+        offsets = [data_start]
+        for part in range(1, parts):
+            handle.seek(data_start + (size - data_start) * part // parts)
+            handle.readline()
+            offsets.append(handle.tell())
+    offsets.append(size)
+    offsets = sorted(set(min(offset, size) for offset in offsets))
+    return [(start, end) for start, end in zip(offsets, offsets[1:]) if end > start]
+
+
+def profile_csv(path, numeric=None, chunk_rows=None, workers=None, encoding="latin1", **read_csv_kwargs):
+    """
+    Profile a CSV file in one streaming pass with bounded memory.
+
+    Files of at least ``parallel_min_bytes`` are split into byte ranges at
+    line breaks and profiled by worker processes, whose profiles are merged.
+    Splitting assumes no quoted field spans lines; when the first rows
+    contain one the file is read by a single process.
+
+    :param numeric: Columns parsed as numbers; defaults to those pandas parses as numbers in the first rows.
+    :param workers: Worker processes; defaults to the configured count (0: one per core).
+    :param read_csv_kwargs: Passed on to pandas.read_csv (e.g. ``sep``).
+    :return: StreamingProfile.
+    """
+    config = get_stats_config()
+    chunk_rows = chunk_rows or config["chunk_rows"]
+    workers = workers or config["workers"] or os.cpu_count() or 1
+    sample = pd.read_csv(path, encoding=encoding, nrows=_SAMPLE_ROWS, **read_csv_kwargs)
+    columns = list(sample.columns)
+    if numeric is None:
+        numeric = sample.select_dtypes(include=["number"]).columns
+    numeric = [col for col in numeric if col in columns]
+    text = sample.select_dtypes(include=["object"])
+    multiline = any(text[col].astype(str).str.contains("\n", regex=False).any() for col in text.columns)
+    if multiline or os.path.getsize(path) < config["parallel_min_bytes"]:
+        workers = 1
+
+    with span("stats.profile_csv", file=os.path.basename(path), workers=workers):
+        if workers == 1:
+            profile = StreamingProfile(columns, numeric)
+            for chunk in pd.read_csv(path, encoding=encoding, chunksize=chunk_rows, **read_csv_kwargs):
+                profile.update(chunk)
+            return profile
+        ranges = _line_boundaries(path, workers)
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+            futures = [
+                pool.submit(_profile_range, path, start, end, columns, numeric, chunk_rows, encoding, read_csv_kwargs)
+                for start, end in ranges
+            ]
+            profile = StreamingProfile(columns, numeric)
+            for future in futures:
+                profile.merge(future.result())
+        return profile
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile a CSV file in one streaming pass.")
+    parser.add_argument("path", help="CSV file to profile")
+    parser.add_argument("--numeric", nargs="*", help="Columns parsed as numbers")
+    parser.add_argument("--chunk-rows", type=int, help="CSV rows parsed per chunk")
+    parser.add_argument("--workers", type=int, help="Worker processes (0: one per core)")
+    parser.add_argument("--encoding", default="latin1")
+    args = parser.parse_args()
+    result = profile_csv(args.path, args.numeric, args.chunk_rows, args.workers, args.encoding)
+    with pd.option_context("display.max_columns", None, "display.width", 200):
+        print(f"Rows: {result.rows}")
+        print(result.describe())
+        if result.numeric:
+            print("\nCorrelation Matrix:")
+            print(result.corr())
@@ -0,0 +1,140 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+# Text columns with at most this share of distinct values are stored as categoricals
+CATEGORY_RATIO = 0.5
+
+# Rows looked at to estimate a column's share of distinct values
+CARDINALITY_SAMPLE = 2048
+
+# Up to this many categories are normalized in a Python loop rather than with .str methods
+SMALL_CATEGORIES = 256
+
+# DataFrame.attrs key listing the columns that already hold normalized text
+NORMALIZED_ATTR = "normalized_text_columns"
+
+
+def normalize_categorical(series):
+    """
+    Strip and lower-case the categories of a categorical column, merging
+    categories that become equal. Only the categories are touched, never the rows.
+    """
+    categories = series.cat.categories
+    kind = pd.api.types.infer_dtype(categories)
+    if kind == "string" and len(categories) > SMALL_CATEGORIES:
+        normalized = categories.str.strip().str.lower()
+    elif kind == "string" or kind.startswith("mixed"):
+        # A plain loop beats the vectorized string methods' fixed cost on a handful of labels
+        normalized = pd.Index([value.strip().lower() if isinstance(value, str) else value for value in categories])
+    else:
+        return series
+    if normalized.equals(categories):
+        return series
+    if normalized.is_unique:
+        return series.cat.rename_categories(normalized)
+    remap, merged = pd.factorize(normalized)
+    codes = series.cat.codes.to_numpy()
+    new_codes = np.where(codes >= 0, remap[codes], -1)
+    return pd.Series(pd.Categorical.from_codes(new_codes, categories=merged),
+                     index=series.index, name=series.name)
+
+
+def _is_ascii(array):
+    """
+    True when no byte of the array's string data is outside ASCII.
+    """
+    chunks = array.chunks if isinstance(array, pa.ChunkedArray) else [array]
+    for chunk in chunks:
+        data = chunk.buffers()[2]
+        if data is not None and np.frombuffer(data, dtype=np.uint8).max(initial=0) >= 128:
+            return False
+    return True
+
+
+def normalize_arrow(series):
+    """
+    Strip and lower-case a text column as an Arrow string column, using the
+    ASCII kernels when the data allows it.
+
+    :return: Series with pandas' Arrow string dtype, or None if the column
+             holds values other than strings.
+    """
+    try:
+        array = pa.array(series, type=pa.string(), from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return None
+    if _is_ascii(array):
+        array = pc.ascii_lower(pc.ascii_trim_whitespace(array))
+    else:
+        array = pc.utf8_lower(pc.utf8_trim_whitespace(array))
+    return pd.Series(pd.arrays.ArrowStringArray(array), index=series.index, name=series.name)
+
+
+def is_repetitive(series):
+    """
+    Estimate from an evenly spaced sample whether a column repeats its values enough to be a categorical.
+    """
+    sample = series.iloc[::max(1, len(series) // CARDINALITY_SAMPLE)]
+    return sample.nunique() <= CATEGORY_RATIO * len(sample)
+
+
+def normalize_text_column(series):
+    """
+    Strip and lower-case one text column. Values that are not strings are kept as they are.
+
+    Columns with repeated values become categoricals so the string work runs
+    once per distinct value; the rest become Arrow strings when pyarrow is
+    installed.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return normalize_categorical(series)
+    if is_repetitive(series):
+        codes, uniques = pd.factorize(series)
+        categorical = pd.Series(pd.Categorical.from_codes(codes, categories=uniques),
+                                index=series.index, name=series.name)
+        return normalize_categorical(categorical)
+    if pa is not None:
+        normalized = normalize_arrow(series)
+        if normalized is not None:
+            return normalized
+    normalized = series.str.strip().str.lower()
+    return normalized.where(normalized.notna() | series.isna(), series)
+
+
+def normalize_text_columns(data):
+    """
+    Normalize every text column of a frame in place.
+
+    Normalized columns are recorded in ``data.attrs``, so a repeat call
+    only looks at columns added since and is otherwise free.
+
+    :return: List of the columns normalized by this call.
+    """
+    done = set(data.attrs.get(NORMALIZED_ATTR, ()))
+    text_columns = [
+        col for col in data.select_dtypes(include=["object", "string", "category"]).columns
+        if col not in done
+    ]
+    for col in text_columns:
+        data[col] = normalize_text_column(data[col])
+    data.attrs[NORMALIZED_ATTR] = sorted(done.union(text_columns))
+    return text_columns
+
+
+def normalize_datasets(datasets, max_workers=None):
+    """
+    Normalize several frames concurrently, one worker per frame.
+
+    :return: List with the columns normalized in each frame.
+    """
+    datasets = list(datasets)
+    with ThreadPoolExecutor(max_workers=max_workers or len(datasets) or 1,
+                            thread_name_prefix="normalize") as pool:
+        return list(pool.map(normalize_text_columns, datasets))
@@ -0,0 +1,260 @@
+import json
+import time
+import inspect
+import functools
+import itertools
+import threading
+import tracemalloc
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from config import get_tracing_config
+
+# Trace collecting spans for the current page run, and the innermost open span
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+_span_ids = itertools.count(1)
+_memory_tracking_lock = threading.Lock()
+
+
+class Span:
+    """
+    One timed section: wall time from a monotonic clock, optional traced-memory
+    delta and free-form attributes such as Neo4j result summaries.
+    """
+
+    def __init__(self, name, parent_id, attributes):
+        self.name = name
+        self.id = next(_span_ids)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.thread = threading.current_thread().name
+        self.start = time.perf_counter()
+        self.duration_ms = None
+        self.memory_delta = None
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self, origin):
+        return {
+            "id": self.id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration_ms, 3),
+            "memory_delta_bytes": self.memory_delta,
+            "thread": self.thread,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoSpan:
+    """
+    Stand-in yielded when no trace is active, so call sites never check.
+    """
+
+    def set(self, **attributes):
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+
+class Trace:
+    """
+    Spans finished during one page run, from the script thread, worker
+    threads and the async bridge loop alike.
+    """
+
+    def __init__(self, name, max_spans=None):
+        self.name = name
+        self.started_at = datetime.now(timezone.utc)
+        self.origin = time.perf_counter()
+        self.max_spans = max_spans or get_tracing_config()["max_spans"]
+        self.spans = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.origin) * 1000
+
+    def rows(self):
+        """
+        Finished spans depth first, each followed by its children in start order,
+        so concurrent spans never interleave.
+
+        :return: List of span dictionaries with an added "depth" key.
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start)
+        ids = {span.id for span in spans}
+        children = {}
+        for span in spans:
+            # Spans whose parent was dropped or is still open are shown at the top level
+            parent = span.parent_id if span.parent_id in ids else None
+            children.setdefault(parent, []).append(span)
+        rows = []
+        stack = [(span, 0) for span in reversed(children.get(None, []))]
+        while stack:
+            span, depth = stack.pop()
+            rows.append({**span.to_dict(self.origin), "depth": depth})
+            stack.extend((child, depth + 1) for child in reversed(children.get(span.id, [])))
+        return rows
+
+    def summary(self):
+        """
+        :return: {span name: {"count", "total_ms", "max_ms"}}, slowest total first.
+        """
+        totals = {}
+        for row in self.rows():
+            entry = totals.setdefault(row["name"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] += row["duration_ms"]
+            entry["max_ms"] = max(entry["max_ms"], row["duration_ms"])
+        for entry in totals.values():
+            entry["total_ms"] = round(entry["total_ms"], 3)
+        return dict(sorted(totals.items(), key=lambda item: item[1]["total_ms"], reverse=True))
+
+    def to_json(self, **extra):
+        """
+        :param extra: Additional top-level entries, e.g. cache statistics.
+        """
+        return json.dumps({
+            "name": self.name,
+            "started_at": self.started_at.isoformat(timespec="milliseconds"),
+            "elapsed_ms": round(self.elapsed_ms(), 3),
+            "memory_tracking": tracemalloc.is_tracing(),
+            "dropped_spans": self.dropped,
+            "spans": self.rows(),
+            **extra,
+        }, indent=2, default=str)
+
+
+def start_trace(name):
+    """
+    Begin collecting spans in the current context (e.g. one Streamlit script run).
+
+    :return: The new Trace.
+    """
+    trace = Trace(name)
+    _current_trace.set(trace)
+    _current_span.set(None)
+    return trace
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Time a block as a span of the active trace; a no-op when no trace is active.
+
+    Memory deltas come from tracemalloc when it is tracing. They cover every
+    thread, so spans running alongside others report approximate figures.
+
+    :yield: The Span, for adding attributes while it is open.
+    """
+    trace = _current_trace.get()
+    if trace is None or not get_tracing_config()["enabled"]:
+        yield NO_SPAN
+        return
+    parent = _current_span.get()
+    current = Span(name, parent.id if parent is not None else None, attributes)
+    token = _current_span.set(current)
+    memory_before = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        current.duration_ms = (time.perf_counter() - current.start) * 1000
+        if memory_before is not None and tracemalloc.is_tracing():
+            current.memory_delta = tracemalloc.get_traced_memory()[0] - memory_before
+        _current_span.reset(token)
+        trace.add(current)
+
+
+def traced(name=None):
+    """
+    Decorator recording every call of a function or coroutine function as a span.
+
+    :param name: Span name; defaults to the function's qualified name.
+    """
+    def decorator(function):
+        span_name = name or function.__qualname__
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def bind(function):
+    """
+    Wrap a callable so it runs in a copy of the caller's context, e.g. before
+    handing it to a thread pool, and its spans land in the caller's trace.
+    """
+    return functools.partial(contextvars.copy_context().run, function)
+
+
+def set_memory_tracking(enabled):
+    """
+    Start or stop tracemalloc for the whole process. Tracing allocations slows
+    Python code down noticeably, so it is off unless asked for.
+    """
+    with _memory_tracking_lock:
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def profiled(query):
+    """
+    Prefix a Cypher query with PROFILE when db-hit collection is switched on and a trace is active.
+    """
+    if get_tracing_config()["profile_queries"] and _current_trace.get() is not None:
+        return f"PROFILE {query}"
+    return query
+
+
+def _db_hits(plan):
+    if not plan:
+        return 0
+    return plan.get("dbHits", 0) + sum(_db_hits(child) for child in plan.get("children", ()))
+
+
+def record_summary(current, summary):
+    """
+    Copy the timings (and db hits of PROFILE runs) from a neo4j ResultSummary onto a span.
+    """
+    if summary is None:
+        return
+    current.set(
+        result_available_after_ms=getattr(summary, "result_available_after", None),
+        result_consumed_after_ms=getattr(summary, "result_consumed_after", None),
+    )
+    profile = getattr(summary, "profile", None)
+    if profile:
+        current.set(db_hits=_db_hits(profile))